@@ -1,9 +1,25 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
 from scraper import scrape_article
 from graph import get_credibility_score
+from scoring import claim_penalty, count_references, duplicate_penalty, score_article, get_graph_sink
+from reputation import get_reputation_index
+from near_duplicates import get_duplicate_index, other_domains
+from claim_index import asserts_claim, cites_fact_check, get_claim_index, is_debunked, split_sentences
+from trusted_authors import get_trusted_authors
+from link_graph import get_link_pipeline
+from batch import BatchAnalyzer
+from fetcher import get_fetcher
+from cache import get_cache, normalize_url
+from client_content import parse_client_content
+from coalesce import CanonicalUrls, SingleFlight
+from metrics import REGISTRY, RequestProfiler, increment, log_sampled, timer
+import json
 import logging
-from typing import Dict, Any
+import os
+import time
+from typing import Dict, Any, List, Tuple
+from urllib.parse import urlparse
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
@@ -12,6 +28,63 @@ CORS(app)  # Enable CORS for all routes
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Limits for /analyze/batch
+MAX_BATCH_URLS = 500
+BATCH_MAX_WORKERS = 32
+BATCH_PER_HOST_LIMIT = 4
+
+# Concurrent requests for the same article share one scrape and score
+single_flight = SingleFlight()
+canonical_urls = CanonicalUrls()
+
+# Per-request cProfile capture, enabled by NEWSBUSTER_PROFILE_DIR
+profiler = RequestProfiler()
+
+@app.before_request
+def _start_request_metrics():
+    g.request_start = time.perf_counter()
+    # Profile only requests that ask for it, and only when enabled
+    if profiler.enabled and request.headers.get('X-Profile') == '1':
+        g.profile = profiler.start()
+
+@app.after_request
+def _record_request_metrics(response):
+    stage = f"request_{request.endpoint or 'unknown'}"
+    REGISTRY.observe(stage, time.perf_counter() - g.request_start)
+    increment(f"{stage}_{response.status_code}")
+    profile = g.pop('profile', None)
+    if profile is not None:
+        path = profiler.path_for(request.path)
+        response.headers['X-Profile-File'] = path
+        if response.is_streamed:
+            # Streamed bodies (/analyze/batch) are produced after this hook
+            response.response = profiler.wrap(response.response, profile, path)
+        else:
+            profiler.stop(profile, path)
+    return response
+
+@app.teardown_request
+def _stop_abandoned_profile(error=None):
+    # A request that failed before after_request must not keep the profiler
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profiler.stop(profile, profiler.path_for(request.path))
+
+def preload():
+    """
+    Load shared read-only state up front.
+    
+    Called in the server's master process before workers are forked, so
+    every worker starts with the author, reputation, near-duplicate and
+    claim indexes already in memory (shared copy-on-write). Nothing that owns sockets,
+    threads or SQLite connections (fetcher, cache, graph sinks) is
+    created here; those start lazily in each worker.
+    """
+    get_trusted_authors().load()
+    get_reputation_index()
+    get_duplicate_index()
+    get_claim_index()
+
 def get_score_color(score: float) -> str:
     """
     Determine color based on credibility score.
@@ -29,6 +102,162 @@ def get_score_color(score: float) -> str:
     else:
         return 'red'
 
+def _score_content(article_data: Dict[str, Any], duplicates: List[Tuple[str, float]]) -> Tuple[Dict[str, Any], float]:
+    """
+    Score article data without writing any shared state.
+    
+    Args:
+        article_data: scrape_article-style dict (title, domain, links, author, date, text)
+        duplicates: Near-duplicates of the article as (url, similarity)
+        
+    Returns:
+        Tuple of (response dict, article score between 0 and 1)
+    """
+    with timer('score'):
+        references = count_references(article_data['links'], article_data['domain'])
+        article_score = score_article(article_data, references)
+    with timer('claims'):
+        claims = [claim for claim in get_claim_index().query(article_data['text']) if is_debunked(claim['rating'])]
+        sentences = split_sentences(article_data['text']) if claims else []
+        for claim in claims:
+            claim['asserted'] = asserts_claim(claim['claim'], sentences)
+            claim['cited'] = cites_fact_check(claim, article_data['domain'], article_data['links'])
+    # Only claims stated in the text count; articles pointing at the
+    # fact-check (or published with it) are debunking the claim
+    repeated = sum(1 for claim in claims if claim['asserted'] and not claim['cited'])
+    article_score = round(max(article_score - duplicate_penalty(
+        other_domains(duplicates, article_data['domain'])) - claim_penalty(repeated), 0.0), 4)
+    score = round(article_score * 100, 1)
+
+    # Get credibility score for the domain
+    domain_score = get_credibility_score(article_data['domain'])
+    
+    # Prepare response
+    return {
+        'title': article_data['title'],
+        'domain': article_data['domain'],
+        'score': score,
+        'domain_score': domain_score,
+        'duplicate_cluster': len(duplicates) + 1,
+        'debunked_claims': [{key: claim[key] for key in ('id', 'claim', 'rating', 'url', 'coverage',
+                                                            'asserted', 'cited')}
+                            for claim in claims],
+        'color': get_score_color(score)
+    }, article_score
+
+def score_article_data(url: str, article_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Score article data the server fetched itself and record it: the body
+    joins the near-duplicate index, the article and its links are queued
+    for the graph and its score feeds the domain's reputation.
+    
+    Args:
+        url: URL of the article
+        article_data: scrape_article-style dict (title, domain, links, author, date, text)
+        
+    Returns:
+        Response dict
+    """
+    key = normalize_url(url)
+    with timer('near_duplicates'):
+        duplicates = get_duplicate_index().match_and_add(key, article_data['text'])
+    response, article_score = _score_content(article_data, duplicates)
+
+    # The graph is updated in the background
+    get_graph_sink().submit({**article_data, 'url': key})
+    get_link_pipeline().submit(key, article_data['links'])
+    get_link_pipeline().submit_duplicates(key, duplicates)
+    get_reputation_index().update(key, article_score)
+    return response
+
+def score_client_content(url: str, article_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Score client-supplied article data without recording it.
+    
+    Nothing proves the content is really at the URL, so it is only scored
+    (against the existing near-duplicate index, read-only) and never
+    written to the graph, the reputation index or the duplicate index.
+    
+    Args:
+        url: URL the client says the content came from
+        article_data: scrape_article-style dict (title, domain, links, author, date, text)
+        
+    Returns:
+        Response dict marked 'unverified'
+    """
+    with timer('near_duplicates'):
+        own = normalize_url(url)
+        duplicates = [(match, similarity) for match, similarity in get_duplicate_index().query(article_data['text'])
+                      if match != own]
+    response, _ = _score_content(article_data, duplicates)
+    response['unverified'] = True
+    return response
+
+def analyze_url(url: str) -> Tuple[Dict[str, Any], int]:
+    """
+    Scrape and score a single article.
+    
+    Concurrent calls for the same article (after URL normalization and
+    known canonical URLs) wait for the first one and share its result.
+    
+    Args:
+        url: URL of the article to analyze
+        
+    Returns:
+        Tuple of (response dict, HTTP status code)
+    """
+    return single_flight.do(canonical_urls.resolve(url), lambda: _scrape_and_score(url))
+
+def _scrape_and_score(url: str) -> Tuple[Dict[str, Any], int]:
+    """Scrape and score a single article (no coalescing)"""
+    log_sampled(logger, 'analyze', url=url)
+
+    # Scrape article data
+    article_data = scrape_article(url)
+    if 'retry_after' in article_data:
+        # Host skipped as unhealthy: answer at once with what the domain alone tells us
+        domain = urlparse(url).netloc
+        return {
+            'error': f"Failed to scrape article: {article_data['error']}",
+            'domain': domain,
+            'domain_score': get_credibility_score(domain),
+            'degraded': True,
+            'retry_after': article_data['retry_after']
+        }, 503
+    if 'error' in article_data:
+        return {
+            'error': f"Failed to scrape article: {article_data['error']}"
+        }, 400
+
+    if article_data.get('canonical'):
+        canonical_urls.record(url, article_data['canonical'])
+    return score_article_data(url, article_data), 200
+
+def analyze_client_content(url: str, data: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+    """
+    Score content the client already has, without fetching the URL.
+    
+    Identical content (by fingerprint) shares one cached analysis. The
+    content is unverified, so it is scored but not recorded anywhere.
+    
+    Args:
+        url: URL of the page the content came from
+        data: Request body with "content", "html" or "html_gzip"
+        
+    Returns:
+        Tuple of (response dict, HTTP status code)
+    """
+    try:
+        fingerprint, article_data = parse_client_content(url, data)
+    except ValueError as e:
+        return {'error': f"Invalid content: {str(e)}"}, 400
+
+    response = get_cache().get_or_compute(
+        fingerprint, 'client', lambda: score_client_content(url, article_data)
+    )
+    response['fingerprint'] = fingerprint
+    return response, 200
+
 @app.route('/analyze', methods=['POST'])
 def analyze():
     """
@@ -36,16 +265,35 @@ def analyze():
     
     Request body (JSON):
     {
-        "url": "string"  # URL of the article to analyze
+        "url": "string",        # URL of the article to analyze
+        "content": {            # Optional: content already extracted by the client
+            "title": "string",  # (author, date and links are optional)
+            "text": "string"
+        },
+        "html_gzip": "string"   # Optional: base64 gzip page snapshot ("html" for plain text)
     }
     
+    When content or a snapshot is supplied the URL is not fetched.
+    
     Response (JSON):
     {
         "title": "string",      # Article title
         "domain": "string",     # Website domain
-        "score": float,         # Credibility score (0-100)
+        "score": float,         # Article credibility score (0-100)
+        "domain_score": float,  # Domain credibility score (0-100)
         "color": "string",      # Score color (green/yellow/red)
-        "error": "string"       # Error message if any
+        "duplicate_cluster": int, # Articles sharing this body (near-duplicates + 1)
+        "debunked_claims": [    # Fact-checked claims found in the text
+            {"id": "string", "claim": "string", "rating": "string", "url": "string",
+             "coverage": float, # Share of the claim's BM25 weight in the text
+             "asserted": bool,  # A sentence states the claim (not negated): only these are penalized
+             "cited": bool}     # Links to (or shares a site with) the fact-check: not penalized
+        ],
+        "fingerprint": "string", # Content fingerprint (client content only)
+        "unverified": true,     # Scored from client content, not recorded (client content only)
+        "error": "string",      # Error message if any
+        "degraded": true,       # With error, domain and domain_score: the site is
+        "retry_after": float    # unhealthy and was not fetched (HTTP 503)
     }
     """
     try:
@@ -56,28 +304,12 @@ def analyze():
                 'error': 'URL is required in request body'
             }), 400
 
-        url = data['url']
-        logger.info(f"Analyzing article: {url}")
-
-        # Scrape article data
-        article_data = scrape_article(url)
-        if 'error' in article_data:
-            return jsonify({
-                'error': f"Failed to scrape article: {article_data['error']}"
-            }), 400
-
-        # Get credibility score for the domain
-        score = get_credibility_score(article_data['domain'])
-        
-        # Prepare response
-        response = {
-            'title': article_data['title'],
-            'domain': article_data['domain'],
-            'score': score,
-            'color': get_score_color(score)
-        }
-        
-        return jsonify(response)
+        if any(key in data for key in ('content', 'html', 'html_gzip')):
+            response, status = analyze_client_content(data['url'], data)
+        else:
+            response, status = analyze_url(data['url'])
+        headers = {'Retry-After': str(max(round(response['retry_after']), 1))} if 'retry_after' in response else {}
+        return jsonify(response), status, headers
 
     except Exception as e:
         logger.error(f"Error analyzing article: {str(e)}")
@@ -85,10 +317,72 @@ def analyze():
             'error': 'Internal server error'
         }), 500
 
+@app.route('/analyze/batch', methods=['POST'])
+def analyze_batch():
+    """
+    Analyze many news articles concurrently.
+    
+    Request body (JSON):
+    {
+        "urls": ["string", ...]  # URLs of the articles to analyze
+    }
+    
+    Response (NDJSON, one line per URL in completion order):
+    {"url": "string", "title": "string", "domain": "string", "score": float, "domain_score": float, "color": "string"}
+    {"url": "string", "error": "string"}
+    """
+    data = request.get_json(silent=True)
+    urls = data.get('urls') if isinstance(data, dict) else None
+    if not isinstance(urls, list) or not urls or not all(isinstance(u, str) for u in urls):
+        return jsonify({
+            'error': 'A non-empty list of URLs is required in request body'
+        }), 400
+    if len(urls) > MAX_BATCH_URLS:
+        return jsonify({
+            'error': f'At most {MAX_BATCH_URLS} URLs can be analyzed per batch'
+        }), 400
+
+    log_sampled(logger, 'analyze_batch', rate=1.0, urls=len(urls))
+    analyzer = BatchAnalyzer(
+        lambda url: analyze_url(url)[0],
+        max_workers=BATCH_MAX_WORKERS,
+        per_host_limit=BATCH_PER_HOST_LIMIT
+    )
+
+    def generate():
+        for result in analyzer.run(urls):
+            yield json.dumps(result) + '\n'
+
+    return Response(generate(), mimetype='application/x-ndjson')
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({'status': 'healthy'})
+    return jsonify({
+        'status': 'healthy',
+        'pid': os.getpid(),
+        'fetcher': get_fetcher().stats(),
+        'cache': get_cache().stats(),
+        'graph_sink': get_graph_sink().stats(),
+        'reputation_index': get_reputation_index().stats(),
+        'near_duplicates': get_duplicate_index().stats(),
+        'claim_index': get_claim_index().stats(),
+        'link_graph': get_link_pipeline().stats(),
+        'coalescing': single_flight.stats()
+    })
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Per-stage latency histograms and event counters.
+    
+    Prometheus text format by default, JSON with ?format=json. Stages:
+    fetch, parse, extract, author_lookup, score, graph_sink_write,
+    link_graph_write and request_<endpoint>.
+    """
+    if request.args.get('format') == 'json':
+        return jsonify(REGISTRY.snapshot())
+    return Response(REGISTRY.render_prometheus(), mimetype='text/plain; version=0.0.4')
 
 if __name__ == '__main__':
     app.run(debug=True, port=5000) 
\ No newline at end of file
@@ -0,0 +1,206 @@
+import json
+import sqlite3
+import threading
+import time
+import logging
+from collections.abc import Mapping
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Bytes of the database file each process maps into memory. Pages are
+# shared through the OS page cache, so many workers cost one copy.
+DEFAULT_MMAP_SIZE = 256 * 1024 * 1024
+
+class AuthorStore(Mapping):
+    """
+    SQLite-backed trusted author registry.
+
+    Behaves as a read-only mapping of author_id -> author details and keeps
+    a name/alias index on disk, so a worker only holds the pages it reads.
+    Writes are single-row transactions recorded in an append-only change
+    log; readers in other processes see them on their next query.
+    """
+
+    def __init__(self, path: str, normalize: Callable[[str], str],
+                 readonly: bool = False, mmap_size: int = DEFAULT_MMAP_SIZE):
+        """
+        Open (and create, unless read-only) an author store.
+
+        Args:
+            path: SQLite database file
+            normalize: Function normalizing names into index keys
+            readonly: Open the file read-only (worker processes)
+            mmap_size: Bytes of the file accessed through mmap
+        """
+        self.path = path
+        self.normalize = normalize
+        self.readonly = readonly
+        self.mmap_size = mmap_size
+        self._local = threading.local()
+        if not readonly:
+            self._create_schema()
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections cannot be shared between threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            if self.readonly:
+                conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, timeout=5)
+            else:
+                conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+            self._local.conn = conn
+        return conn
+
+    def _create_schema(self):
+        conn = self._conn()
+        # WAL lets readers keep reading while a writer commits
+        conn.execute("PRAGMA journal_mode = WAL")
+        with conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS authors (
+                    author_id TEXT PRIMARY KEY,
+                    data TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS names (
+                    name_key TEXT PRIMARY KEY,
+                    author_id TEXT NOT NULL,
+                    tokens INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS names_author ON names (author_id);
+                CREATE INDEX IF NOT EXISTS names_tokens ON names (tokens);
+                CREATE TABLE IF NOT EXISTS changes (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    author_id TEXT NOT NULL,
+                    op TEXT NOT NULL,
+                    changed_at REAL NOT NULL
+                );
+            """)
+
+    # Mapping interface
+
+    def __getitem__(self, author_id: str) -> Dict:
+        row = self._conn().execute(
+            "SELECT data FROM authors WHERE author_id = ?", (author_id,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(author_id)
+        return json.loads(row[0])
+
+    def __iter__(self) -> Iterator[str]:
+        for (author_id,) in self._conn().execute("SELECT author_id FROM authors"):
+            yield author_id
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT count(*) FROM authors").fetchone()[0]
+
+    def __contains__(self, author_id) -> bool:
+        return self._conn().execute(
+            "SELECT 1 FROM authors WHERE author_id = ?", (author_id,)
+        ).fetchone() is not None
+
+    # Index
+
+    def find(self, name_key: str) -> Optional[str]:
+        """Get the author_id indexed under a normalized name, if any"""
+        row = self._conn().execute(
+            "SELECT author_id FROM names WHERE name_key = ?", (name_key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def max_name_tokens(self) -> int:
+        """Get the word count of the longest indexed name"""
+        row = self._conn().execute("SELECT max(tokens) FROM names").fetchone()
+        return row[0] or 1
+
+    # Updates
+
+    def _name_keys(self, author: Dict) -> List[str]:
+        keys = [self.normalize(name) for name in [author.get("name", "")] + list(author.get("aliases", []))]
+        return [key for key in keys if key]
+
+    def _write(self, conn: sqlite3.Connection, author_id: str, author: Dict):
+        conn.execute("DELETE FROM names WHERE author_id = ?", (author_id,))
+        conn.execute(
+            "INSERT OR REPLACE INTO authors (author_id, data) VALUES (?, ?)",
+            (author_id, json.dumps(author))
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO names (name_key, author_id, tokens) VALUES (?, ?, ?)",
+            [(key, author_id, len(key.split())) for key in self._name_keys(author)]
+        )
+        conn.execute(
+            "INSERT INTO changes (author_id, op, changed_at) VALUES (?, 'put', ?)",
+            (author_id, time.time())
+        )
+
+    def put(self, author_id: str, author: Dict) -> None:
+        """Insert or replace one author"""
+        with self._conn() as conn:
+            self._write(conn, author_id, author)
+
+    def put_many(self, authors: Dict[str, Dict]) -> None:
+        """Insert or replace many authors in one transaction"""
+        with self._conn() as conn:
+            for author_id, author in authors.items():
+                self._write(conn, author_id, author)
+
+    def delete(self, author_id: str) -> bool:
+        """
+        Remove one author.
+
+        Returns:
+            True if the author existed
+        """
+        with self._conn() as conn:
+            deleted = conn.execute("DELETE FROM authors WHERE author_id = ?", (author_id,)).rowcount
+            if deleted:
+                conn.execute("DELETE FROM names WHERE author_id = ?", (author_id,))
+                conn.execute(
+                    "INSERT INTO changes (author_id, op, changed_at) VALUES (?, 'delete', ?)",
+                    (author_id, time.time())
+                )
+        return bool(deleted)
+
+    def changes_since(self, seq: int) -> List[Tuple[int, str, str]]:
+        """
+        Get registry changes committed after a sequence number.
+
+        Args:
+            seq: Last sequence number already seen (0 for all)
+
+        Returns:
+            List of (seq, author_id, op) with op 'put' or 'delete'
+        """
+        return self._conn().execute(
+            "SELECT seq, author_id, op FROM changes WHERE seq > ? ORDER BY seq", (seq,)
+        ).fetchall()
+
+    def last_seq(self) -> int:
+        """Get the sequence number of the latest change (0 if none)"""
+        return self._conn().execute("SELECT max(seq) FROM changes").fetchone()[0] or 0
+
+    def close(self):
+        """Close this thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+if __name__ == "__main__":
+    import argparse
+    from trusted_authors import normalize_name
+
+    parser = argparse.ArgumentParser(description="Import a trusted_authors.json file into an AuthorStore")
+    parser.add_argument('json_file')
+    parser.add_argument('store_path')
+    args = parser.parse_args()
+
+    with open(args.json_file, 'r', encoding='utf-8') as f:
+        authors = json.load(f)
+    store = AuthorStore(args.store_path, normalize_name)
+    store.put_many(authors)
+    print(f"Imported {len(authors)} authors into {args.store_path}")
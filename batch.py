@@ -0,0 +1,71 @@
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Any, Iterator, List
+from urllib.parse import urlparse
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class BatchAnalyzer:
+    def __init__(self, analyze_fn: Callable[[str], Dict[str, Any]],
+                 max_workers: int = 32, per_host_limit: int = 4):
+        """
+        Run an analysis function over many URLs concurrently.
+
+        Args:
+            analyze_fn: Function taking a URL and returning a result dict
+            max_workers: Total number of URLs fetched at the same time
+            per_host_limit: Maximum concurrent fetches against a single host
+        """
+        self.analyze_fn = analyze_fn
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        self._host_locks: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _host_semaphore(self, url: str) -> threading.BoundedSemaphore:
+        """Get (or create) the semaphore capping concurrency for a URL's host"""
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            if host not in self._host_locks:
+                self._host_locks[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_locks[host]
+
+    def _run_one(self, url: str) -> Dict[str, Any]:
+        """Analyze a single URL while holding its host slot"""
+        with self._host_semaphore(url):
+            try:
+                result = self.analyze_fn(url)
+            except Exception as e:
+                logger.error(f"Error analyzing {url}: {str(e)}")
+                result = {'error': 'Internal server error'}
+        return {'url': url, **result}
+
+    def run(self, urls: List[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Analyze URLs concurrently, yielding each result as soon as it finishes.
+
+        Args:
+            urls: URLs to analyze (duplicates are analyzed once)
+
+        Returns:
+            Iterator of result dicts, each containing the 'url' it belongs to
+        """
+        unique_urls = list(dict.fromkeys(urls))
+        # Interleave hosts so one large domain cannot hold every worker
+        # blocked on its semaphore while other hosts sit idle.
+        by_host: Dict[str, List[str]] = {}
+        for url in unique_urls:
+            by_host.setdefault(urlparse(url).netloc.lower(), []).append(url)
+        ordered = []
+        queues = list(by_host.values())
+        while queues:
+            ordered.extend(queue.pop(0) for queue in queues)
+            queues = [queue for queue in queues if queue]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(self._run_one, url) for url in ordered]
+            for future in as_completed(futures):
+                yield future.result()
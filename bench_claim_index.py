@@ -0,0 +1,78 @@
+import argparse
+import statistics
+import tempfile
+import time
+import numpy as np
+from claim_index import ClaimIndex
+
+def _vocabulary(size: int):
+    return np.array([f"w{i}" for i in range(size)])
+
+def _words(rng, vocabulary, cdf, common: int, specific: int) -> str:
+    """Zipf-distributed common words mixed with uniformly drawn specific ones (names, places)"""
+    ranks = np.concatenate([np.searchsorted(cdf, rng.random(common)),
+                            rng.integers(len(vocabulary) // 100, len(vocabulary), size=specific)])
+    rng.shuffle(ranks)
+    return ' '.join(vocabulary[ranks])
+
+def bench_claim_index(count: int, queries: int, vocabulary_size: int):
+    """Time building, loading, querying and extending a claim index of count claims"""
+    rng = np.random.default_rng(0)
+    vocabulary = _vocabulary(vocabulary_size)
+    cdf = np.cumsum(1.0 / np.arange(1, vocabulary_size + 1))
+    cdf /= cdf[-1]
+    claims = [{'id': str(i), 'claim': _words(rng, vocabulary, cdf, int(rng.integers(3, 9)), int(rng.integers(3, 8))),
+               'rating': 'False'} for i in range(count)]
+
+    index = ClaimIndex()
+    start = time.perf_counter()
+    for i in range(0, count, 10000):
+        index.add_batch(claims[i:i + 10000])
+    index.compact()
+    elapsed = time.perf_counter() - start
+    print(f"{'build ' + str(count):22s} {elapsed:10.1f} s ({count / elapsed:,.0f} claims/s)")
+
+    # Half the articles quote a stored claim
+    articles = []
+    for i in range(queries):
+        body = _words(rng, vocabulary, cdf, 570, 30)
+        if i % 2:
+            body += ' ' + claims[int(rng.integers(count))]['claim']
+        articles.append(body)
+
+    with tempfile.TemporaryDirectory() as path:
+        start = time.perf_counter()
+        index.save(path)
+        print(f"{'save':22s} {time.perf_counter() - start:10.1f} s")
+        start = time.perf_counter()
+        loaded = ClaimIndex.load(path)
+        print(f"{'load (mmap)':22s} {(time.perf_counter() - start) * 1000:10.1f} ms")
+
+        times = []
+        found = 0
+        for article in articles:
+            start = time.perf_counter()
+            found += bool(loaded.query(article))
+            times.append((time.perf_counter() - start) * 1000)
+        times.sort()
+        print(f"{'query p50':22s} {statistics.median(times):10.3f} ms")
+        print(f"{'query p99':22s} {times[int(len(times) * 0.99)]:10.3f} ms")
+        print(f"{'articles with matches':22s} {found:10d} / {queries} ({queries // 2} quote a claim)")
+
+        extra = [{'id': f"new{i}", 'claim': _words(rng, vocabulary, cdf, 8, 4), 'rating': 'False'} for i in range(1000)]
+        start = time.perf_counter()
+        loaded.add_batch(extra)
+        print(f"{'add 1000':22s} {(time.perf_counter() - start) * 1000:10.1f} ms")
+        start = time.perf_counter()
+        loaded.compact()
+        print(f"{'compact':22s} {time.perf_counter() - start:10.1f} s")
+        print(loaded.stats())
+        del loaded
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the BM25 claim index")
+    parser.add_argument('--count', type=int, default=200000, help="Indexed claims")
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--vocabulary', type=int, default=200000, help="Distinct words")
+    args = parser.parse_args()
+    bench_claim_index(args.count, args.queries, args.vocabulary)
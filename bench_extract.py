@@ -0,0 +1,73 @@
+import argparse
+import glob
+import logging
+import os
+import time
+from bs4 import BeautifulSoup
+from extractor import extract_article
+from scraper import ArticleScraper, _extract_title
+
+def _soup_extract(scraper: ArticleScraper, html: str):
+    """Reference path: one soup, then a separate traversal per field"""
+    soup = BeautifulSoup(html, 'html.parser')
+    return {
+        'title': scraper._extract_title(soup),
+        'page_title': _extract_title(soup),
+        'author': scraper._extract_author(soup),
+        'date': scraper._extract_date(soup),
+        'text': scraper._extract_text(soup),
+        'links': [link['href'] for link in soup.find_all('a', href=True)]
+    }
+
+def _time(fn, pages, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for html in pages:
+            fn(html)
+    return (time.perf_counter() - start) / (repeat * len(pages))
+
+def bench_extract(pages_dir: str, repeat: int):
+    paths = sorted(glob.glob(os.path.join(pages_dir, '*.html')))
+    if not paths:
+        print(f"No .html files found in {pages_dir}")
+        return
+    pages = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            pages.append(f.read())
+
+    # Skip TrustedAuthors loading; only the _extract_* methods are timed
+    scraper = ArticleScraper.__new__(ArticleScraper)
+    logging.disable(logging.INFO)
+
+    mismatches = 0
+    for path, html in zip(paths, pages):
+        ref = _soup_extract(scraper, html)
+        got = extract_article(html)
+        for field in ('title', 'author', 'date', 'text', 'links'):
+            if ref[field] != got[field]:
+                mismatches += 1
+                print(f"Mismatch in {field} for {os.path.basename(path)}")
+
+    total_kb = sum(len(html) for html in pages) / 1024
+    print(f"Pages: {len(pages)} ({total_kb:.0f} KB total), repeat: {repeat}")
+    baseline = _time(lambda html: _soup_extract(scraper, html), pages, repeat)
+    print(f"{'BeautifulSoup (html.parser)':32s} {baseline * 1000:8.2f} ms/page")
+    for backend in ('html.parser', 'lxml'):
+        try:
+            elapsed = _time(lambda html: extract_article(html, backend), pages, repeat)
+        except ValueError as e:
+            print(f"{'single pass (' + backend + ')':32s} skipped: {str(e)}")
+            continue
+        print(f"{'single pass (' + backend + ')':32s} {elapsed * 1000:8.2f} ms/page"
+              f"  {baseline / elapsed:5.1f}x")
+    print(f"Field mismatches vs BeautifulSoup: {mismatches}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark article field extraction")
+    parser.add_argument('pages_dir', nargs='?',
+                        default=os.path.join(os.path.dirname(__file__), 'fixtures', 'pages'),
+                        help="Directory of saved .html pages")
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    bench_extract(args.pages_dir, args.repeat)
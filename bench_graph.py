@@ -0,0 +1,140 @@
+import argparse
+import json
+import random
+import time
+import uuid
+from graph import INGEST_QUERY, GraphDB
+from scoring import score_batch
+
+class _StandInResult(list):
+    def single(self):
+        return self[0] if self else None
+
+class _StandInSession:
+    """
+    Session of the in-process Neo4j stand-in.
+
+    Each run() is one Bolt round trip: its parameters are serialized (JSON
+    standing in for PackStream) and it sleeps for the configured latency.
+    Ingest batches are scored locally with the graph rules, without
+    references.
+    """
+
+    def __init__(self, driver: "_StandInDriver"):
+        self.driver = driver
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query: str, params=None) -> _StandInResult:
+        self.driver.round_trips += 1
+        self.driver.bytes_sent += len(json.dumps(params or {}))
+        time.sleep(self.driver.latency)
+        if query == INGEST_QUERY:
+            rows = params['rows']
+            scores = score_batch(rows, text_lengths=[row['text_length'] for row in rows])
+            return _StandInResult({'url': row['url'], 'score': float(score)} for row, score in zip(rows, scores))
+        return _StandInResult([{'edges': len(params['rows'])}] if params and 'rows' in params else [])
+
+    def execute_write(self, work):
+        return work(self)
+
+class _StandInDriver:
+    """In-process stand-in for the neo4j driver that counts round trips"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.round_trips = 0
+        self.bytes_sent = 0
+
+    def session(self) -> _StandInSession:
+        return _StandInSession(self)
+
+    def close(self):
+        pass
+
+def _make_articles(count: int, run_id: str):
+    words = "health officials confirmed new figures according to the report".split()
+    articles = []
+    for i in range(count):
+        articles.append({
+            'url': f"https://bench-{run_id}.example.com/article/{i}",
+            'title': f"Benchmark article {i}",
+            'author': random.choice(['Jane Doe', '']),
+            'date': random.choice(['2024-01-12', '']),
+            'text': ' '.join(random.choice(words) for _ in range(random.randint(20, 200)))
+        })
+    return articles
+
+def bench_graph(uri: str, user: str, password: str, count: int, batch_sizes, store_text: bool,
+                stand_in_latency: float = None):
+    """
+    Compare per-article and batched ingestion.
+
+    With stand_in_latency (seconds per round trip) an in-process stand-in
+    replaces Neo4j, so the run measures round trips and client-side cost
+    rather than the database.
+    """
+    stand_in = None
+    if stand_in_latency is not None:
+        db = GraphDB(uri=uri, user=user, password=password)
+        stand_in = db._driver = _StandInDriver(stand_in_latency)
+        print(f"Neo4j stand-in, {stand_in_latency * 1000:.1f} ms per round trip")
+    else:
+        try:
+            db = GraphDB(uri=uri, user=user, password=password).connect()
+        except Exception as e:
+            print(f"Could not connect to Neo4j at {uri}: {str(e)}")
+            print("Start a local instance with:")
+            print("  docker run --rm -p 7687:7687 -e NEO4J_AUTH=neo4j/password neo4j:5")
+            print("or measure round trips against the stand-in with --stand-in")
+            return
+
+    def report(label: str, elapsed: float, round_trips_before: int):
+        line = f"{label:16s} {count / elapsed:10.0f} articles/s"
+        if stand_in is not None:
+            line += f" {stand_in.round_trips - round_trips_before:8d} round trips"
+        print(line)
+
+    run_id = uuid.uuid4().hex[:8]
+    try:
+        # Baseline: one session and transaction per article
+        articles = _make_articles(count, f"{run_id}-single")
+        round_trips = stand_in.round_trips if stand_in else 0
+        start = time.perf_counter()
+        for article in articles:
+            db.calculate_credibility_score(article['url'], article)
+        report('per-article', time.perf_counter() - start, round_trips)
+
+        for batch_size in batch_sizes:
+            articles = _make_articles(count, f"{run_id}-{batch_size}")
+            round_trips = stand_in.round_trips if stand_in else 0
+            start = time.perf_counter()
+            scores = db.ingest_articles(articles, batch_size=batch_size, store_text=store_text)
+            elapsed = time.perf_counter() - start
+            assert len(scores) == count
+            report(f"batch {batch_size}", elapsed, round_trips)
+    finally:
+        with db.driver.session() as session:
+            session.run("MATCH (a:Article) WHERE a.url STARTS WITH $prefix DETACH DELETE a",
+                        {'prefix': f"https://bench-{run_id}"})
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Neo4j article ingestion and scoring")
+    parser.add_argument('--uri', default="bolt://localhost:7687")
+    parser.add_argument('--user', default="neo4j")
+    parser.add_argument('--password', default="password")
+    parser.add_argument('--count', type=int, default=2000)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 50, 200, 1000])
+    parser.add_argument('--no-text', action='store_true', help="Store text length only")
+    parser.add_argument('--stand-in', action='store_true',
+                        help="Use an in-process Neo4j stand-in that counts round trips")
+    parser.add_argument('--latency-ms', type=float, default=0.5,
+                        help="Simulated round-trip latency of the stand-in")
+    args = parser.parse_args()
+    bench_graph(args.uri, args.user, args.password, args.count, args.batch_sizes, not args.no_text,
+                args.latency_ms / 1000 if args.stand_in else None)
@@ -0,0 +1,62 @@
+import argparse
+import random
+import statistics
+import tempfile
+import time
+import numpy as np
+from near_duplicates import NearDuplicateIndex, band_keys
+
+def _make_text(words, length: int) -> str:
+    return ' '.join(random.choice(words) for _ in range(length))
+
+def bench_near_duplicates(count: int, queries: int):
+    """Time signatures, LSH lookups and persistence against an index of count articles"""
+    words = [f"word{i}" for i in range(20000)]
+    texts = [_make_text(words, 600) for _ in range(queries)]
+    index = NearDuplicateIndex()
+
+    start = time.perf_counter()
+    index.hasher.signatures(texts)
+    print(f"{'signatures':22s} {(time.perf_counter() - start) * 1000 / queries:10.3f} ms/article")
+
+    # Random signatures stand in for the stored articles (hashing millions of
+    # real bodies would dominate the run); they collide with nothing
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    signatures = rng.integers(0, 2 ** 32 - 1, size=(count, index.hasher.num_perm), dtype=np.uint32)
+    keys = band_keys(signatures, index.bands)
+    for i in range(count):
+        index._add(f"https://bench.example.com/{i}", signatures[i], keys[i])
+    index.compact()
+    print(f"{'build ' + str(count):22s} {time.perf_counter() - start:10.1f} s")
+
+    # Half the queries are edited copies of stored articles
+    index.add_batch([f"https://origin.example.com/{i}" for i in range(queries)], texts)
+    probes = [t.replace(t.split()[5], 'edited', 1) if i % 2 else _make_text(words, 600)
+              for i, t in enumerate(texts)]
+    with tempfile.TemporaryDirectory() as path:
+        start = time.perf_counter()
+        index.save(path)
+        print(f"{'save':22s} {time.perf_counter() - start:10.1f} s")
+        start = time.perf_counter()
+        loaded = NearDuplicateIndex.load(path)
+        print(f"{'load (mmap)':22s} {(time.perf_counter() - start) * 1000:10.1f} ms")
+
+        times = []
+        found = 0
+        for probe in probes:
+            start = time.perf_counter()
+            found += bool(loaded.query(probe))
+            times.append((time.perf_counter() - start) * 1000)
+        print(f"{'query p50':22s} {statistics.median(times):10.3f} ms")
+        print(f"{'query max':22s} {max(times):10.3f} ms")
+        print(f"{'edited copies found':22s} {found:10d} / {queries // 2}")
+        print(loaded.stats())
+        del loaded
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the MinHash/LSH near-duplicate index")
+    parser.add_argument('--count', type=int, default=200000, help="Stored articles")
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+    bench_near_duplicates(args.count, args.queries)
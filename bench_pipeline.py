@@ -0,0 +1,209 @@
+import argparse
+import json
+import logging
+import os
+import re
+import resource
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, Any, List, Optional
+from urllib.parse import urlparse
+from bs4 import BeautifulSoup
+from standin_server import PAGES_DIR, start_origin_server
+from fetcher import Fetcher, get_fetcher
+from extractor import extract_article
+from scraper import ArticleScraper, build_scraped_page
+from trusted_authors import TrustedAuthors
+from scoring import count_references, score_article
+from near_duplicates import NearDuplicateIndex
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'fixtures', 'bench_baseline.json')
+# Slowdown (fraction) tolerated before a stage is reported as a regression
+DEFAULT_TOLERANCE = 0.25
+
+class _NullSink:
+    """Stands in for the graph and link writers, which need Neo4j"""
+
+    def submit(self, *args, **kwargs):
+        return True
+
+    def submit_duplicates(self, *args, **kwargs):
+        return 0
+
+    def stats(self):
+        return {}
+
+def record_pages(urls: List[str], pages_dir: str = PAGES_DIR) -> List[str]:
+    """
+    Save live pages into the fixture corpus.
+
+    Args:
+        urls: Article URLs to record
+        pages_dir: Corpus directory
+
+    Returns:
+        Paths of the saved files
+    """
+    fetcher = Fetcher()
+    saved = []
+    for url in urls:
+        response = fetcher.get(url)
+        response.raise_for_status()
+        parts = urlparse(url)
+        name = re.sub(r'[^A-Za-z0-9]+', '_', f"{parts.netloc}{parts.path}").strip('_')[:80]
+        path = os.path.join(pages_dir, f"{name}.html")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(response.text)
+        saved.append(path)
+    fetcher.close()
+    return saved
+
+def _measure(fn: Callable[[Any], Any], items: List[Any], repeat: int) -> Dict[str, float]:
+    """Median ms per item over repeat rounds, then peak traced KB for one round"""
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        rounds.append((time.perf_counter() - start) * 1000 / len(items))
+
+    tracemalloc.start()
+    for item in items:
+        fn(item)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'ms': round(statistics.median(rounds), 3), 'peak_kb': round(peak / 1024, 1)}
+
+def run_suite(pages_dir: str = PAGES_DIR, repeat: int = 10, latency: float = 0.0) -> Dict[str, Dict[str, float]]:
+    """
+    Time each stage of the scrape-to-score pipeline on the fixture corpus.
+
+    Pages are served by the local stand-in server, so no live site is
+    contacted. Graph and link writes are replaced by no-op sinks, and the
+    near-duplicate index journals to a temporary directory.
+
+    Args:
+        pages_dir: Directory of recorded .html pages
+        repeat: Timed rounds per stage (the median is reported)
+        latency: Simulated origin latency in seconds
+
+    Returns:
+        Stage name -> {'ms': median ms per page, 'peak_kb': peak traced KB}
+    """
+    origin, _ = start_origin_server(pages_dir=pages_dir, latency=latency)
+    names = sorted(origin.pages)
+    urls = [f"{origin.base_url}/{name}" for name in names]
+    fetcher = Fetcher()
+    counter = iter(range(10 ** 9))
+    scratch = tempfile.mkdtemp(prefix='bench-pipeline-')
+    try:
+        pages = [fetcher.get(url).text for url in urls]
+        soups = [BeautifulSoup(html, 'html.parser') for html in pages]
+        fields = [extract_article(html) for html in pages]
+        scraped = [build_scraped_page(f, url) for f, url in zip(fields, urls)]
+        # Skip TrustedAuthors loading; only the _extract_* methods are timed here
+        reference = ArticleScraper.__new__(ArticleScraper)
+        authors = TrustedAuthors()
+
+        results = {
+            'fetch': _measure(lambda url: fetcher.get(url).content, urls, repeat),
+            'parse_soup': _measure(lambda html: BeautifulSoup(html, 'html.parser'), pages, repeat),
+            'extract_title': _measure(reference._extract_title, soups, repeat),
+            'extract_author': _measure(reference._extract_author, soups, repeat),
+            'extract_date': _measure(reference._extract_date, soups, repeat),
+            'extract_text': _measure(reference._extract_text, soups, repeat),
+            'extract_single_pass': _measure(extract_article, pages, repeat),
+            'author_lookup': _measure(lambda f: authors.lookup_author(f['author']), fields, repeat),
+            'score': _measure(lambda a: score_article(a, count_references(a['links'], a['domain'])),
+                              scraped, repeat)
+        }
+
+        import app as app_module
+        # Every page comes from the one stand-in host; do not rate limit it
+        get_fetcher().scheduler.rate = 0
+        app_module.get_graph_sink = lambda: _NullSink()
+        app_module.get_link_pipeline = lambda: _NullSink()
+        duplicates = NearDuplicateIndex.open(os.path.join(scratch, 'near_duplicates'))
+        app_module.get_duplicate_index = lambda: duplicates
+        client = app_module.app.test_client()
+
+        def analyze(url):
+            # Unique query strings defeat the response cache and coalescing
+            response = client.post('/analyze', json={'url': f"{url}?bench={next(counter)}"})
+            assert response.status_code == 200, response.get_json()
+
+        results['analyze_end_to_end'] = _measure(analyze, urls, repeat)
+        return results
+    finally:
+        fetcher.close()
+        origin.shutdown()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """
+    Find stages that got slower or use more memory than the baseline.
+
+    Args:
+        results: Output of run_suite()
+        baseline: Stored results of an earlier run
+        tolerance: Allowed relative increase (0.25 = 25%)
+
+    Returns:
+        Human-readable regression descriptions (empty when none)
+    """
+    regressions = []
+    for stage, current in results.items():
+        previous = baseline.get(stage)
+        if previous is None:
+            continue
+        for metric in ('ms', 'peak_kb'):
+            if previous[metric] > 0 and current[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(f"{stage} {metric}: {previous[metric]} -> {current[metric]} "
+                                   f"(+{(current[metric] / previous[metric] - 1) * 100:.0f}%)")
+    return regressions
+
+def _print_results(results: Dict[str, Dict[str, float]], baseline: Optional[Dict[str, Dict[str, float]]]):
+    print(f"{'stage':22s} {'ms/page':>9s} {'peak KB':>9s} {'vs baseline':>12s}")
+    for stage, current in results.items():
+        previous = (baseline or {}).get(stage)
+        change = f"{(current['ms'] / previous['ms'] - 1) * 100:+.0f}%" if previous and previous['ms'] else ''
+        print(f"{stage:22s} {current['ms']:9.3f} {current['peak_kb']:9.1f} {change:>12s}")
+    print(f"max RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the scrape-to-score pipeline on recorded pages")
+    parser.add_argument('--pages-dir', default=PAGES_DIR)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.0, help="Origin latency in seconds")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument('--save-baseline', action='store_true', help="Store these results as the new baseline")
+    parser.add_argument('--record', nargs='+', metavar='URL', help="Save live pages into the corpus and exit")
+    args = parser.parse_args()
+
+    if args.record:
+        for path in record_pages(args.record, args.pages_dir):
+            print(f"Recorded {path}")
+        raise SystemExit(0)
+
+    logging.disable(logging.INFO)
+    results = run_suite(args.pages_dir, args.repeat, args.latency)
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    _print_results(results, baseline)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    elif baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        raise SystemExit(1 if regressions else 0)
@@ -0,0 +1,111 @@
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import requests
+from standin_server import start_origin_server
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def _server_command(mode: str, port: int, workers: int, threads: int):
+    if mode == 'flask':
+        # Same as `python app.py`, without the debug reloader
+        return [sys.executable, '-c', f"from app import app; app.run(port={port})"]
+    if mode == 'flask-single':
+        return [sys.executable, '-c', f"from app import app; app.run(port={port}, threaded=False)"]
+    if mode == 'gunicorn':
+        return [sys.executable, 'serve.py', '--bind', f'127.0.0.1:{port}',
+                '--workers', str(workers), '--threads', str(threads)]
+    raise ValueError(f"Unknown server mode: {mode}")
+
+def _wait_ready(base_url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"Server at {base_url} did not become ready")
+
+def run_load(base_url: str, origin_url: str, total: int, concurrency: int, page: str):
+    """
+    Send /analyze requests for unique article URLs and time each one.
+
+    Returns:
+        Tuple of (latencies in seconds, error count, wall time)
+    """
+    local = threading.local()
+
+    def one(i: int):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            response = session.post(f"{base_url}/analyze",
+                                    json={'url': f"{origin_url}/{page}?n={i}"}, timeout=60)
+            ok = response.status_code == 200
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(one, range(total)))
+    wall = time.perf_counter() - start
+    latencies = np.array([latency for latency, _ in results])
+    errors = sum(1 for _, ok in results if not ok)
+    return latencies, errors, wall
+
+def bench_server(modes, total: int, concurrency: int, latency: float,
+                 workers: int, threads: int, page: str):
+    origin, _ = start_origin_server(latency=latency)
+    print(f"Origin stand-in at {origin.base_url} ({latency * 1000:.0f} ms latency), "
+          f"{total} requests, concurrency {concurrency}")
+    print(f"{'server':14s} {'req/s':>8s} {'p50 ms':>8s} {'p99 ms':>8s} {'errors':>7s}")
+    try:
+        for mode in modes:
+            port = _free_port()
+            # The one origin stands in for many sites: lift the per-host limits
+            env = {**os.environ, 'NEWSBUSTER_HOST_RATE': '0', 'NEWSBUSTER_HOST_CONCURRENCY': '1024'}
+            process = subprocess.Popen(_server_command(mode, port, workers, threads), cwd=HERE, env=env,
+                                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            base_url = f"http://127.0.0.1:{port}"
+            try:
+                _wait_ready(base_url)
+                # Warm up imports, pools and caches in every worker
+                run_load(base_url, origin.base_url, concurrency, concurrency, page)
+                latencies, errors, wall = run_load(base_url, origin.base_url, total, concurrency, page)
+                print(f"{mode:14s} {total / wall:8.1f} {np.percentile(latencies, 50) * 1000:8.1f} "
+                      f"{np.percentile(latencies, 99) * 1000:8.1f} {errors:7d}")
+            finally:
+                process.terminate()
+                process.wait(10)
+    finally:
+        origin.shutdown()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test /analyze against a local origin stand-in")
+    parser.add_argument('--modes', nargs='+', default=['flask-single', 'flask', 'gunicorn'],
+                        choices=['flask', 'flask-single', 'gunicorn'])
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--latency', type=float, default=0.2, help="Origin latency in seconds")
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--page', default='bbc_like.html')
+    args = parser.parse_args()
+    bench_server(args.modes, args.requests, args.concurrency, args.latency,
+                 args.workers, args.threads, args.page)
@@ -0,0 +1,76 @@
+import argparse
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+import requests
+from bench_server import HERE, _free_port
+
+IMPORT_SNIPPET = ("import time; start = time.perf_counter(); import app; "
+                  "print((time.perf_counter() - start) * 1000)")
+
+def bench_import(runs: int) -> float:
+    """Median ms to import app in a fresh interpreter"""
+    times = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', IMPORT_SNIPPET], cwd=HERE, capture_output=True,
+                                text=True, check=True).stdout
+        times.append(float(output.strip().splitlines()[-1]))
+    return statistics.median(times)
+
+def _wait_pid(base_url: str, timeout: float = 30.0, exclude: int = None) -> int:
+    """Poll /health until a worker (other than exclude) answers; return its pid"""
+    session = requests.Session()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            response = session.get(f"{base_url}/health", timeout=1)
+            if response.status_code == 200 and response.json()['pid'] != exclude:
+                return response.json()['pid']
+        except requests.RequestException:
+            pass
+        time.sleep(0.002)
+    raise RuntimeError(f"Server at {base_url} did not answer")
+
+def bench_server_start(preload: bool, respawns: int):
+    """
+    Time a gunicorn cold start and worker respawns.
+
+    Returns:
+        Tuple of (ms until the first /health answer, median ms from killing
+        the worker until its replacement answers)
+    """
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    command = [sys.executable, 'serve.py', '--bind', f'127.0.0.1:{port}', '--workers', '1', '--threads', '4']
+    if not preload:
+        command.append('--no-preload')
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=HERE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        pid = _wait_pid(base_url)
+        cold = (time.perf_counter() - start) * 1000
+        times = []
+        for _ in range(respawns):
+            start = time.perf_counter()
+            os.kill(pid, signal.SIGKILL)
+            pid = _wait_pid(base_url, exclude=pid)
+            times.append((time.perf_counter() - start) * 1000)
+        return cold, statistics.median(times)
+    finally:
+        process.terminate()
+        process.wait(10)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure app import, server cold start and worker respawn")
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'import app':28s} {bench_import(args.runs):8.0f} ms")
+    for preload in (False, True):
+        cold, respawn = bench_server_start(preload, args.runs)
+        label = 'preloaded' if preload else 'per-worker import'
+        print(f"{'cold start (' + label + ')':28s} {cold:8.0f} ms")
+        print(f"{'respawn (' + label + ')':28s} {respawn:8.0f} ms")
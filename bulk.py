@@ -0,0 +1,507 @@
+import gzip
+import json
+import logging
+import os
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Any, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import urljoin
+from fetcher import MAX_PAGE_BYTES, HTML_CONTENT_TYPES, parse_content_type, sniff_charset, get_fetcher
+from extractor import IncrementalExtractor, extract_article
+from scraper import ArticleScraper, build_scraped_page
+from scoring import count_references, score_article
+from graph import get_credibility_score
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pa = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BULK_CHUNK_SIZE = 64
+PARQUET_ROWS_PER_PART = 50000
+# JSONL rows written between checkpoints (each checkpoint fsyncs the output)
+JSONL_ROWS_PER_CHECKPOINT = 5000
+STAGES = ('read', 'fetch', 'extract', 'score', 'write')
+
+HTML_SUFFIXES = ('.html', '.htm')
+WARC_SUFFIXES = ('.warc', '.warc.gz')
+
+# Output columns (error rows leave the scoring columns empty)
+RESULT_FIELDS = [
+    ('id', 'string'), ('url', 'string'), ('title', 'string'), ('domain', 'string'),
+    ('author', 'string'), ('is_trusted_author', 'bool'), ('date', 'string'),
+    ('text_length', 'int64'), ('links', 'int64'), ('references', 'int64'),
+    ('score', 'float64'), ('domain_score', 'float64'), ('error', 'string')
+]
+
+# Input readers
+
+def _decode_body(body: bytes, content_type: str) -> str:
+    _, charset = parse_content_type(content_type)
+    try:
+        return body.decode(charset or sniff_charset(body) or 'utf-8', errors='replace')
+    except LookupError:
+        return body.decode('utf-8', errors='replace')
+
+def _dechunk(body: bytes) -> bytes:
+    """Decode an HTTP/1.1 chunked body as stored in WARC response records"""
+    out = bytearray()
+    pos = 0
+    while pos < len(body):
+        line_end = body.find(b'\r\n', pos)
+        if line_end < 0:
+            break
+        size = int(body[pos:line_end].split(b';', 1)[0] or b'0', 16)
+        if size == 0:
+            break
+        out += body[line_end + 2:line_end + 2 + size]
+        pos = line_end + 2 + size + 2
+    return bytes(out)
+
+def _read_headers(f) -> Dict[str, str]:
+    headers = {}
+    for line in iter(f.readline, b''):
+        line = line.rstrip(b'\r\n')
+        if not line:
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    return headers
+
+def iter_warc(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Read HTML responses from a WARC file (plain or gzip).
+
+    Args:
+        path: Path of a .warc or .warc.gz file
+
+    Yields:
+        Records with id, url and html for each successful HTML response
+    """
+    opener = gzip.open if path.endswith('.gz') else open
+    name = os.path.basename(path)
+    with opener(path, 'rb') as f:
+        for line in iter(f.readline, b''):
+            if not line.strip():
+                continue
+            if not line.startswith(b'WARC/'):
+                raise ValueError(f"{path}: expected a WARC record header, got {line[:40]!r}")
+            headers = _read_headers(f)
+            block = f.read(int(headers.get('content-length', 0)))
+            if headers.get('warc-type') != 'response' or \
+                    not headers.get('content-type', '').startswith('application/http'):
+                continue
+
+            head, _, body = block.partition(b'\r\n\r\n')
+            status_line, _, header_lines = head.partition(b'\r\n')
+            parts = status_line.split()
+            if len(parts) < 2 or parts[1] != b'200':
+                continue
+            http_headers = {}
+            for header in header_lines.split(b'\r\n'):
+                key, _, value = header.decode('latin-1').partition(':')
+                http_headers[key.strip().lower()] = value.strip()
+            content_type = http_headers.get('content-type', '')
+            media_type, _ = parse_content_type(content_type)
+            if media_type and media_type not in HTML_CONTENT_TYPES:
+                continue
+            if 'chunked' in http_headers.get('transfer-encoding', '').lower():
+                body = _dechunk(body)
+            if http_headers.get('content-encoding', '').lower() in ('gzip', 'deflate'):
+                decompressor = zlib.decompressobj(wbits=47)
+                try:
+                    body = decompressor.decompress(body, MAX_PAGE_BYTES)
+                except zlib.error:
+                    continue
+                # Input left over means the page inflates past the limit;
+                # a stream without its end is truncated
+                if decompressor.unconsumed_tail or not decompressor.eof:
+                    continue
+            if len(body) > MAX_PAGE_BYTES:
+                continue
+
+            yield {
+                'id': f"{name}:{headers.get('warc-record-id', '')}",
+                'url': headers.get('warc-target-uri', ''),
+                'html': _decode_body(body, content_type)
+            }
+
+def iter_html_dir(path: str, base_url: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Read saved HTML pages from a directory tree, in sorted order.
+
+    Args:
+        path: Directory to walk
+        base_url: URL the directory was mirrored from; file paths are
+            joined to it (otherwise the page's canonical URL is used)
+
+    Yields:
+        Records with id, url (may be None) and html
+    """
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for filename in sorted(files):
+            if not filename.lower().endswith(HTML_SUFFIXES):
+                continue
+            file_path = os.path.join(root, filename)
+            relative = os.path.relpath(file_path, path).replace(os.sep, '/')
+            with open(file_path, 'rb') as f:
+                html = f.read(MAX_PAGE_BYTES).decode('utf-8', errors='replace')
+            yield {
+                'id': relative,
+                'url': urljoin(base_url.rstrip('/') + '/', relative) if base_url else None,
+                'html': html
+            }
+
+def iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Read a JSONL list of URLs.
+
+    Each line is either a JSON string, or an object with "url" and
+    optionally "id" and "html" (pages without html are fetched).
+
+    Args:
+        path: Path of the JSONL file
+
+    Yields:
+        Records with id, url and html (None when the page must be fetched)
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if isinstance(item, str):
+                item = {'url': item}
+            yield {
+                'id': str(item.get('id') or f"{os.path.basename(path)}:{number}"),
+                'url': item['url'],
+                'html': item.get('html')
+            }
+
+def iter_records(inputs: Sequence[str], base_url: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Read records from every input, in order.
+
+    Args:
+        inputs: WARC files, HTML directories or JSONL URL lists
+        base_url: See iter_html_dir()
+
+    Yields:
+        Records with id, url and html
+    """
+    for path in inputs:
+        if os.path.isdir(path):
+            yield from iter_html_dir(path, base_url)
+        elif path.endswith(WARC_SUFFIXES):
+            yield from iter_warc(path)
+        elif path.endswith('.jsonl'):
+            yield from iter_jsonl(path)
+        else:
+            raise ValueError(f"Unsupported input (expected a directory, .warc[.gz] or .jsonl): {path}")
+
+# Worker side
+
+_scraper: Optional[ArticleScraper] = None
+
+def _init_worker():
+    global _scraper
+    # Per-article INFO lines would dominate the run time
+    logging.getLogger().setLevel(logging.WARNING)
+    for name in ('scraper', 'trusted_authors', 'reputation', 'fetcher'):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    _scraper = ArticleScraper()
+
+def score_record(record: Dict[str, Any], scraper: ArticleScraper,
+                 timings: Dict[str, float], counts: Dict[str, int]) -> Dict[str, Any]:
+    """
+    Extract and score one archived or fetched article.
+
+    Args:
+        record: Record with id, url and html (None to fetch the url)
+        scraper: ArticleScraper used for the trusted-author lookup
+        timings: Per-stage seconds, updated in place
+        counts: Per-stage record counts, updated in place
+
+    Returns:
+        Result row (see RESULT_FIELDS)
+    """
+    url = record.get('url') or ''
+    try:
+        start = time.perf_counter()
+        if record.get('html') is None:
+            extractor = IncrementalExtractor()
+            get_fetcher().fetch_html(url, extractor.feed)
+            fields = extractor.close()
+            timings['fetch'] += time.perf_counter() - start
+            counts['fetch'] += 1
+        else:
+            fields = extract_article(record['html'])
+            timings['extract'] += time.perf_counter() - start
+            counts['extract'] += 1
+
+        start = time.perf_counter()
+        if not url and fields['canonical'].startswith(('http://', 'https://')):
+            url = fields['canonical']
+        page = build_scraped_page(fields, url)
+        article = scraper.build_article(fields, url)
+        references = count_references(page['links'], page['domain'])
+        result = {
+            'id': record['id'],
+            'url': url,
+            'title': page['title'],
+            'domain': page['domain'],
+            'author': page['author'],
+            'is_trusted_author': article['is_trusted_author'],
+            'date': page['date'],
+            'text_length': len(page['text']),
+            'links': len(page['links']),
+            'references': references,
+            'score': round(score_article(page, references) * 100, 1),
+            'domain_score': get_credibility_score(page['domain']) if page['domain'] else None
+        }
+        timings['score'] += time.perf_counter() - start
+        counts['score'] += 1
+        return result
+    except Exception as e:
+        return {'id': record['id'], 'url': url, 'error': str(e)}
+
+def _score_chunk(records: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, float], Dict[str, int]]:
+    if _scraper is None:
+        _init_worker()
+    timings = {stage: 0.0 for stage in STAGES}
+    counts = {stage: 0 for stage in STAGES}
+    results = [score_record(record, _scraper, timings, counts) for record in records]
+    return results, timings, counts
+
+# Output and checkpoints
+
+class _JsonlWriter:
+    def __init__(self, path: str, state: Optional[Dict[str, Any]],
+                 rows_per_checkpoint: int = JSONL_ROWS_PER_CHECKPOINT):
+        offset = state['output_bytes'] if state else 0
+        self.file = open(path, 'r+b' if state else 'wb')
+        self.rows_per_checkpoint = rows_per_checkpoint
+        self.pending = 0
+        # Drop rows written after the last checkpoint
+        self.file.truncate(offset)
+        self.file.seek(offset)
+
+    def write(self, rows: List[Dict[str, Any]]):
+        self.file.write(''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in rows).encode('utf-8'))
+        self.pending += len(rows)
+
+    def flush(self, final: bool = False) -> Optional[Dict[str, Any]]:
+        if self.pending < self.rows_per_checkpoint and not final:
+            return None
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending = 0
+        return {'output_bytes': self.file.tell()}
+
+    def close(self):
+        self.file.close()
+
+class _ParquetWriter:
+    def __init__(self, path: str, state: Optional[Dict[str, Any]],
+                 rows_per_part: int = PARQUET_ROWS_PER_PART):
+        if pa is None:
+            raise RuntimeError("Parquet output requires pyarrow (pip install pyarrow)")
+        self.path = path
+        self.parts = state['parts'] if state else 0
+        self.rows_per_part = rows_per_part
+        self.rows: List[Dict[str, Any]] = []
+        self.schema = pa.schema([(name, getattr(pa, type_name)()) for name, type_name in RESULT_FIELDS])
+        os.makedirs(path, exist_ok=True)
+        # Drop parts written after the last checkpoint
+        for filename in os.listdir(path):
+            if filename.startswith('part-') and int(filename[5:10]) >= self.parts:
+                os.remove(os.path.join(path, filename))
+
+    def write(self, rows: List[Dict[str, Any]]):
+        self.rows.extend(rows)
+
+    def flush(self, final: bool = False) -> Optional[Dict[str, Any]]:
+        if len(self.rows) < self.rows_per_part and not (final and self.rows):
+            return None if self.rows else {'parts': self.parts}
+        table = pa.Table.from_pylist(
+            [{name: row.get(name) for name, _ in RESULT_FIELDS} for row in self.rows],
+            schema=self.schema
+        )
+        pq.write_table(table, os.path.join(self.path, f"part-{self.parts:05d}.parquet"))
+        self.parts += 1
+        self.rows = []
+        return {'parts': self.parts}
+
+    def close(self):
+        pass
+
+def _output_intact(output: str, output_format: str, state: Dict[str, Any]) -> bool:
+    """Check that everything a checkpoint counts as written is still on disk"""
+    if output_format == 'jsonl':
+        return os.path.isfile(output) and os.path.getsize(output) >= state['output_bytes']
+    return all(os.path.isfile(os.path.join(output, f"part-{part:05d}.parquet"))
+               for part in range(state['parts']))
+
+def _save_checkpoint(path: str, checkpoint: Dict[str, Any]):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp, path)
+
+def _report(stats: Dict[str, Any]) -> str:
+    lines = [f"{stats['records']} records ({stats['errors']} errors) in {stats['wall_seconds']:.1f}s, "
+             f"{stats['records_per_second']:.1f} records/s"]
+    for stage, seconds in stats['stage_seconds'].items():
+        if seconds:
+            rate = stats['stage_records'][stage] / seconds
+            lines.append(f"  {stage:8s} {seconds:9.2f}s {rate:10.1f} records/s per process")
+    return '\n'.join(lines)
+
+def run_bulk(inputs: Sequence[str], output: str, output_format: str = 'jsonl',
+             workers: Optional[int] = None, chunk_size: int = BULK_CHUNK_SIZE,
+             resume: bool = False, base_url: Optional[str] = None,
+             limit: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Extract and score archived articles across a process pool.
+
+    Records are read in order and sent to the workers in chunks; at most
+    two chunks per worker are in flight. Results are written in input
+    order and a checkpoint (next to the output) records how many records
+    are safely written, so an interrupted run can be resumed. Checkpoints
+    are taken every JSONL_ROWS_PER_CHECKPOINT rows or Parquet part, and
+    the JSONL output is synced to disk only then.
+
+    Args:
+        inputs: WARC files, HTML directories or JSONL URL lists
+        output: Output JSONL file, or directory of Parquet parts
+        output_format: 'jsonl' or 'parquet'
+        workers: Worker processes (defaults to the CPU count)
+        chunk_size: Records per work unit
+        resume: Continue from the checkpoint of a previous run (a run
+            whose output is missing or truncated starts over)
+        base_url: URL that HTML directories were mirrored from
+        limit: Stop after this many records in total
+
+    Returns:
+        Run statistics with per-stage seconds and throughput
+    """
+    inputs = [os.path.abspath(path) for path in inputs]
+    checkpoint_path = f"{output.rstrip(os.sep)}.checkpoint.json"
+    state = None
+    if resume and os.path.exists(checkpoint_path):
+        with open(checkpoint_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state['inputs'] != inputs or state['format'] != output_format:
+            raise ValueError("Checkpoint was written for different inputs or output format")
+        if not _output_intact(output, output_format, state):
+            logger.warning(f"{output} is missing or shorter than its checkpoint, starting over")
+            state = None
+        else:
+            logger.info(f"Resuming after {state['records']} records")
+    done = state['records'] if state else 0
+
+    if output_format == 'jsonl':
+        writer = _JsonlWriter(output, state)
+    elif output_format == 'parquet':
+        writer = _ParquetWriter(output, state)
+    else:
+        raise ValueError(f"Unknown output format: {output_format}")
+
+    stage_seconds = {stage: 0.0 for stage in STAGES}
+    stage_records = {stage: 0 for stage in STAGES}
+    processed = errors = pending = 0
+    records = islice(iter_records(inputs, base_url), done, None if limit is None else limit)
+    workers = workers or os.cpu_count() or 1
+    start = last_report = time.perf_counter()
+
+    def next_chunk() -> List[Dict[str, Any]]:
+        read_start = time.perf_counter()
+        chunk = list(islice(records, chunk_size))
+        stage_seconds['read'] += time.perf_counter() - read_start
+        stage_records['read'] += len(chunk)
+        return chunk
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            in_flight = deque()
+            exhausted = False
+            while True:
+                while not exhausted and len(in_flight) < workers * 2:
+                    chunk = next_chunk()
+                    if not chunk:
+                        exhausted = True
+                        break
+                    in_flight.append(executor.submit(_score_chunk, chunk))
+                if not in_flight:
+                    break
+
+                results, timings, counts = in_flight.popleft().result()
+                for stage in STAGES:
+                    stage_seconds[stage] += timings[stage]
+                    stage_records[stage] += counts[stage]
+                errors += sum(1 for r in results if 'error' in r)
+
+                write_start = time.perf_counter()
+                writer.write(results)
+                pending += len(results)
+                written = writer.flush()
+                stage_seconds['write'] += time.perf_counter() - write_start
+                stage_records['write'] += len(results)
+                processed += len(results)
+                if written is not None:
+                    done += pending
+                    pending = 0
+                    _save_checkpoint(checkpoint_path, {'inputs': inputs, 'format': output_format,
+                                                       'records': done, **written})
+
+                if time.perf_counter() - last_report > 10:
+                    last_report = time.perf_counter()
+                    rate = processed / (last_report - start)
+                    logger.info(f"Scored {done + pending} records ({rate:.1f} records/s)")
+
+        written = writer.flush(final=True)
+        if written is not None:
+            done += pending
+            _save_checkpoint(checkpoint_path, {'inputs': inputs, 'format': output_format,
+                                               'records': done, **written})
+    finally:
+        writer.close()
+
+    wall = time.perf_counter() - start
+    return {
+        'records': processed,
+        'errors': errors,
+        'committed': done,
+        'wall_seconds': round(wall, 3),
+        'records_per_second': round(processed / wall, 1) if wall else 0.0,
+        'stage_seconds': {stage: round(seconds, 3) for stage, seconds in stage_seconds.items()},
+        'stage_records': stage_records
+    }
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Score archived articles offline")
+    parser.add_argument('inputs', nargs='+', help="WARC files, directories of saved HTML, or JSONL URL lists")
+    parser.add_argument('--out', required=True, help="Output .jsonl file or Parquet directory")
+    parser.add_argument('--format', choices=['jsonl', 'parquet'], default='jsonl')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=BULK_CHUNK_SIZE)
+    parser.add_argument('--resume', action='store_true', help="Continue from the last checkpoint")
+    parser.add_argument('--base-url', default=None, help="URL the HTML directories were saved from")
+    parser.add_argument('--limit', type=int, default=None, help="Stop after this many records")
+    args = parser.parse_args()
+
+    stats = run_bulk(args.inputs, args.out, args.format, args.workers, args.chunk_size,
+                     args.resume, args.base_url, args.limit)
+    print(_report(stats))
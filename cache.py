@@ -0,0 +1,363 @@
+import copy
+import json
+import sqlite3
+import threading
+import time
+import logging
+import requests
+from collections import OrderedDict
+from typing import Callable, Dict, Any, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from fetcher import get_fetcher
+from host_scheduler import is_host_failure
+from extractor import IncrementalExtractor
+from metrics import observe, timer
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CACHE_MAX_ENTRIES = 4096
+CACHE_TTL = 300  # seconds
+CACHE_DISK_PATH = None  # e.g. "data/response_cache.sqlite3"
+# Disk entries outlive the TTL (they still serve revalidation and
+# stale-if-error) but are pruned after CACHE_DISK_TTL or beyond the size cap
+CACHE_DISK_TTL = 7 * 24 * 3600  # seconds
+CACHE_DISK_MAX_ENTRIES = 100000
+DISK_PRUNE_INTERVAL = 1000  # writes between prunes
+
+# Query parameters that only track the referrer and never change the page
+TRACKING_PARAM_PREFIXES = ('utm_',)
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid',
+    'mc_cid', 'mc_eid', '_ga', 'ocid', 'cmpid'
+}
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize a URL so equivalent spellings share one cache entry.
+
+    Lowercases scheme and host, drops default ports, the fragment and
+    tracking parameters (utm_*, fbclid, ...), and sorts query parameters.
+
+    Args:
+        url: URL to normalize
+
+    Returns:
+        Normalized URL string
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    port = parts.port
+    if port and not ((scheme == 'http' and port == 80) or (scheme == 'https' and port == 443)):
+        host = f"{host}:{port}"
+    params = [
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if name.lower() not in TRACKING_PARAMS and not name.lower().startswith(TRACKING_PARAM_PREFIXES)
+    ]
+    query = urlencode(sorted(params))
+    return urlunsplit((scheme, host, parts.path or '/', query, ''))
+
+def _copy_value(value: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a result dict and its mutable members (e.g. 'links', 'author_details')"""
+    return {key: copy.deepcopy(item) if isinstance(item, (dict, list)) else item
+            for key, item in value.items()}
+
+class _Entry:
+    __slots__ = ('value', 'etag', 'last_modified', 'stored_at')
+
+    def __init__(self, value: Dict[str, Any], etag: Optional[str],
+                 last_modified: Optional[str], stored_at: float):
+        self.value = value
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+
+class _DiskStore:
+    """SQLite-backed second tier for cache entries, pruned by age and size"""
+
+    def __init__(self, path: str, ttl: float = CACHE_DISK_TTL,
+                 max_entries: int = CACHE_DISK_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        with self._conn() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    stored_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_stored_at ON entries (stored_at)")
+        self.prune()
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections cannot be shared between threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[_Entry]:
+        row = self._conn().execute(
+            "SELECT value, etag, last_modified, stored_at FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return _Entry(json.loads(row[0]), row[1], row[2], row[3])
+
+    def put(self, key: str, entry: _Entry):
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(entry.value), entry.etag, entry.last_modified, entry.stored_at)
+            )
+        with self._writes_lock:
+            self._writes += 1
+            due = self._writes % DISK_PRUNE_INTERVAL == 0
+        if due:
+            self.prune()
+
+    def prune(self) -> int:
+        """
+        Delete entries older than the disk TTL, then the oldest beyond max_entries.
+
+        Returns:
+            Number of entries deleted
+        """
+        with self._conn() as conn:
+            deleted = conn.execute("DELETE FROM entries WHERE stored_at < ?", (time.time() - self.ttl,)).rowcount
+            deleted += conn.execute(
+                "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY stored_at "
+                "LIMIT max(0, (SELECT count(*) FROM entries) - ?))", (self.max_entries,)
+            ).rowcount
+        if deleted:
+            logger.info(f"Pruned {deleted} disk cache entries")
+        return deleted
+
+    def clear(self):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM entries")
+
+class ResponseCache:
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL,
+                 disk_path: Optional[str] = CACHE_DISK_PATH, disk_ttl: float = CACHE_DISK_TTL,
+                 disk_max_entries: int = CACHE_DISK_MAX_ENTRIES):
+        """
+        LRU cache of parsed article results with TTL and conditional revalidation.
+
+        Args:
+            max_entries: Maximum number of entries kept in memory
+            ttl: Seconds an entry is served without revalidation
+            disk_path: Optional SQLite file used as a persistent second tier
+            disk_ttl: Seconds after which disk entries are pruned
+            disk_max_entries: Maximum number of entries kept on disk
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = _DiskStore(disk_path, disk_ttl, disk_max_entries) if disk_path else None
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'revalidated': 0,
+            'not_modified': 0,
+            'stale': 0,
+            'evictions': 0
+        }
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _lookup(self, key: str) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        if self._disk is not None:
+            entry = self._disk.get(key)
+            if entry is not None:
+                self._store(key, entry, persist=False)
+            return entry
+        return None
+
+    def _store(self, key: str, entry: _Entry, persist: bool = True):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+        if persist and self._disk is not None:
+            self._disk.put(key, entry)
+
+    def get_or_fetch(self, url: str, namespace: str,
+                     build: Callable[[Dict[str, Any], str], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Get the parsed result for a URL, fetching and parsing it on a miss.
+
+        Fresh entries are returned directly. Expired entries are revalidated
+        with a conditional GET and reused when the server answers 304, or
+        served as they are while the host is failing (stale-if-error).
+        Pages are streamed into an IncrementalExtractor, so parsing overlaps
+        the download, which never exceeds the fetcher's size limit. The
+        whole page is read: its links feed scoring and the graph.
+
+        Args:
+            url: URL of the page
+            namespace: Name separating results of different build functions
+            build: Function taking (extracted fields, url) and returning the result dict
+
+        Returns:
+            The parsed result dict (a deep copy, safe to modify)
+
+        Raises:
+            requests.RequestException: If the page cannot be fetched or is rejected
+        """
+        key = f"{namespace}:{normalize_url(url)}"
+        entry = self._lookup(key)
+        now = time.time()
+
+        if entry is not None and now - entry.stored_at < self.ttl:
+            self._count('hits')
+            return _copy_value(entry.value)
+
+        headers = {}
+        if entry is not None:
+            self._count('revalidated')
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+        else:
+            self._count('misses')
+
+        extractor = IncrementalExtractor()
+        start = time.perf_counter()
+        try:
+            response = get_fetcher().fetch_html(url, extractor.feed, headers=headers)
+        except requests.RequestException as e:
+            if entry is None or not is_host_failure(e):
+                raise
+            self._count('stale')
+            logger.warning(f"Serving stale result for {url}: {str(e)}")
+            return _copy_value(entry.value)
+        # Parsing runs inside the download loop; report the two separately
+        observe('fetch', time.perf_counter() - start - extractor.seconds)
+        if entry is not None and response.status_code == 304:
+            self._count('not_modified')
+            entry = _Entry(entry.value, entry.etag, entry.last_modified, now)
+            self._store(key, entry)
+            return _copy_value(entry.value)
+
+        fields = extractor.close()
+        observe('parse', extractor.seconds)
+        with timer('extract'):
+            value = build(fields, url)
+        self._store(key, _Entry(
+            value,
+            response.headers.get('ETag'),
+            response.headers.get('Last-Modified'),
+            now
+        ))
+        return _copy_value(value)
+
+    def get_or_compute(self, key: str, namespace: str,
+                       compute: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Get a result stored under an arbitrary key, computing it on a miss.
+
+        Used for results that are not tied to a fetch, e.g. analyses of
+        client-supplied content keyed by its fingerprint. Entries older than
+        the TTL are recomputed.
+
+        Args:
+            key: Cache key (e.g. a content hash)
+            namespace: Name separating different kinds of results
+            compute: Function returning the result dict
+
+        Returns:
+            The result dict (a deep copy, safe to modify)
+        """
+        key = f"{namespace}:{key}"
+        entry = self._lookup(key)
+        now = time.time()
+        if entry is not None and now - entry.stored_at < self.ttl:
+            self._count('hits')
+            return _copy_value(entry.value)
+
+        self._count('misses')
+        value = compute()
+        self._store(key, _Entry(value, None, None, now))
+        return _copy_value(value)
+
+    def update(self, url: str, namespace: str,
+               rebuild: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Rewrite a cached result in place, without fetching the page.
+
+        The entry keeps its age and validators, so it expires and is
+        revalidated as before.
+
+        Args:
+            url: URL of the page
+            namespace: Namespace the result was stored under
+            rebuild: Function taking a copy of the result and returning the new one
+
+        Returns:
+            The new result (a copy), or None if the URL is not cached
+        """
+        key = f"{namespace}:{normalize_url(url)}"
+        entry = self._lookup(key)
+        if entry is None:
+            return None
+        value = rebuild(_copy_value(entry.value))
+        self._store(key, _Entry(value, entry.etag, entry.last_modified, entry.stored_at))
+        return _copy_value(value)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters.
+
+        Returns:
+            Dictionary with hit/miss/revalidation/eviction counts, the
+            current size and the hit ratio
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses'] + stats['revalidated']
+        served = stats['hits'] + stats['not_modified']
+        stats['hit_ratio'] = round(served / lookups, 3) if lookups else 0.0
+        return stats
+
+    def clear(self):
+        """Remove all entries (memory and disk)"""
+        with self._lock:
+            self._entries.clear()
+        if self._disk is not None:
+            self._disk.clear()
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+def get_cache() -> ResponseCache:
+    """Get the process-wide shared ResponseCache, creating it on first use"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache()
+                logger.info("Response cache initialized")
+    return _cache
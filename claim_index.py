@@ -0,0 +1,808 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import string
+import threading
+import time
+import zlib
+import logging
+import numpy as np
+from array import array
+from functools import lru_cache
+from typing import Dict, Any, Iterator, List, Optional, Sequence, Set, Tuple
+from reputation import domain_of, normalize_domain, registrable_domain
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CLAIM_INDEX_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "claim_index")
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Share of a claim's BM25 weight an article must contain to match it
+MATCH_THRESHOLD = 0.6
+MIN_CLAIM_TERMS = 3  # shorter claims are not indexed
+MAX_MATCHES = 5
+COMPACT_THRESHOLD = 50000  # overlay claims merged into the arrays at once
+# Seconds between checks for a newer saved index (see get_claim_index())
+REFRESH_INTERVAL = 30.0
+# Claims are posted under a prefix of their terms that stays sufficient
+# while weights drift by up to this share of the claim's weight (idf moves
+# as claims are added between compactions; see ClaimIndex.prefix_drift())
+PREFIX_SLACK = 0.1
+# Claims whose prefixes are recomputed per step of a compaction
+_REBUILD_CHUNK = 200000
+# Term frequencies are capped to fit the low bits of a forward posting
+_TF_BITS = 3
+MAX_TF = (1 << _TF_BITS) - 1
+
+_PUNCTUATION = str.maketrans({c: ' ' for c in string.punctuation + '‘’“”–—…'})
+STOPWORDS = frozenset("""
+a about after all also an and any are as at be been being but by can could did do does
+for from had has have he her his how i if in into is it its just may more most no not
+of on or our out over said says she so some such than that the their them then there
+these they this those to up was we were what when which who will with would you your
+""".split())
+# Words that turn a sentence against a claim it mentions ("does not cure",
+# "the myth that ..."); "n't" is read as "not"
+NEGATIONS = frozenset({
+    'not', 'no', 'never', 'nor', 'false', 'untrue', 'myth', 'hoax', 'debunked', 'fake',
+    'misleading', 'wrong', 'incorrect', 'baseless', 'unfounded', 'disproved'
+})
+_SENTENCE_END = re.compile(r"[.!?;\n]+")
+_CONTRACTED_NOT = re.compile(r"n[’']t\b")
+# Fact-check ratings of claims that are indexed (compared lowercased,
+# without punctuation); claims rated true, mixed or unproven are skipped
+DEBUNKED_RATINGS = frozenset({
+    'false', 'mostly false', 'pants on fire', 'misleading', 'fake', 'hoax', 'incorrect',
+    'inaccurate', 'not true', 'fabricated', 'scam', 'four pinocchios', 'wrong'
+})
+
+def _term(token: str) -> Optional[str]:
+    if len(token) < 2 or token in STOPWORDS:
+        return None
+    # Plural s ("vaccines" and "vaccine" share postings)
+    if len(token) > 3 and token[-1] == 's' and token[-2] != 's':
+        return token[:-1]
+    return token
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split a text into index terms.
+
+    Casefolds, drops punctuation, stopwords and one-letter words, and
+    strips plural s.
+
+    Args:
+        text: Claim or article text
+
+    Returns:
+        List of terms, in order (with repeats)
+    """
+    terms = map(_term, text.casefold().translate(_PUNCTUATION).split())
+    return [term for term in terms if term is not None]
+
+def split_sentences(text: str) -> List[Tuple[Set[str], int]]:
+    """
+    Split a text into sentences for asserts_claim().
+
+    Args:
+        text: Article text
+
+    Returns:
+        (distinct terms, number of negation words) per sentence
+    """
+    return [_sentence_terms(sentence) for sentence in _SENTENCE_END.split(text) if sentence.strip()]
+
+def _sentence_terms(sentence: str) -> Tuple[Set[str], int]:
+    words = _CONTRACTED_NOT.sub(' not', sentence.casefold()).translate(_PUNCTUATION).split()
+    terms = set(map(_term, words))
+    terms.discard(None)
+    return terms, sum(1 for word in words if word in NEGATIONS)
+
+def asserts_claim(claim: str, sentences: List[Tuple[Set[str], int]],
+                  share: float = MATCH_THRESHOLD) -> bool:
+    """
+    Check whether a text states a claim rather than just mentioning it.
+
+    The index matches claims on their words anywhere in a text. A text
+    asserts a claim when one sentence holds at least share of the claim's
+    terms and no more negation words than the claim itself, so "No,
+    rainwater does not cure COVID-19" does not assert "Rainwater cures
+    COVID-19".
+
+    Args:
+        claim: Claim text
+        sentences: The text's split_sentences()
+        share: Share of the claim's distinct terms one sentence must hold
+
+    Returns:
+        True if a sentence states the claim
+    """
+    terms, negations = _sentence_terms(claim)
+    if not terms:
+        return False
+    needed = max(min(MIN_CLAIM_TERMS, len(terms)), share * len(terms))
+    return any(len(terms & sentence) >= needed and negated <= negations for sentence, negated in sentences)
+
+def unique_terms(text: str) -> Set[str]:
+    """Distinct index terms of a text (tokenize() without the repeats, faster on long texts)"""
+    terms = set(map(_term, set(text.casefold().translate(_PUNCTUATION).split())))
+    terms.discard(None)
+    return terms
+
+@lru_cache(maxsize=1 << 18)
+def _term_key(term: str) -> int:
+    """64-bit hash of a term"""
+    encoded = term.encode('utf-8')
+    return zlib.crc32(encoded) | (zlib.adler32(encoded) << 32)
+
+def is_debunked(rating: Optional[str]) -> bool:
+    """Check whether a fact-check rating marks its claim as false or misleading"""
+    return ' '.join(str(rating or '').casefold().translate(_PUNCTUATION).split()) in DEBUNKED_RATINGS
+
+def _page(url: str) -> str:
+    """Host and path of a URL, without scheme, 'www.', query or trailing slash"""
+    rest = url.partition('://')[2] or url
+    host, _, path = rest.split('#', 1)[0].split('?', 1)[0].partition('/')
+    return f"{normalize_domain(host.rpartition('@')[2])}/{path.rstrip('/')}"
+
+def cites_fact_check(claim: Dict[str, Any], domain: str, links: Sequence[str]) -> bool:
+    """
+    Check whether an article refers to the fact-check of a claim it matched.
+
+    Debunking articles repeat the claim they refute, so they are not
+    penalized when they link to the fact-check or their own site
+    published it.
+
+    Args:
+        claim: Matched claim record with the fact-check 'url'
+        domain: The article's domain
+        links: The article's absolute outbound URLs
+
+    Returns:
+        True if the article links to the fact-check or shares its
+        registrable domain
+    """
+    url = claim.get('url')
+    if not url:
+        return False
+    if registrable_domain(domain_of(url)) == registrable_domain(normalize_domain(domain)):
+        return True
+    target = _page(url)
+    return any(_page(link) == target for link in links)
+
+def _claim_key(claim: Dict[str, Any]) -> int:
+    """64-bit hash identifying a claim (its id, else its text)"""
+    key = str(claim.get('id') or claim['claim']).encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little')
+
+def encode_varints(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    LEB128-encode unsigned integers (7 bits per byte, high bit set on all
+    but the last byte of a value).
+
+    Args:
+        values: uint64 array
+
+    Returns:
+        Tuple of (uint8 bytes, bytes used per value)
+    """
+    values = np.asarray(values, dtype=np.uint64)
+    sizes = np.ones(len(values), dtype=np.int64)
+    rest = values >> np.uint64(7)
+    while rest.any():
+        sizes += rest > 0
+        rest >>= np.uint64(7)
+    out = np.empty(int(sizes.sum()), dtype=np.uint8)
+    starts = np.cumsum(sizes) - sizes
+    for k in range(int(sizes.max(initial=0))):
+        mask = sizes > k
+        chunk = (values[mask] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        more = (sizes[mask] > k + 1).astype(np.uint64) << np.uint64(7)
+        out[starts[mask] + k] = chunk | more
+    return out, sizes
+
+def decode_varints(data: np.ndarray) -> np.ndarray:
+    """
+    Decode a stream of LEB128 integers written by encode_varints().
+
+    Args:
+        data: uint8 array
+
+    Returns:
+        uint64 array of values
+    """
+    if not len(data):
+        return np.zeros(0, dtype=np.uint64)
+    last = data < 0x80
+    starts = np.flatnonzero(np.concatenate(([True], last[:-1])))
+    group = np.cumsum(np.concatenate(([False], last[:-1])))
+    shift = (np.arange(len(data)) - starts[group]) * 7
+    parts = (data & 0x7F).astype(np.uint64) << shift.astype(np.uint64)
+    return np.add.reduceat(parts, starts)
+
+def _gather(data: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Concatenate the slices data[start:end] (in one fancy-indexing step)"""
+    starts, lengths = starts.astype(np.int64), (ends - starts).astype(np.int64)
+    offsets = np.cumsum(lengths) - lengths
+    return data[np.repeat(starts - offsets, lengths) + np.arange(int(lengths.sum()))]
+
+def _decode_lists(data: np.ndarray, counts: np.ndarray, low_bits: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Decode consecutive delta-encoded lists of (delta << low_bits | low) varints.
+
+    Args:
+        data: Encoded lists, back to back
+        counts: Number of values in each list (at least 1)
+        low_bits: Bits carried next to each delta
+
+    Returns:
+        Tuple of (ids, low parts, index of the list of each value)
+    """
+    values = decode_varints(data)
+    counts = counts.astype(np.int64)
+    owner = np.repeat(np.arange(len(counts)), counts)
+    deltas = values >> np.uint64(low_bits)
+    # Per-list prefix sums of the deltas
+    total = np.cumsum(deltas)
+    first = np.cumsum(counts) - counts
+    ids = (total - np.repeat(total[first] - deltas[first], counts)).astype(np.int64)
+    return ids, (values & np.uint64((1 << low_bits) - 1)).astype(np.int64), owner
+
+def _encode_lists(ids: np.ndarray, low: np.ndarray, first: np.ndarray,
+                  low_bits: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Delta-encode consecutive ascending lists (the inverse of _decode_lists).
+
+    Args:
+        ids: Ascending ids of each list, back to back
+        low: Values carried next to each delta
+        first: Index of the first id of each (non-empty) list
+        low_bits: Bits reserved for low
+
+    Returns:
+        Tuple of (encoded bytes, encoded bytes per list)
+    """
+    before = np.concatenate(([0], ids[:-1]))
+    before[first] = 0
+    encoded, sizes = encode_varints(((ids - before).astype(np.uint64) << np.uint64(low_bits)) |
+                                    low.astype(np.uint64))
+    return encoded, np.add.reduceat(sizes, first) if len(first) else sizes[:0]
+
+class ClaimIndex:
+    """
+    BM25 index of known debunked claims.
+
+    The built part is a set of NumPy arrays saved to a directory and
+    memory-mapped by every worker:
+
+    - a forward index: per claim, a delta-encoded varint list of
+      (term id << 3 | term frequency), and the claim's length;
+    - an inverted index: a sorted vocabulary of 64-bit term hashes mapping
+      to term ids and document frequencies, and per term a delta-encoded
+      varint list of claim ids (about one byte per posting).
+
+    An article matches a claim when it contains at least threshold of the
+    claim's own BM25 weight; the article's term frequencies are ignored,
+    so long articles are not favoured. To find candidates without reading
+    the long lists of common words, each claim is only posted under its
+    prefix: its highest-weighted terms, just enough that the others weigh
+    less than threshold (prefix filtering). An article containing none of
+    them cannot match, so candidates come from a few short lists and are
+    then scored exactly from their forward lists.
+
+    Claims added since the last compaction are kept in a small, fully
+    posted overlay and merged into the arrays in bulk by compact(), which
+    recomputes the prefixes with the new statistics. Until then the built
+    claims keep their prefixes while idf and the mean claim length move;
+    the prefixes are computed with PREFIX_SLACK to spare, and add_batch()
+    compacts as soon as prefix_drift() could use that up, so additions
+    never make a built claim unmatchable.
+    """
+
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B, threshold: float = MATCH_THRESHOLD):
+        self.k1 = k1
+        self.b = b
+        self.threshold = threshold
+        # Saved generation this index was loaded from (0 if never saved)
+        self.generation = 0
+        self._lock = threading.Lock()
+        # Built part
+        self._term_keys = np.zeros(0, dtype=np.uint64)
+        self._term_key_ids = np.zeros(0, dtype=np.uint32)
+        self._term_df = np.zeros(0, dtype=np.uint32)
+        self._term_postings = np.zeros(0, dtype=np.uint32)
+        self._term_offsets = np.zeros(1, dtype=np.uint64)
+        self._postings = np.zeros(0, dtype=np.uint8)
+        self._doc_offsets = np.zeros(1, dtype=np.uint64)
+        self._doc_terms = np.zeros(0, dtype=np.uint8)
+        self._doc_sizes = np.zeros(0, dtype=np.uint16)
+        self._doc_lengths = np.zeros(0, dtype=np.uint16)
+        self._doc_keys = np.zeros(0, dtype=np.uint64)
+        self._claim_offsets = np.zeros(1, dtype=np.uint64)
+        self._claim_bytes = np.zeros(0, dtype=np.uint8)
+        self._total_length = 0
+        # Summed claim length when the prefixes were computed
+        self._built_length = 0
+        self._reset_overlay()
+
+    def _reset_overlay(self):
+        """Empty the overlay of claims added since the last compaction"""
+        self._new_term_ids: Dict[int, int] = {}
+        self._new_df = np.zeros(len(self._term_df), dtype=np.int64)
+        self._new_postings: Dict[int, array] = {}
+        self._new_forward: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._new_lengths: List[int] = []
+        self._new_claims: List[bytes] = []
+        self._new_keys: Set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths) + len(self._new_lengths)
+
+    def claim(self, doc_id: int) -> Dict[str, Any]:
+        """Get the stored record of a claim id"""
+        base = len(self._doc_lengths)
+        if doc_id >= base:
+            return json.loads(self._new_claims[doc_id - base])
+        start, end = int(self._claim_offsets[doc_id]), int(self._claim_offsets[doc_id + 1])
+        return json.loads(bytes(self._claim_bytes[start:end]))
+
+    def _term_ids(self, keys: np.ndarray) -> np.ndarray:
+        """Term ids of hashed terms (-1 for unknown terms)"""
+        ids = np.full(len(keys), -1, dtype=np.int64)
+        if len(self._term_keys):
+            positions = np.minimum(np.searchsorted(self._term_keys, keys), len(self._term_keys) - 1)
+            found = self._term_keys[positions] == keys
+            ids[found] = self._term_key_ids[positions[found]]
+        if self._new_term_ids:
+            for i in np.flatnonzero(ids < 0).tolist():
+                ids[i] = self._new_term_ids.get(int(keys[i]), -1)
+        return ids
+
+    def _df(self, terms: np.ndarray) -> np.ndarray:
+        df = self._new_df[terms]
+        built = terms < len(self._term_df)
+        df[built] += self._term_df[terms[built]]
+        return df
+
+    def _weights(self, df: np.ndarray, tf: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+        n = len(self)
+        idf = np.log1p((n - df + 0.5) / (df + 0.5))
+        norm = self.k1 * (1 - self.b + self.b * lengths / (self._total_length / n))
+        return idf * tf * (self.k1 + 1) / (tf + norm)
+
+    def _candidates(self, terms: np.ndarray) -> np.ndarray:
+        """Claims posted under any of the terms"""
+        parts = []
+        built = terms[terms < len(self._term_df)]
+        built = built[self._term_postings[built] > 0]
+        if len(built):
+            data = _gather(self._postings, self._term_offsets[built], self._term_offsets[built + 1])
+            parts.append(_decode_lists(data, self._term_postings[built], 0)[0])
+        if self._new_postings:
+            for term in terms.tolist():
+                docs = self._new_postings.get(term)
+                if docs is not None:
+                    parts.append(np.frombuffer(docs, dtype=np.uint32).astype(np.int64))
+        return np.unique(np.concatenate(parts)) if parts else np.zeros(0, dtype=np.int64)
+
+    def _forward(self, docs: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Decode the forward lists of sorted claim ids.
+
+        Returns:
+            Tuple of (term ids, term frequencies, index into docs of each
+            term, claim lengths)
+        """
+        base = len(self._doc_lengths)
+        built = docs[docs < base]
+        data = _gather(self._doc_terms, self._doc_offsets[built], self._doc_offsets[built + 1])
+        terms, tf, owner = _decode_lists(data, self._doc_sizes[built], _TF_BITS)
+        lengths = self._doc_lengths[built].astype(np.float64)
+        new = (docs[len(built):] - base).tolist()
+        if new:
+            forward = [self._new_forward[i] for i in new]
+            terms = np.concatenate([terms] + [t for t, _ in forward])
+            tf = np.concatenate([tf] + [f for _, f in forward])
+            owner = np.concatenate([owner, np.repeat(np.arange(len(built), len(docs)), [len(t) for t, _ in forward])])
+            lengths = np.concatenate([lengths, [self._new_lengths[i] for i in new]])
+        return terms, tf, owner, lengths
+
+    def _score(self, keys: np.ndarray) -> List[Tuple[int, float, float]]:
+        if not len(self):
+            return []
+        terms = self._term_ids(keys)
+        terms = np.unique(terms[terms >= 0])
+        if len(terms) < MIN_CLAIM_TERMS:
+            return []
+        docs = self._candidates(terms)
+        if not len(docs):
+            return []
+
+        claim_terms, tf, owner, lengths = self._forward(docs)
+        weights = self._weights(self._df(claim_terms), tf, lengths[owner])
+        positions = np.minimum(np.searchsorted(terms, claim_terms), len(terms) - 1)
+        present = terms[positions] == claim_terms
+        norms = np.bincount(owner, weights=weights, minlength=len(docs))
+        scores = np.bincount(owner, weights=weights * present, minlength=len(docs))
+        matched = np.bincount(owner, weights=present, minlength=len(docs))
+        coverage = scores / norms
+        keep = np.flatnonzero((coverage >= self.threshold) & (matched >= MIN_CLAIM_TERMS))
+        keep = keep[np.argsort(-scores[keep], kind='stable')][:MAX_MATCHES]
+        return [(int(docs[i]), round(float(scores[i]), 3), round(float(coverage[i]), 3)) for i in keep]
+
+    def query(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Find the indexed claims an article text contains.
+
+        Args:
+            text: Article body
+
+        Returns:
+            Up to MAX_MATCHES claim records (id, claim, rating, url) with
+            their BM25 'score' and 'coverage' (share of the claim's weight
+            found in the text), best first
+        """
+        terms = unique_terms(text or '')
+        if len(terms) < MIN_CLAIM_TERMS:
+            return []
+        keys = np.fromiter(map(_term_key, terms), dtype=np.uint64, count=len(terms))
+        with self._lock:
+            return [{**self.claim(doc_id), 'score': score, 'coverage': coverage}
+                    for doc_id, score, coverage in self._score(keys)]
+
+    def add_batch(self, claims: Sequence[Dict[str, Any]]) -> int:
+        """
+        Add fact-checked claims.
+
+        Args:
+            claims: Records with the 'claim' text and optionally 'id',
+                'rating' and 'url' (kept and returned with matches)
+
+        Returns:
+            Number of claims added (claims already indexed, by id or text,
+            claims whose rating is not in DEBUNKED_RATINGS and claims with
+            fewer than MIN_CLAIM_TERMS terms are skipped)
+        """
+        parsed = []
+        for claim in claims:
+            if claim.get('claim') and is_debunked(claim.get('rating')):
+                terms = tokenize(claim['claim'])
+                if len(set(terms)) >= MIN_CLAIM_TERMS:
+                    parsed.append((_claim_key(claim), claim, terms))
+        if not parsed:
+            return 0
+        with self._lock:
+            keys = np.fromiter((key for key, _, _ in parsed), dtype=np.uint64, count=len(parsed))
+            positions = np.minimum(np.searchsorted(self._doc_keys, keys), max(len(self._doc_keys) - 1, 0))
+            indexed = self._doc_keys[positions] == keys if len(self._doc_keys) else np.zeros(len(keys), dtype=bool)
+            added = []
+            for (key, claim, terms), known in zip(parsed, indexed.tolist()):
+                if not known and key not in self._new_keys:
+                    self._new_keys.add(key)
+                    added.append((claim, terms))
+            if not added:
+                return 0
+
+            # Resolve the batch's terms at once; unknown ones get new ids
+            words = list({term for _, terms in added for term in terms})
+            term_keys = np.fromiter(map(_term_key, words), dtype=np.uint64, count=len(words))
+            term_ids = {}
+            for term, key, term_id in zip(words, term_keys.tolist(), self._term_ids(term_keys).tolist()):
+                if term_id < 0:
+                    term_id = self._new_term_ids[key] = len(self._term_df) + len(self._new_term_ids)
+                term_ids[term] = term_id
+            vocabulary = len(self._term_df) + len(self._new_term_ids)
+
+            # (claim, term) pairs with their frequencies, sorted by claim then term
+            lengths = np.fromiter((len(terms) for _, terms in added), dtype=np.int64, count=len(added))
+            first_doc = len(self)
+            docs = np.repeat(np.arange(first_doc, first_doc + len(added)), lengths)
+            pairs, tf = np.unique(docs * vocabulary + np.array([term_ids[term] for _, terms in added for term in terms]),
+                                  return_counts=True)
+            docs, terms, tf = pairs // vocabulary, pairs % vocabulary, np.minimum(tf, MAX_TF)
+            bounds = np.concatenate(([0], np.cumsum(np.bincount(docs - first_doc, minlength=len(added))))).tolist()
+            self._new_forward.extend((terms[start:end], tf[start:end]) for start, end in zip(bounds, bounds[1:]))
+
+            order = np.argsort(terms, kind='stable')
+            terms, docs = terms[order], docs[order].astype(np.uint32)
+            bounds = np.concatenate(([0], np.flatnonzero(np.diff(terms)) + 1, [len(terms)])).tolist()
+            for start, end in zip(bounds, bounds[1:]):
+                term = int(terms[start])
+                postings = self._new_postings.get(term)
+                if postings is None:
+                    postings = self._new_postings[term] = array('I')
+                postings.frombytes(docs[start:end].tobytes())
+            df = np.bincount(terms, minlength=vocabulary)
+            df[:len(self._new_df)] += self._new_df
+            self._new_df = df
+
+            lengths = np.minimum(lengths, np.iinfo(np.uint16).max)
+            self._new_lengths.extend(lengths.tolist())
+            self._total_length += int(lengths.sum())
+            self._new_claims.extend(
+                json.dumps({'id': claim.get('id'), 'claim': claim['claim'], 'rating': claim.get('rating'),
+                            'url': claim.get('url')}).encode('utf-8')
+                for claim, _ in added)
+
+            if len(self._new_lengths) >= COMPACT_THRESHOLD or self.prefix_drift() >= self.max_prefix_drift:
+                self._compact()
+        return len(added)
+
+    @property
+    def max_prefix_drift(self) -> float:
+        """Largest prefix_drift() under which the built prefixes are still sufficient"""
+        return self.threshold / (self.threshold - PREFIX_SLACK)
+
+    def prefix_drift(self) -> float:
+        """
+        Bound on how far the overlay has moved built claims' weights.
+
+        A claim's terms outside its prefix held less than threshold -
+        PREFIX_SLACK of its weight when the prefix was computed. If every
+        term weight has since been scaled by a factor within [r, R], they
+        hold less than (R / r) times that now, so the prefix still catches
+        every match while R / r stays below max_prefix_drift.
+
+        Returns:
+            R / r over the built vocabulary (idf ratios, times the largest
+            change of the BM25 length normalization)
+        """
+        built = len(self._doc_lengths)
+        if not built or not self._new_lengths:
+            return 1.0
+        n = len(self)
+        df = self._term_df.astype(np.float64)
+        used = df > 0
+        df, new_df = df[used], df[used] + self._new_df[:len(used)][used]
+        ratio = np.log1p((n - new_df + 0.5) / (new_df + 0.5)) / np.log1p((built - df + 0.5) / (df + 0.5))
+        # tf / (tf + norm) moves by at most the ratio of the mean claim lengths
+        lengths = (self._built_length / built) / (self._total_length / n)
+        return float(ratio.max() / ratio.min() * max(lengths, 1 / lengths))
+
+    def compact(self):
+        """Merge the overlay into the arrays and recompute the claims' prefixes"""
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        if not self._new_lengths:
+            return
+        df = self._new_df.copy()
+        df[:len(self._term_df)] += self._term_df
+        self._term_df = df.astype(np.uint32)
+        if self._new_term_ids:
+            keys = np.fromiter(self._new_term_ids.keys(), dtype=np.uint64, count=len(self._new_term_ids))
+            ids = np.fromiter(self._new_term_ids.values(), dtype=np.uint32, count=len(self._new_term_ids))
+            order = np.argsort(keys)
+            positions = np.searchsorted(self._term_keys, keys[order])
+            self._term_keys = np.insert(self._term_keys, positions, keys[order])
+            self._term_key_ids = np.insert(self._term_key_ids, positions, ids[order])
+
+        sizes = np.fromiter((len(t) for t, _ in self._new_forward), dtype=np.int64, count=len(self._new_forward))
+        encoded, nbytes = _encode_lists(np.concatenate([t for t, _ in self._new_forward]),
+                                        np.concatenate([f for _, f in self._new_forward]),
+                                        np.cumsum(sizes) - sizes, _TF_BITS)
+        self._doc_terms = np.concatenate([self._doc_terms, encoded])
+        self._doc_offsets = np.concatenate([self._doc_offsets, self._doc_offsets[-1] + np.cumsum(nbytes).astype(np.uint64)])
+        self._doc_sizes = np.concatenate([self._doc_sizes, sizes.astype(np.uint16)])
+        self._doc_lengths = np.concatenate([self._doc_lengths, np.array(self._new_lengths, dtype=np.uint16)])
+
+        claim_lengths = np.fromiter(map(len, self._new_claims), dtype=np.uint64, count=len(self._new_claims))
+        self._claim_offsets = np.concatenate([self._claim_offsets, self._claim_offsets[-1] + np.cumsum(claim_lengths)])
+        self._claim_bytes = np.concatenate([self._claim_bytes, np.frombuffer(b''.join(self._new_claims), dtype=np.uint8)])
+        new_keys = np.sort(np.fromiter(self._new_keys, dtype=np.uint64, count=len(self._new_keys)))
+        self._doc_keys = np.insert(self._doc_keys, np.searchsorted(self._doc_keys, new_keys), new_keys)
+        self._reset_overlay()
+        self._built_length = self._total_length
+        self._post_prefixes()
+
+    def _post_prefixes(self):
+        """Rebuild the inverted lists, posting each claim under its prefix terms"""
+        terms_posted, docs_posted = [], []
+        for start in range(0, len(self._doc_lengths), _REBUILD_CHUNK):
+            end = min(start + _REBUILD_CHUNK, len(self._doc_lengths))
+            sizes = self._doc_sizes[start:end].astype(np.int64)
+            data = self._doc_terms[int(self._doc_offsets[start]):int(self._doc_offsets[end])]
+            terms, tf, owner = _decode_lists(data, sizes, _TF_BITS)
+            weights = self._weights(self._term_df[terms].astype(np.float64), tf,
+                                    self._doc_lengths[start:end].astype(np.float64)[owner])
+            # Heaviest terms first within each claim; a term is in the prefix
+            # while the terms before it weigh at most 1 - threshold (plus slack)
+            order = np.lexsort((-weights, owner))
+            terms, owner, weights = terms[order], owner[order], weights[order]
+            before = np.cumsum(weights) - weights
+            first = np.cumsum(sizes) - sizes
+            before -= np.repeat(before[first], sizes)
+            total = np.bincount(owner, weights=weights, minlength=len(sizes))
+            prefix = before <= (1 - self.threshold + PREFIX_SLACK) * total[owner]
+            terms_posted.append(terms[prefix])
+            docs_posted.append(owner[prefix] + start)
+
+        # Claim ids come out ascending; a stable sort by term keeps them so
+        terms = np.concatenate(terms_posted)
+        order = np.argsort(terms, kind='stable')
+        terms, docs = terms[order], np.concatenate(docs_posted)[order]
+        counts = np.bincount(terms, minlength=len(self._term_df))
+        posted = counts > 0
+        encoded, nbytes = _encode_lists(docs, np.zeros(len(docs), dtype=np.int64),
+                                        (np.cumsum(counts) - counts)[posted], 0)
+        lengths = np.zeros(len(counts), dtype=np.int64)
+        lengths[posted] = nbytes
+        self._postings = encoded
+        self._term_offsets = np.concatenate(([0], np.cumsum(lengths))).astype(np.uint64)
+        self._term_postings = counts.astype(np.uint32)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get claim, term and posting counts and the memory footprint"""
+        arrays = [getattr(self, f"_{name}") for name in self._ARRAYS]
+        return {
+            'claims': len(self),
+            'overlay_claims': len(self._new_lengths),
+            'terms': len(self._term_df) + len(self._new_term_ids),
+            'postings': int(self._term_postings.sum()),
+            'postings_bytes': int(self._postings.nbytes),
+            'forward_bytes': int(self._doc_terms.nbytes),
+            'threshold': self.threshold,
+            'prefix_drift': round(self.prefix_drift(), 4),
+            'generation': self.generation,
+            'memory_bytes': int(sum(a.nbytes for a in arrays))
+        }
+
+    _ARRAYS = ('term_keys', 'term_key_ids', 'term_df', 'term_postings', 'term_offsets', 'postings',
+               'doc_offsets', 'doc_terms', 'doc_sizes', 'doc_lengths', 'doc_keys',
+               'claim_offsets', 'claim_bytes')
+
+    def save(self, path: str) -> None:
+        """
+        Compact and write the index to a directory of .npy files.
+
+        The files are written to a new directory that then replaces path,
+        so processes still mapping the old files (including this index,
+        when it was loaded from path) are not disturbed.
+        """
+        self.compact()
+        path = path.rstrip(os.sep)
+        staging = f"{path}.tmp-{os.getpid()}"
+        os.makedirs(staging, exist_ok=True)
+        for name in self._ARRAYS:
+            np.save(os.path.join(staging, f"{name}.npy"), getattr(self, f"_{name}"))
+        self.generation = time.time_ns()
+        with open(os.path.join(staging, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'k1': self.k1, 'b': self.b, 'threshold': self.threshold,
+                       'total_length': self._total_length, 'generation': self.generation}, f)
+        if os.path.exists(path):
+            retired = f"{path}.old-{os.getpid()}"
+            os.rename(path, retired)
+            os.rename(staging, path)
+            shutil.rmtree(retired)
+        else:
+            os.rename(staging, path)
+
+    @classmethod
+    def load(cls, path: str) -> "ClaimIndex":
+        """Memory-map an index written by save()"""
+        with open(os.path.join(path, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        index = cls(meta['k1'], meta['b'], meta['threshold'])
+        for name in cls._ARRAYS:
+            setattr(index, f"_{name}", np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r'))
+        index._total_length = index._built_length = meta['total_length']
+        index.generation = meta.get('generation', 0)
+        index._reset_overlay()
+        return index
+
+def saved_generation(path: str) -> int:
+    """Generation of the index saved at path (0 if there is none)"""
+    try:
+        with open(os.path.join(path, 'meta.json'), 'r', encoding='utf-8') as f:
+            return json.load(f).get('generation', 0)
+    except (OSError, ValueError):
+        # Missing while a writer swaps directories
+        return 0
+
+_index: Optional[ClaimIndex] = None
+_index_lock = threading.Lock()
+_refresher_pid: Optional[int] = None
+
+def get_claim_index() -> ClaimIndex:
+    """
+    Get the process-wide index, memory-mapping the saved one if present.
+
+    A background thread (one per process, so forked workers start their
+    own) switches to a newer saved index within REFRESH_INTERVAL.
+    """
+    global _index, _refresher_pid
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                if os.path.exists(os.path.join(CLAIM_INDEX_PATH, 'meta.json')):
+                    _index = ClaimIndex.load(CLAIM_INDEX_PATH)
+                    logger.info(f"Claim index loaded: {_index.stats()}")
+                else:
+                    _index = ClaimIndex()
+                    logger.info("No claim index found, starting empty")
+    if _refresher_pid != os.getpid():
+        with _index_lock:
+            if _refresher_pid != os.getpid():
+                _refresher_pid = os.getpid()
+                threading.Thread(target=_follow_saved_index, name="claim-index-refresh", daemon=True).start()
+    return _index
+
+def reload_claim_index() -> bool:
+    """
+    Switch the process-wide index to a newer saved generation.
+
+    The new files are mapped off the request path and swapped in as a
+    whole; queries running on the previous index finish on it.
+
+    Returns:
+        True if a new generation was loaded
+    """
+    global _index
+    generation = saved_generation(CLAIM_INDEX_PATH)
+    if not generation or _index is None or generation == _index.generation:
+        return False
+    try:
+        index = ClaimIndex.load(CLAIM_INDEX_PATH)
+    except (OSError, ValueError) as e:
+        logger.debug(f"Claim index not reloaded: {str(e)}")
+        return False
+    _index = index
+    logger.info(f"Claim index generation {index.generation} loaded ({len(index)} claims)")
+    return True
+
+def _follow_saved_index():
+    while True:
+        time.sleep(REFRESH_INTERVAL)
+        try:
+            reload_claim_index()
+        except Exception as e:
+            logger.error(f"Claim index reload failed: {str(e)}")
+
+def read_claims(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Read a JSONL fact-check dump.
+
+    Each line needs the claim text in 'claim' (or 'text') and its 'rating'
+    (only DEBUNKED_RATINGS are indexed); 'id' and 'url' (or 'review_url')
+    are kept when present.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            yield {'id': record.get('id'), 'claim': record.get('claim') or record.get('text'),
+                   'rating': record.get('rating'), 'url': record.get('url') or record.get('review_url')}
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build (or extend) the claim index from a JSONL fact-check dump")
+    parser.add_argument('claims', help="JSONL file with 'claim' (and 'id', 'rating', 'url') per line")
+    parser.add_argument('--out', default=CLAIM_INDEX_PATH)
+    parser.add_argument('--append', action='store_true', help="Add to the index already at --out")
+    parser.add_argument('--batch-size', type=int, default=10000)
+    args = parser.parse_args()
+
+    if args.append and os.path.exists(os.path.join(args.out, 'meta.json')):
+        index = ClaimIndex.load(args.out)
+    else:
+        index = ClaimIndex()
+    start = time.perf_counter()
+    added = 0
+    batch = []
+    for record in read_claims(args.claims):
+        batch.append(record)
+        if len(batch) >= args.batch_size:
+            added += index.add_batch(batch)
+            batch = []
+    added += index.add_batch(batch)
+    index.save(args.out)
+    print(f"Added {added} claims ({len(index)} indexed) in {time.perf_counter() - start:.1f}s -> {args.out}")
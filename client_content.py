@@ -0,0 +1,78 @@
+import base64
+import binascii
+import hashlib
+import json
+import zlib
+from typing import Dict, Any, Tuple
+from urllib.parse import urlparse
+from scraper import parse_scraped_page
+
+# Upper bounds for client-supplied payloads
+MAX_SNAPSHOT_BYTES = 5 * 1024 * 1024  # decompressed HTML
+MAX_TEXT_CHARS = 500000
+MAX_LINKS = 2000
+
+CONTENT_FIELDS = ('title', 'text', 'author', 'date')
+
+def _decompress_snapshot(encoded: str) -> str:
+    """Decode a base64 gzip/zlib HTML snapshot, refusing oversized output"""
+    try:
+        compressed = base64.b64decode(encoded, validate=True)
+    except (binascii.Error, ValueError):
+        raise ValueError("html_gzip must be base64 encoded")
+    # wbits=47 accepts both gzip and zlib headers
+    decompressor = zlib.decompressobj(wbits=47)
+    try:
+        html = decompressor.decompress(compressed, MAX_SNAPSHOT_BYTES + 1)
+    except zlib.error:
+        raise ValueError("html_gzip is not valid gzip data")
+    if len(html) > MAX_SNAPSHOT_BYTES or decompressor.unconsumed_tail:
+        raise ValueError(f"HTML snapshot exceeds {MAX_SNAPSHOT_BYTES} bytes")
+    return html.decode('utf-8', errors='replace')
+
+def parse_client_content(url: str, data: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    """
+    Build article data from content the client already extracted.
+
+    Accepts either pre-extracted fields under "content" (title, text and
+    optionally author, date, links, domain) or a page snapshot as "html"
+    (plain string) or "html_gzip" (base64 gzip).
+
+    Args:
+        url: URL of the page the content came from
+        data: Request body
+
+    Returns:
+        Tuple of (content fingerprint, scrape_article-style dict)
+
+    Raises:
+        ValueError: If the payload is malformed or too large
+    """
+    domain = urlparse(url).netloc
+    if 'html_gzip' in data or 'html' in data:
+        if 'html_gzip' in data:
+            html = _decompress_snapshot(str(data['html_gzip']))
+        else:
+            html = str(data['html'])
+            if len(html) > MAX_SNAPSHOT_BYTES:
+                raise ValueError(f"HTML snapshot exceeds {MAX_SNAPSHOT_BYTES} bytes")
+        digest = hashlib.sha256(html.encode('utf-8', errors='replace')).hexdigest()
+        return f"html:{domain}:{digest}", parse_scraped_page(html, url)
+
+    content = data.get('content')
+    if not isinstance(content, dict):
+        raise ValueError("content must be an object")
+    article_data = {field: str(content.get(field) or '') for field in CONTENT_FIELDS}
+    if len(article_data['text']) > MAX_TEXT_CHARS:
+        raise ValueError(f"content text exceeds {MAX_TEXT_CHARS} characters")
+    links = content.get('links') or []
+    if not isinstance(links, list):
+        raise ValueError("content links must be a list")
+    article_data['links'] = [str(link) for link in links[:MAX_LINKS]
+                             if str(link).startswith(('http://', 'https://'))]
+    article_data['domain'] = domain or str(content.get('domain') or '')
+
+    canonical = json.dumps({**article_data, 'links': sorted(set(article_data['links']))},
+                           sort_keys=True, ensure_ascii=False)
+    digest = hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+    return f"content:{digest}", article_data
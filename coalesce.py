@@ -0,0 +1,130 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, TypeVar
+from cache import normalize_url
+from reputation import domain_of, registrable_domain
+
+T = TypeVar('T')
+
+def _copy_result(result):
+    """Copy dict results, also inside (response, status) tuples"""
+    if isinstance(result, dict):
+        return dict(result)
+    if isinstance(result, tuple):
+        return tuple(dict(item) if isinstance(item, dict) else item for item in result)
+    return result
+
+class _Call:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls for the same key.
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait for and share its result (or exception).
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self._stats = {'executed': 0, 'coalesced': 0}
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        """
+        Run fn once for all concurrent callers with the same key.
+
+        Args:
+            key: Deduplication key
+            fn: Function producing the result
+
+        Returns:
+            The result of fn (dicts, also inside tuples, are copied for
+            every caller)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self._stats['coalesced'] += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self._stats['executed'] += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return _copy_result(call.result)
+
+        try:
+            call.result = fn()
+            # Waiters copy the stored result after this caller may have changed its own
+            return _copy_result(call.result)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def stats(self) -> Dict[str, int]:
+        """Get counts of executed calls and of calls (upstream fetches) saved by coalescing"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = len(self._calls)
+        return stats
+
+class CanonicalUrls:
+    """Bounded map from requested URLs to the canonical URL their page declared"""
+
+    def __init__(self, max_entries: int = 100000):
+        self.max_entries = max_entries
+        self._aliases: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve(self, url: str) -> str:
+        """
+        Get the coalescing key for a URL.
+
+        Args:
+            url: Requested URL
+
+        Returns:
+            Normalized canonical URL if one is known, else the normalized URL
+        """
+        key = normalize_url(url)
+        with self._lock:
+            return self._aliases.get(key, key)
+
+    def record(self, url: str, canonical: str) -> None:
+        """
+        Remember that a URL's page declared (or redirected to) a canonical URL.
+
+        Canonicals on another registrable domain are ignored: any page can
+        declare one, and following it would let evil.example share results
+        with the site it names.
+
+        Args:
+            url: Requested URL
+            canonical: Absolute canonical URL
+        """
+        key = normalize_url(url)
+        target = normalize_url(canonical)
+        if key == target or registrable_domain(domain_of(key)) != registrable_domain(domain_of(target)):
+            return
+        with self._lock:
+            self._aliases[key] = target
+            self._aliases.move_to_end(key)
+            while len(self._aliases) > self.max_entries:
+                self._aliases.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._aliases)
@@ -1,7 +1,62 @@
+// Heuristics shared with the server (rules.json), compiled once per page
+let rulesPromise = null;
+
+function loadRules() {
+    if (!rulesPromise) {
+        rulesPromise = fetch(chrome.runtime.getURL('rules.json'))
+            .then(response => response.json())
+            .then(compileRules);
+    }
+    return rulesPromise;
+}
+
+function compileRules(rules) {
+    const groups = rules.text_signals;
+    const cache = new Map();
+    // One alternation with a named group per signal, for any subset of signals
+    const regexFor = names => {
+        const key = names.join('|');
+        if (!cache.has(key)) {
+            const alternation = names
+                .map(name => `(?<${name}>${groups[name].join('|')})`)
+                .join('|');
+            cache.set(key, new RegExp(alternation, 'gi'));
+        }
+        return cache.get(key);
+    };
+    return {
+        signalNames: Object.keys(groups),
+        regexFor: regexFor,
+        weights: rules.extension_weights
+    };
+}
+
+function scanSignals(text, rules) {
+    // One search per signal found (plus a last one that finds nothing):
+    // once a signal is found it is dropped from the regex and the search
+    // resumes where that match began, as in TextMatcher.scan (rules.py)
+    const found = new Set();
+    let remaining = rules.signalNames;
+    let pos = 0;
+    while (remaining.length > 0) {
+        const regex = rules.regexFor(remaining);
+        regex.lastIndex = pos;
+        const match = regex.exec(text);
+        if (!match) {
+            break;
+        }
+        const name = remaining.find(n => match.groups[n] !== undefined);
+        found.add(name);
+        remaining = remaining.filter(n => n !== name);
+        pos = match.index;
+    }
+    return found;
+}
+
 // Listen for messages from the popup
 chrome.runtime.onMessage.addListener((request, sender, sendResponse) => {
     if (request.action === "analyzeArticle") {
-        try {
+        loadRules().then(rules => {
             // Get the article content
             const articleContent = {
                 title: document.title,
@@ -13,7 +68,7 @@ chrome.runtime.onMessage.addListener((request, sender, sendResponse) => {
             console.log('Article content:', articleContent); // Debug log
             
             // Perform basic analysis
-            const analysis = analyzeContent(articleContent);
+            const analysis = analyzeContent(articleContent, rules);
             console.log('Analysis results:', analysis); // Debug log
             
             // Send the content and analysis back to the popup
@@ -21,29 +76,30 @@ chrome.runtime.onMessage.addListener((request, sender, sendResponse) => {
                 ...articleContent,
                 analysis: analysis
             });
-        } catch (error) {
+        }).catch(error => {
             console.error('Error in content script:', error);
             sendResponse({ error: 'Failed to get article content' });
-        }
+        });
     }
     return true; // Required for async response
 });
 
-function analyzeContent(content) {
+function analyzeContent(content, rules) {
     console.log('Analyzing content for domain:', content.domain); // Debug log
     
+    const signals = scanSignals(content.text, rules);
     const indicators = {
-        hasAuthor: checkForAuthor(content.text),
+        hasAuthor: signals.has('author'),
         isTrustedAuthor: content.is_trusted_author || false,
-        hasDate: checkForDate(content.text),
-        hasReferences: checkForReferences(content.text),
+        hasDate: signals.has('date'),
+        hasReferences: signals.has('references'),
         hasImages: checkForImages()
     };
     
     console.log('Indicators:', indicators); // Debug log
 
     // Calculate score based on indicators
-    const score = calculateScore(indicators);
+    const score = calculateScore(indicators, rules.weights);
     console.log('Calculated score:', score); // Debug log
     
     return {
@@ -54,38 +110,6 @@ function analyzeContent(content) {
     };
 }
 
-function checkForAuthor(text) {
-    // Look for common author indicators
-    const authorPatterns = [
-        /by\s+[\w\s]+/i,
-        /author:\s*[\w\s]+/i,
-        /written\s+by\s+[\w\s]+/i
-    ];
-    return authorPatterns.some(pattern => pattern.test(text));
-}
-
-function checkForDate(text) {
-    // Look for date patterns
-    const datePatterns = [
-        /\d{1,2}\s+\w+\s+\d{4}/,
-        /\w+\s+\d{1,2},\s+\d{4}/,
-        /\d{4}-\d{2}-\d{2}/
-    ];
-    return datePatterns.some(pattern => pattern.test(text));
-}
-
-function checkForReferences(text) {
-    // Look for reference indicators
-    const referencePatterns = [
-        /source:/i,
-        /according to/i,
-        /as reported by/i,
-        /studies show/i,
-        /research indicates/i
-    ];
-    return referencePatterns.some(pattern => pattern.test(text));
-}
-
 function checkForImages() {
     // Check for images in the article content
     const articleContent = document.querySelector('article') || document.body;
@@ -104,15 +128,8 @@ function checkForImages() {
     return visibleImages.length > 0;
 }
 
-function calculateScore(indicators) {
+function calculateScore(indicators, weights) {
     let score = 0;
-    const weights = {
-        hasAuthor: 25,
-        isTrustedAuthor: 35,  // Increased weight for trusted authors
-        hasDate: 20,
-        hasReferences: 20,
-        hasImages: 5
-    };
 
     console.log('Starting score calculation with indicators:', indicators); // Debug log
 
@@ -0,0 +1,349 @@
+import logging
+import time
+from html.parser import HTMLParser
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+try:
+    from lxml import etree
+except ImportError:  # pragma: no cover - lxml is optional
+    etree = None
+
+from rules import (WHO_AUTHOR, WHO_PATTERNS, WHO_MATCHER, AUTHOR_SELECTORS,
+                   DATE_SELECTORS, TEXT_CONTAINERS, SelectorIndex)
+from metrics import timer
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Text inside these elements is not part of the document text
+# (BeautifulSoup's get_text() skips them too)
+SKIP_TEXT_TAGS = {'script', 'style', 'template'}
+
+# Elements that never have children or an end tag
+VOID_TAGS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'param', 'source', 'track', 'wbr'
+}
+
+# Body paragraphs read before a streamed download may stop early, for
+# callers that opt in (see IncrementalExtractor)
+DEFAULT_MAX_PARAGRAPHS = 40
+
+class _Capture:
+    """Collects the text of one element until its end tag"""
+    __slots__ = ('parts', 'sink')
+
+    def __init__(self, sink: Callable[[str], None]):
+        self.parts: List[str] = []
+        self.sink = sink
+
+    def finish(self):
+        self.sink(''.join(self.parts).strip())
+
+class ArticleExtractor:
+    """
+    Single-pass article field extractor.
+
+    Receives parser events (start/end/data) and collects the title, author,
+    date, body paragraphs and outbound links in one walk over the document.
+    The methods follow lxml's parser target interface, so the same object
+    can be driven by lxml or by the standard library HTMLParser.
+    """
+
+    def __init__(self):
+        self._stack: List[Tuple[str, List[_Capture], List[int]]] = []
+        self._active: List[_Capture] = []
+        self._skip_depth = 0
+        self._container_depth = [0] * len(TEXT_CONTAINERS)
+
+        self._who_found = False
+        self._who_window = max(len(p) for p in WHO_PATTERNS) - 1
+        self._text_tail = ''
+
+        self.title: Optional[str] = None
+        self.page_title: Optional[str] = None
+        self.canonical: Optional[str] = None
+        self.authors: List[Optional[str]] = [None] * len(AUTHOR_SELECTORS)
+        self.dates: List[Optional[str]] = [None] * len(DATE_SELECTORS)
+        self.paragraphs: List[List[str]] = [[] for _ in range(len(TEXT_CONTAINERS))]
+        self.links: List[str] = []
+
+    # Parser target interface
+
+    def start(self, tag: str, attrib: Dict[str, str]):
+        tag = tag.lower()
+        if tag in SKIP_TEXT_TAGS:
+            self._skip_depth += 1
+        # The standard library parser does not close <p> implicitly
+        if tag == 'p' and self._stack and self._stack[-1][0] == 'p':
+            self.end('p')
+
+        attrs = attrib or {}
+        classes = set(attrs.get('class', '').split()) if 'class' in attrs else set()
+        captures: List[_Capture] = []
+
+        if tag == 'h1' and self.title is None:
+            self.title = ''
+            captures.append(_Capture(self._set_title))
+        elif tag == 'title' and self.page_title is None:
+            self.page_title = ''
+            captures.append(_Capture(self._set_page_title))
+        elif tag == 'a' and 'href' in attrs:
+            self.links.append(attrs['href'])
+        elif tag == 'link' and self.canonical is None and 'canonical' in attrs.get('rel', '').lower().split():
+            self.canonical = attrs.get('href', '')
+        elif tag == 'p':
+            for i, depth in enumerate(self._container_depth):
+                if depth:
+                    captures.append(_Capture(self.paragraphs[i].append))
+
+        self._match_selectors(tag, attrs, classes, AUTHOR_SELECTORS, self.authors, captures)
+        self._match_selectors(tag, attrs, classes, DATE_SELECTORS, self.dates, captures)
+
+        containers = TEXT_CONTAINERS.match(tag, attrs, classes)
+        for i in containers:
+            self._container_depth[i] += 1
+
+        if tag in VOID_TAGS:
+            for capture in captures:
+                capture.finish()
+            for i in containers:
+                self._container_depth[i] -= 1
+            return
+
+        self._stack.append((tag, captures, containers))
+        self._active.extend(captures)
+
+    def end(self, tag: str):
+        tag = tag.lower()
+        if tag in VOID_TAGS:
+            return
+        # Pop up to the matching open element; ignore stray end tags
+        if not any(entry[0] == tag for entry in self._stack):
+            return
+        while self._stack:
+            open_tag = self._pop()
+            if open_tag == tag:
+                break
+
+    def data(self, data: str):
+        if self._skip_depth:
+            return
+        for capture in self._active:
+            capture.parts.append(data)
+        if not self._who_found:
+            window = self._text_tail + data
+            self._who_found = WHO_MATCHER.search(window)
+            self._text_tail = window[-self._who_window:]
+
+    def comment(self, text: str):
+        pass
+
+    def close(self) -> Dict[str, Any]:
+        while self._stack:
+            self._pop()
+        return self.result()
+
+    # Helpers
+
+    def _pop(self) -> str:
+        tag, captures, containers = self._stack.pop()
+        if tag in SKIP_TEXT_TAGS:
+            self._skip_depth -= 1
+        for capture in captures:
+            capture.finish()
+            self._active.remove(capture)
+        for i in containers:
+            self._container_depth[i] -= 1
+        return tag
+
+    def _set_title(self, text: str):
+        self.title = text
+
+    def _set_page_title(self, text: str):
+        self.page_title = text
+
+    def complete(self, max_paragraphs: int) -> bool:
+        """
+        Check whether the fields we score on have all been found.
+
+        Args:
+            max_paragraphs: Number of body paragraphs that is enough
+
+        Returns:
+            True once the title, an author, a date and max_paragraphs
+            paragraphs have been captured and no element is still open
+            for capture
+        """
+        if self._active or self.title is None:
+            return False
+        if not self._who_found and all(a is None for a in self.authors):
+            return False
+        if all(d is None for d in self.dates):
+            return False
+        return any(len(p) >= max_paragraphs for p in self.paragraphs)
+
+    @staticmethod
+    def _match_selectors(tag: str, attrs: Dict[str, str], classes: set, selectors: SelectorIndex,
+                         found: List[Optional[str]], captures: List[_Capture]):
+        for i in selectors.match(tag, attrs, classes):
+            if found[i] is None:
+                if selectors.selectors[i].is_meta:
+                    found[i] = attrs.get('content', '')
+                else:
+                    found[i] = ''
+
+                    def sink(text, i=i):
+                        found[i] = text
+                    captures.append(_Capture(sink))
+
+    def result(self) -> Dict[str, Any]:
+        """
+        Get the extracted fields.
+
+        Returns:
+            Dictionary containing title, page_title, author, date, text,
+            links (raw href values in document order) and canonical
+        """
+        if self._who_found:
+            author = WHO_AUTHOR
+        else:
+            author = next((a for a in self.authors if a is not None), '')
+        date = next((d for d in self.dates if d is not None), '')
+        text = next((' '.join(p) for p in self.paragraphs if p), '')
+        return {
+            'title': self.title or '',
+            'page_title': self.page_title or '',
+            'author': author,
+            'date': date,
+            'text': text,
+            'links': self.links,
+            'canonical': self.canonical or ''
+        }
+
+class _StdlibDriver(HTMLParser):
+    """Feeds standard library HTMLParser events into an ArticleExtractor"""
+
+    def __init__(self, target: ArticleExtractor):
+        super().__init__(convert_charrefs=True)
+        self.target = target
+
+    def handle_starttag(self, tag, attrs):
+        self.target.start(tag, {k: v or '' for k, v in attrs})
+
+    def handle_startendtag(self, tag, attrs):
+        self.target.start(tag, {k: v or '' for k, v in attrs})
+        if tag not in VOID_TAGS:
+            self.target.end(tag)
+
+    def handle_endtag(self, tag):
+        self.target.end(tag)
+
+    def handle_data(self, data):
+        self.target.data(data)
+
+    def close(self) -> Dict[str, Any]:
+        super().close()
+        return self.target.close()
+
+def make_parser(target: ArticleExtractor, backend: Optional[str] = None):
+    """
+    Create an incremental parser driving the given extractor.
+
+    Args:
+        target: Extractor receiving parser events
+        backend: 'lxml' or 'html.parser' (defaults to lxml when installed)
+
+    Returns:
+        Parser object with feed() and close() methods
+    """
+    if backend is None:
+        backend = 'lxml' if etree is not None else 'html.parser'
+    if backend == 'lxml':
+        if etree is None:
+            raise ValueError("lxml backend requested but lxml is not installed")
+        return etree.HTMLParser(target=target)
+    if backend == 'html.parser':
+        return _StdlibDriver(target)
+    raise ValueError(f"Unknown parser backend: {backend}")
+
+class IncrementalExtractor:
+    """
+    Extracts article fields from a document delivered in chunks.
+
+    By default the whole document is read, so the result equals
+    extract_article(). With max_paragraphs, feed() reports when the title,
+    a byline, a date and that many paragraphs are in, so a download can
+    stop there. Text and links after that point are then missing and a
+    later byline (e.g. a WHO attribution) is not seen, so only callers
+    that score neither links nor the full text should set it.
+    """
+
+    def __init__(self, max_paragraphs: Optional[int] = None,
+                 backend: Optional[str] = None):
+        """
+        Args:
+            max_paragraphs: Paragraphs needed before stopping (None reads
+                everything), e.g. DEFAULT_MAX_PARAGRAPHS
+            backend: Parser backend, see make_parser()
+        """
+        self.target = ArticleExtractor()
+        self.parser = make_parser(self.target, backend)
+        self.max_paragraphs = max_paragraphs
+        self.stopped_early = False
+        self.seconds = 0.0
+        self._fed = False
+
+    def feed(self, text: str) -> bool:
+        """
+        Parse the next chunk of the document.
+
+        Args:
+            text: Decoded chunk of HTML
+
+        Returns:
+            True if enough has been extracted and the rest can be skipped
+        """
+        if text:
+            start = time.perf_counter()
+            self.parser.feed(text)
+            self.seconds += time.perf_counter() - start
+            self._fed = True
+        if self.max_paragraphs and self.target.complete(self.max_paragraphs):
+            self.stopped_early = True
+        return self.stopped_early
+
+    def close(self) -> Dict[str, Any]:
+        """
+        Finish parsing.
+
+        Returns:
+            The same fields as extract_article()
+        """
+        if not self._fed:
+            return self.target.result()
+        start = time.perf_counter()
+        fields = self.parser.close()
+        self.seconds += time.perf_counter() - start
+        return fields
+
+def extract_article(html: str, backend: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Extract article fields from an HTML document in a single pass.
+
+    Args:
+        html: HTML document
+        backend: Parser backend, see make_parser()
+
+    Returns:
+        Dictionary containing title, page_title, author, date, text, links
+        and canonical
+    """
+    target = ArticleExtractor()
+    if not html:
+        return target.result()
+    with timer('parse'):
+        parser = make_parser(target, backend)
+        parser.feed(html)
+        return parser.close()
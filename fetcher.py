@@ -0,0 +1,244 @@
+import codecs
+import re
+import threading
+import time
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Callable, Dict, Any, Optional
+from host_scheduler import HostScheduler
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+# Limits for streamed page downloads
+MAX_PAGE_BYTES = 5 * 1024 * 1024
+STREAM_CHUNK_SIZE = 16 * 1024
+HTML_CONTENT_TYPES = {'text/html', 'application/xhtml+xml'}
+# A <meta charset> only counts within the first 1024 bytes (HTML prescan)
+CHARSET_PRESCAN_BYTES = 1024
+_META_CHARSET = re.compile(rb'<meta[^>]*?charset\s*=\s*["\']?\s*([A-Za-z0-9_.:-]+)', re.IGNORECASE)
+
+class ContentRejected(requests.RequestException):
+    """Raised when a page is not HTML or is larger than allowed"""
+
+def parse_content_type(value: str):
+    """Split a Content-Type header into (media type, charset or None)"""
+    media_type, _, params = value.partition(';')
+    charset = None
+    for param in params.split(';'):
+        name, _, param_value = param.partition('=')
+        if name.strip().lower() == 'charset':
+            charset = param_value.strip().strip('"\'') or None
+    return media_type.strip().lower(), charset
+
+def sniff_charset(head: bytes) -> Optional[str]:
+    """Get the charset a document declares in a <meta> tag near its start, if any"""
+    match = _META_CHARSET.search(head[:CHARSET_PRESCAN_BYTES])
+    return match.group(1).decode('ascii') if match else None
+
+def _decoder(charset: Optional[str]):
+    try:
+        return codecs.getincrementaldecoder(charset or 'utf-8')(errors='replace')
+    except LookupError:
+        return codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+class Fetcher:
+    def __init__(self, pool_connections: int = 50, pool_maxsize: int = 10,
+                 max_retries: int = 2, backoff_factor: float = 0.3,
+                 timeout: float = 10, headers: Optional[Dict[str, str]] = None,
+                 scheduler: Optional[HostScheduler] = None):
+        """
+        Shared HTTP fetcher with per-host keep-alive connection pools.
+
+        Args:
+            pool_connections: Number of hosts whose pools are kept open
+            pool_maxsize: Maximum idle connections kept per host
+            max_retries: Retries for connection errors and 429/5xx responses
+            backoff_factor: Exponential backoff factor between retries (seconds)
+            timeout: Default request timeout (seconds)
+            headers: Headers sent with every request
+            scheduler: Per-host admission control for fetch_html (adaptive
+                timeouts, rate limits, circuit breaking); None fetches directly
+        """
+        self.timeout = timeout
+        self.scheduler = scheduler
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            raise_on_status=False
+        )
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=retry
+        )
+        self.session = requests.Session()
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+        self._lock = threading.Lock()
+        self._page_stats = {'pages': 0, 'bytes': 0, 'stopped_early': 0, 'rejected': 0}
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """
+        Fetch a URL over a pooled connection.
+
+        Args:
+            url: URL to fetch
+            **kwargs: Extra arguments passed to requests (headers, stream, ...)
+
+        Returns:
+            The requests Response
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.get(url, **kwargs)
+
+    def fetch_html(self, url: str, consume: Callable[[str], bool],
+                   headers: Optional[Dict[str, str]] = None,
+                   max_bytes: int = MAX_PAGE_BYTES) -> requests.Response:
+        """
+        Stream an HTML page into consume() without buffering the whole body.
+
+        The Content-Type and Content-Length headers are checked before any
+        of the body is read. The body is then decoded chunk by chunk (with
+        the header charset, else the page's <meta charset>, else UTF-8) and
+        the download stops as soon as consume() returns True. With a
+        scheduler, the request waits for its host's rate limit and
+        concurrency slot and uses the host's adaptive timeout.
+
+        Args:
+            url: URL to fetch
+            consume: Called with each decoded chunk; returns True to stop reading
+            headers: Extra request headers (e.g. conditional GET headers)
+            max_bytes: Maximum body size in bytes
+
+        Returns:
+            The closed requests Response (its body has been consumed)
+
+        Raises:
+            ContentRejected: If the page is not HTML or exceeds max_bytes
+            HostUnavailable: If the scheduler fails the request fast
+            requests.RequestException: If the request fails or returns an error status
+        """
+        if self.scheduler is None:
+            return self._fetch_html(url, consume, headers, max_bytes, self.timeout, None)
+        with self.scheduler.slot(url) as lease:
+            return self._fetch_html(url, consume, headers, max_bytes, lease.timeout, lease)
+
+    def _fetch_html(self, url, consume, headers, max_bytes, timeout, lease) -> requests.Response:
+        start = time.perf_counter()
+        response = self.get(url, headers=headers, stream=True, timeout=timeout)
+        if lease is not None:
+            status = response.status_code
+            lease.observe(time.perf_counter() - start, healthy=status < 500 and status != 429)
+        try:
+            response.raise_for_status()
+            if response.status_code == 304:
+                return response
+
+            media_type, charset = parse_content_type(response.headers.get('Content-Type', ''))
+            if media_type and media_type not in HTML_CONTENT_TYPES:
+                self._count('rejected')
+                raise ContentRejected(f"Unsupported content type: {media_type}", response=response)
+            length = response.headers.get('Content-Length', '')
+            if length.isdigit() and int(length) > max_bytes:
+                self._count('rejected')
+                raise ContentRejected(f"Page size {length} exceeds {max_bytes} bytes", response=response)
+
+            decoder = _decoder(charset) if charset else None
+            # Without a header charset, hold the first bytes back until the prescan window is in
+            head = b''
+            received = 0
+            stopped = False
+            for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+                received += len(chunk)
+                if received > max_bytes:
+                    self._count('rejected')
+                    raise ContentRejected(f"Page exceeds {max_bytes} bytes", response=response)
+                if decoder is None:
+                    head += chunk
+                    if len(head) < CHARSET_PRESCAN_BYTES:
+                        continue
+                    decoder = _decoder(sniff_charset(head))
+                    chunk, head = head, b''
+                if consume(decoder.decode(chunk)):
+                    stopped = True
+                    break
+            if not stopped:
+                if decoder is None:
+                    decoder = _decoder(sniff_charset(head))
+                consume(decoder.decode(head, final=True))
+
+            with self._lock:
+                self._page_stats['pages'] += 1
+                self._page_stats['bytes'] += received
+                self._page_stats['stopped_early'] += stopped
+            return response
+        finally:
+            response.close()
+
+    def _count(self, name: str):
+        with self._lock:
+            self._page_stats[name] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get connection-reuse statistics for the hosts currently pooled.
+
+        Returns:
+            Dictionary with total requests, new connections, reused
+            connections, reuse ratio, a per-host breakdown and streamed
+            page counters
+        """
+        hosts = {}
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = f"{pool.scheme}://{pool.host}:{pool.port}"
+            hosts[host] = {
+                'requests': pool.num_requests,
+                'connections': pool.num_connections
+            }
+
+        total_requests = sum(h['requests'] for h in hosts.values())
+        total_connections = sum(h['connections'] for h in hosts.values())
+        reused = max(total_requests - total_connections, 0)
+        with self._lock:
+            page_stats = dict(self._page_stats)
+        return {
+            'requests': total_requests,
+            'connections': total_connections,
+            'reused': reused,
+            'reuse_ratio': round(reused / total_requests, 3) if total_requests else 0.0,
+            'hosts': hosts,
+            'pages': page_stats,
+            'scheduler': self.scheduler.stats() if self.scheduler is not None else {}
+        }
+
+    def close(self):
+        """Close all pooled connections"""
+        self.session.close()
+
+_fetcher: Optional[Fetcher] = None
+_fetcher_lock = threading.Lock()
+
+def get_fetcher() -> Fetcher:
+    """Get the process-wide shared Fetcher, creating it on first use"""
+    global _fetcher
+    if _fetcher is None:
+        with _fetcher_lock:
+            if _fetcher is None:
+                _fetcher = Fetcher(scheduler=HostScheduler())
+                logger.info("Shared HTTP fetcher initialized")
+    return _fetcher
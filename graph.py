@@ -1,34 +1,134 @@
-from neo4j import GraphDatabase
 import logging
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, List, Optional
+from scoring import score_article
+from reputation import get_reputation_index
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Writes an UNWIND batch of articles and returns the score of each one in
+# the same round trip. Empty author/date are stored as null so that
+# "IS NOT NULL" means the field was actually found.
+INGEST_QUERY = """
+    UNWIND $rows AS row
+    MERGE (a:Article {url: row.url})
+    SET a.title = row.title,
+        a.author = CASE WHEN row.author = '' THEN null ELSE row.author END,
+        a.date = CASE WHEN row.date = '' THEN null ELSE row.date END,
+        a.text_length = row.text_length
+    FOREACH (_ IN CASE WHEN $store_text THEN [1] ELSE [] END | SET a.text = row.text)
+    WITH a
+    OPTIONAL MATCH (a)-[:REFERENCES]->(other:Article)
+    WITH a, count(other) as referenceCount
+    RETURN a.url as url,
+        CASE
+            WHEN a.author IS NOT NULL THEN 0.3
+            ELSE 0.1
+        END +
+        CASE
+            WHEN referenceCount > 0 THEN 0.3
+            ELSE 0.1
+        END +
+        CASE
+            WHEN a.date IS NOT NULL THEN 0.2
+            ELSE 0.1
+        END +
+        CASE
+            WHEN coalesce(a.text_length, size(a.text)) > 500 THEN 0.2
+            ELSE 0.1
+        END as score
+"""
+
+# Bulk-write outbound references. Targets that look like articles become
+# Article nodes (counted by the scoring rules), homepages become Domain nodes.
+ARTICLE_REFERENCES_QUERY = """
+    UNWIND $rows AS row
+    MERGE (a:Article {url: row.source})
+    MERGE (b:Article {url: row.target})
+    MERGE (a)-[:REFERENCES]->(b)
+    RETURN count(*) as edges
+"""
+
+DOMAIN_REFERENCES_QUERY = """
+    UNWIND $rows AS row
+    MERGE (a:Article {url: row.source})
+    MERGE (d:Domain {name: row.target})
+    MERGE (a)-[:REFERENCES]->(d)
+    RETURN count(*) as edges
+"""
+
+# Near-duplicate bodies found by the MinHash index (near_duplicates.py)
+DUPLICATES_QUERY = """
+    UNWIND $rows AS row
+    MERGE (a:Article {url: row.source})
+    MERGE (b:Article {url: row.target})
+    MERGE (a)-[r:DUPLICATES]->(b)
+    SET r.similarity = row.similarity
+    RETURN count(*) as edges
+"""
+
 class GraphDB:
-    def __init__(self):
-        """Initialize Neo4j connection"""
-        self.uri = "bolt://localhost:7687"
-        self.user = "neo4j"
-        self.password = "password"  # Change this in production
-        self.driver = None
-        self._connect()
+    def __init__(self, uri: str = "bolt://localhost:7687", user: str = "neo4j",
+                 password: str = "password", max_connection_pool_size: int = 50,
+                 connection_acquisition_timeout: float = 10.0, store_text: bool = True):
+        """
+        Neo4j access for ingesting and scoring articles.
+        
+        Nothing is imported or connected here: the driver is created on
+        first use (see driver), so the server starts without Neo4j.
+        
+        Args:
+            uri: Bolt URI of the Neo4j server
+            user: Neo4j user
+            password: Neo4j password (change this in production)
+            max_connection_pool_size: Maximum pooled connections in the driver
+            connection_acquisition_timeout: Seconds to wait for a free connection
+            store_text: Whether full article text is stored on Article nodes
+        """
+        self.uri = uri
+        self.user = user
+        self.password = password
+        self.max_connection_pool_size = max_connection_pool_size
+        self.connection_acquisition_timeout = connection_acquisition_timeout
+        self.store_text = store_text
+        self._driver = None
+        self._driver_lock = threading.Lock()
 
-    def _connect(self):
-        """Establish connection to Neo4j database"""
+    @property
+    def driver(self):
+        """The neo4j driver, created on first use (it connects lazily per session)"""
+        if self._driver is None:
+            with self._driver_lock:
+                if self._driver is None:
+                    from neo4j import GraphDatabase
+                    self._driver = GraphDatabase.driver(
+                        self.uri,
+                        auth=(self.user, self.password),
+                        max_connection_pool_size=self.max_connection_pool_size,
+                        connection_acquisition_timeout=self.connection_acquisition_timeout
+                    )
+        return self._driver
+
+    def connect(self) -> "GraphDB":
+        """
+        Check that Neo4j is reachable.
+        
+        Returns:
+            self, for chaining
+        
+        Raises:
+            Exception: If Neo4j cannot be reached
+        """
         try:
-            self.driver = GraphDatabase.driver(
-                self.uri,
-                auth=(self.user, self.password)
-            )
-            # Test connection
             with self.driver.session() as session:
                 session.run("RETURN 1")
             logger.info("Successfully connected to Neo4j")
         except Exception as e:
             logger.error(f"Failed to connect to Neo4j: {str(e)}")
             raise
+        return self
 
     def calculate_credibility_score(self, url: str, content: Dict[str, Any]) -> float:
         """
@@ -41,60 +141,106 @@ class GraphDB:
         Returns:
             Credibility score between 0 and 1
         """
+        # Calculate credibility score based on:
+        # 1. Author reputation
+        # 2. Source reliability
+        # 3. Content similarity with known facts
+        # 4. Cross-references with other articles
         try:
-            with self.driver.session() as session:
-                # Create or update article node
-                session.run("""
-                    MERGE (a:Article {url: $url})
-                    SET a.title = $title,
-                        a.author = $author,
-                        a.date = $date,
-                        a.text = $text
-                """, {
-                    'url': url,
-                    'title': content.get('title', ''),
-                    'author': content.get('author', ''),
-                    'date': content.get('date', ''),
-                    'text': content.get('text', '')
-                })
-
-                # Calculate credibility score based on:
-                # 1. Author reputation
-                # 2. Source reliability
-                # 3. Content similarity with known facts
-                # 4. Cross-references with other articles
-                
-                result = session.run("""
-                    MATCH (a:Article {url: $url})
-                    OPTIONAL MATCH (a)-[:REFERENCES]->(other:Article)
-                    WITH a, count(other) as referenceCount
-                    RETURN 
-                        CASE 
-                            WHEN a.author IS NOT NULL THEN 0.3
-                            ELSE 0.1
-                        END +
-                        CASE 
-                            WHEN referenceCount > 0 THEN 0.3
-                            ELSE 0.1
-                        END +
-                        CASE 
-                            WHEN a.date IS NOT NULL THEN 0.2
-                            ELSE 0.1
-                        END +
-                        CASE 
-                            WHEN length(a.text) > 500 THEN 0.2
-                            ELSE 0.1
-                        END as score
-                """, {'url': url})
-                
-                return result.single()['score']
-                
+            scores = self.ingest_articles([{**content, 'url': url}])
+            return scores[url]
         except Exception as e:
             logger.error(f"Error calculating credibility score: {str(e)}")
-            return 0.5  # Default neutral score on error
+            # Same rules computed locally (no reference data without the graph)
+            return score_article(content)
+
+    @staticmethod
+    def _ingest_row(article: Dict[str, Any], store_text: bool) -> Dict[str, Any]:
+        """Build the query parameters for one article"""
+        text = article.get('text') or ''
+        row = {
+            'url': article.get('url') or article.get('source'),
+            'title': article.get('title') or '',
+            'author': article.get('author') or '',
+            'date': article.get('date') or '',
+            'text_length': len(text)
+        }
+        if store_text:
+            row['text'] = text
+        return row
+
+    def ingest_articles(self, articles: List[Dict[str, Any]], batch_size: int = 500,
+                        store_text: Optional[bool] = None) -> Dict[str, float]:
+        """
+        Store many articles and score them, one round trip per batch.
+        
+        Args:
+            articles: Article dicts with 'url' (or 'source'), title, author, date, text
+            batch_size: Articles written per UNWIND transaction
+            store_text: Whether to store full text (defaults to self.store_text);
+                only its length is kept otherwise
+            
+        Returns:
+            Dictionary mapping article URL to credibility score (0-1)
+        """
+        if store_text is None:
+            store_text = self.store_text
+        rows = [self._ingest_row(article, store_text) for article in articles]
+        scores = {}
+        with self.driver.session() as session:
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                records = session.execute_write(
+                    lambda tx: list(tx.run(INGEST_QUERY, {'rows': batch, 'store_text': store_text}))
+                )
+                for record in records:
+                    scores[record['url']] = record['score']
+        return scores
+
+    def add_references(self, references: List[Dict[str, str]], batch_size: int = 1000) -> int:
+        """
+        Write REFERENCES (and DUPLICATES) edges in UNWIND batches.
+        
+        Args:
+            references: Dicts with 'source' (article URL), 'target' (URL or
+                domain) and 'kind' ('article', 'domain' or 'duplicate',
+                which also carries 'similarity')
+            batch_size: Edges written per transaction
+            
+        Returns:
+            Number of edges written
+        """
+        written = 0
+        with self.driver.session() as session:
+            for kind, query in (('article', ARTICLE_REFERENCES_QUERY), ('domain', DOMAIN_REFERENCES_QUERY),
+                                ('duplicate', DUPLICATES_QUERY)):
+                rows = [ref for ref in references if ref['kind'] == kind]
+                for start in range(0, len(rows), batch_size):
+                    batch = rows[start:start + batch_size]
+                    written += session.execute_write(
+                        lambda tx: tx.run(query, {'rows': batch}).single()['edges']
+                    )
+        return written
 
     def close(self):
         """Close Neo4j connection"""
-        if self.driver:
-            self.driver.close()
-            logger.info("Neo4j connection closed") 
\ No newline at end of file
+        if self._driver:
+            self._driver.close()
+            self._driver = None
+            logger.info("Neo4j connection closed") 
+
+def get_credibility_score(domain: str) -> float:
+    """
+    Get the credibility score for a domain from the precomputed reputation index.
+    
+    The index is built offline from the stored articles and REFERENCES
+    edges (python reputation.py) and updated as new articles are scored.
+    
+    Args:
+        domain: Website domain (e.g. 'www.bbc.com')
+        
+    Returns:
+        Credibility score between 0 and 100 (50 for unknown domains)
+    """
+    score = get_reputation_index().lookup(domain)
+    return score if score is not None else 50.0
@@ -0,0 +1,306 @@
+import os
+import threading
+import time
+import logging
+import requests
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Any, Iterator, Optional
+from urllib.parse import urlsplit
+from metrics import increment
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Adaptive timeout: smoothed latency plus 4 deviations (as for TCP's RTO)
+LATENCY_ALPHA = 0.125
+DEVIATION_BETA = 0.25
+MIN_TIMEOUT = 2.0  # seconds
+# Concurrency per host (NEWSBUSTER_HOST_CONCURRENCY): additive increase,
+# halved on failures
+MAX_CONCURRENCY = int(os.environ.get('NEWSBUSTER_HOST_CONCURRENCY', '8'))
+# Requests per second per host (NEWSBUSTER_HOST_RATE, 0 disables), with
+# bursts up to twice that
+RATE_LIMIT = float(os.environ.get('NEWSBUSTER_HOST_RATE', '20'))
+# Seconds a request may wait for a token or a concurrency slot
+MAX_WAIT = 5.0
+# Circuit breaker: consecutive failures before opening, and cooldowns
+FAILURE_THRESHOLD = 5
+COOLDOWN = 5.0
+MAX_COOLDOWN = 300.0
+MAX_HOSTS = 10000
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+class HostUnavailable(requests.RequestException):
+    """Raised without contacting a host whose circuit is open or that is saturated"""
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def is_host_failure(error: BaseException) -> bool:
+    """Whether an exception means the host is unhealthy (rather than the page being bad)"""
+    if isinstance(error, (HostUnavailable, requests.ConnectionError, requests.Timeout)):
+        return True
+    response = getattr(error, 'response', None)
+    return isinstance(error, requests.HTTPError) and response is not None and \
+        (response.status_code >= 500 or response.status_code == 429)
+
+class TokenBucket:
+    """Token-bucket rate limiter (not thread-safe; HostScheduler locks around it)"""
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.clock = clock
+        self.updated = clock()
+
+    def reserve(self) -> float:
+        """
+        Take one token, going into debt if none is left.
+
+        Returns:
+            Seconds the caller has to wait before using the token
+        """
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def refund(self):
+        """Return a token taken by reserve()"""
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+class _Host:
+    __slots__ = ('latency', 'deviation', 'limit', 'successes', 'in_flight', 'bucket',
+                 'state', 'failures', 'open_until', 'cooldown', 'stats')
+
+    def __init__(self, limit: int, bucket: TokenBucket, cooldown: float):
+        self.latency: Optional[float] = None
+        self.deviation = 0.0
+        self.limit = limit
+        self.successes = 0
+        self.in_flight = 0
+        self.bucket = bucket
+        self.state = CLOSED
+        self.failures = 0
+        self.open_until = 0.0
+        self.cooldown = cooldown
+        self.stats = {'requests': 0, 'failures': 0, 'rejected': 0}
+
+class Lease:
+    """A granted request slot: the timeout to use and the outcome to report"""
+    __slots__ = ('timeout', 'host', 'outcome')
+
+    def __init__(self, timeout: float, host: str):
+        self.timeout = timeout
+        self.host = host
+        self.outcome = None
+
+    def observe(self, seconds: float, healthy: bool = True):
+        """Record the time until the response headers arrived"""
+        self.outcome = (seconds, healthy)
+
+class HostScheduler:
+    """
+    Per-host admission control for outgoing fetches.
+
+    Each host gets a timeout derived from its smoothed latency, an
+    adaptive concurrency limit (+1 per window of successes, halved on
+    failure), a token-bucket rate limit and a circuit breaker. After
+    failure_threshold consecutive failures the circuit opens and requests
+    fail immediately with HostUnavailable; after the cooldown a single
+    probe is let through, which closes the circuit or reopens it with a
+    doubled cooldown.
+    """
+
+    def __init__(self, max_timeout: float = 10.0, min_timeout: float = MIN_TIMEOUT,
+                 max_concurrency: int = MAX_CONCURRENCY, rate: float = RATE_LIMIT,
+                 burst: Optional[float] = None, max_wait: float = MAX_WAIT,
+                 failure_threshold: int = FAILURE_THRESHOLD, cooldown: float = COOLDOWN,
+                 max_cooldown: float = MAX_COOLDOWN, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        Args:
+            max_timeout: Timeout for hosts without latency samples, and the upper bound
+            min_timeout: Lower bound of adaptive timeouts
+            max_concurrency: Upper bound of a host's concurrency limit
+            rate: Requests per second per host (0 for no rate limit)
+            burst: Token-bucket capacity (defaults to 2 * rate)
+            max_wait: Longest wait for a token or a slot before failing fast
+            failure_threshold: Consecutive failures that open the circuit
+            cooldown: Seconds the circuit stays open the first time
+            max_cooldown: Upper bound of the doubling cooldown
+            clock: Monotonic time source
+            sleep: Sleep function (both replaceable in tests)
+        """
+        self.max_timeout = max_timeout
+        self.min_timeout = min_timeout
+        self.max_concurrency = max_concurrency
+        self.rate = rate
+        self.burst = burst if burst is not None else 2 * rate
+        self.max_wait = max_wait
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.clock = clock
+        self.sleep = sleep
+        self._hosts: "OrderedDict[str, _Host]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._slot_freed = threading.Condition(self._lock)
+
+    def _host(self, host: str) -> _Host:
+        state = self._hosts.get(host)
+        if state is None:
+            bucket = TokenBucket(self.rate, self.burst, self.clock) if self.rate > 0 else None
+            state = self._hosts[host] = _Host(self.max_concurrency, bucket, self.cooldown)
+            if len(self._hosts) > MAX_HOSTS:
+                for name in list(self._hosts)[:len(self._hosts) - MAX_HOSTS]:
+                    if self._hosts[name].in_flight == 0 and self._hosts[name].state == CLOSED:
+                        del self._hosts[name]
+        self._hosts.move_to_end(host)
+        return state
+
+    def _timeout(self, state: _Host) -> float:
+        if state.latency is None:
+            return self.max_timeout
+        return min(max(state.latency + 4 * state.deviation, self.min_timeout), self.max_timeout)
+
+    def _reject(self, host: str, state: _Host, message: str, retry_after: float):
+        state.stats['rejected'] += 1
+        increment('host_rejected')
+        raise HostUnavailable(f"{host} {message}", retry_after=round(retry_after, 1))
+
+    def acquire(self, url: str) -> Lease:
+        """
+        Wait for a rate-limit token and a concurrency slot on the URL's host.
+
+        Args:
+            url: URL about to be fetched
+
+        Returns:
+            Lease carrying the timeout to use; pass it to release()
+
+        Raises:
+            HostUnavailable: If the circuit is open (or a probe is already
+                running), or no token or slot frees up within max_wait
+        """
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            state = self._host(host)
+            now = self.clock()
+            if state.state == OPEN:
+                if now < state.open_until:
+                    self._reject(host, state, "is unavailable (circuit open)", state.open_until - now)
+                # Cooldown over: this request is the probe
+                state.state = HALF_OPEN
+                state.limit = 1
+            elif state.state == HALF_OPEN and state.in_flight:
+                self._reject(host, state, "is being probed (circuit half-open)", state.cooldown)
+
+            wait = state.bucket.reserve() if state.bucket is not None else 0.0
+            if wait > self.max_wait:
+                state.bucket.refund()
+                self._reject(host, state, "is rate limited", wait)
+
+            deadline = now + self.max_wait
+            while state.in_flight >= state.limit:
+                remaining = deadline - self.clock()
+                if remaining <= 0:
+                    if state.bucket is not None:
+                        state.bucket.refund()
+                    self._reject(host, state, "is saturated", self._timeout(state))
+                self._slot_freed.wait(remaining)
+            state.in_flight += 1
+            state.stats['requests'] += 1
+            lease = Lease(self._timeout(state), host)
+        if wait > 0:
+            self.sleep(wait)
+        return lease
+
+    def release(self, lease: Lease, error: Optional[BaseException] = None):
+        """
+        Free a lease's slot and feed its outcome into the host's state.
+
+        Args:
+            lease: Lease returned by acquire()
+            error: Exception raised while fetching, if any
+        """
+        if lease.outcome is not None:
+            seconds, healthy = lease.outcome
+        else:
+            # Failed before any response arrived (connect error, timeout)
+            seconds, healthy = None, not (error is not None and is_host_failure(error))
+        with self._lock:
+            state = self._host(lease.host)
+            state.in_flight -= 1
+            if seconds is not None:
+                if state.latency is None:
+                    state.latency, state.deviation = seconds, seconds / 2
+                else:
+                    state.deviation += DEVIATION_BETA * (abs(seconds - state.latency) - state.deviation)
+                    state.latency += LATENCY_ALPHA * (seconds - state.latency)
+            if healthy:
+                self._on_success(state)
+            else:
+                self._on_failure(lease.host, state)
+            self._slot_freed.notify_all()
+
+    def _on_success(self, state: _Host):
+        state.failures = 0
+        if state.state == HALF_OPEN:
+            state.state = CLOSED
+            state.cooldown = self.cooldown
+        state.successes += 1
+        if state.successes >= state.limit:
+            state.successes = 0
+            state.limit = min(state.limit + 1, self.max_concurrency)
+
+    def _on_failure(self, host: str, state: _Host):
+        state.failures += 1
+        state.stats['failures'] += 1
+        state.successes = 0
+        state.limit = max(state.limit // 2, 1)
+        if state.state == HALF_OPEN:
+            state.cooldown = min(state.cooldown * 2, self.max_cooldown)
+        elif state.failures < self.failure_threshold:
+            return
+        state.state = OPEN
+        state.open_until = self.clock() + state.cooldown
+        increment('host_circuit_open')
+        logger.warning(f"Circuit open for {host} ({state.failures} failures), retry in {state.cooldown:.0f}s")
+
+    @contextmanager
+    def slot(self, url: str) -> Iterator[Lease]:
+        """acquire() and release() around a block"""
+        lease = self.acquire(url)
+        try:
+            yield lease
+        except BaseException as e:
+            self.release(lease, e)
+            raise
+        self.release(lease)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the state of every tracked host.
+
+        Returns:
+            Host -> circuit state, latency, timeout, concurrency and counters
+        """
+        with self._lock:
+            return {
+                host: {
+                    'state': state.state,
+                    'latency_ms': round(state.latency * 1000, 1) if state.latency is not None else None,
+                    'timeout': round(self._timeout(state), 3),
+                    'limit': state.limit,
+                    'in_flight': state.in_flight,
+                    **state.stats
+                }
+                for host, state in self._hosts.items()
+            }
@@ -0,0 +1,215 @@
+import threading
+import logging
+from typing import Callable, Dict, Any, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+from batch import BatchAnalyzer
+from cache import normalize_url
+from reputation import domain_of
+from scoring import GraphSink, get_graph_sink, is_page_furniture
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def extract_references(source_url: str, links: Sequence[str]) -> List[Dict[str, str]]:
+    """
+    Turn an article's outbound links into REFERENCES edges.
+
+    Links are normalized and deduplicated, and links back into the source's
+    own domain (navigation, related stories) and page furniture (share
+    buttons, ads, CDNs, static files) are dropped. Links to a site's
+    homepage resolve to a Domain node, everything else to an Article node.
+
+    Args:
+        source_url: URL of the article the links were found on
+        links: Absolute outbound URLs
+
+    Returns:
+        List of dicts with 'source', 'target' and 'kind' ('article' or 'domain')
+    """
+    source = normalize_url(source_url)
+    source_domain = domain_of(source)
+    seen = set()
+    references = []
+    for link in links:
+        try:
+            target = normalize_url(link)
+        except ValueError:
+            continue
+        target_domain = domain_of(target)
+        if not target_domain or target_domain == source_domain or is_page_furniture(target):
+            continue
+        parts = urlsplit(target)
+        if parts.path in ('', '/') and not parts.query:
+            kind, target = 'domain', target_domain
+        else:
+            kind = 'article'
+        if (kind, target) in seen:
+            continue
+        seen.add((kind, target))
+        references.append({'source': source, 'target': target, 'kind': kind})
+    return references
+
+class LinkGraphPipeline:
+    def __init__(self, graph_factory: Optional[Callable[[], Any]] = None, batch_size: int = 1000,
+                 max_queue: int = 50000, flush_interval: float = 1.0):
+        """
+        Stage between scraping and graph ingestion for outbound links.
+
+        Edges go through a bounded queue to a background writer that calls
+        GraphDB.add_references in bulk.
+
+        Args:
+            graph_factory: Callable returning a connected GraphDB
+            batch_size: Maximum edges per bulk write
+            max_queue: Maximum queued edges
+            flush_interval: Seconds to wait for a batch to fill up
+        """
+        self.sink = GraphSink(
+            graph_factory,
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+            max_queue=max_queue,
+            write=lambda db, batch: db.add_references(batch, batch_size=len(batch)),
+            name="link-graph"
+        )
+
+    def submit(self, source_url: str, links: Sequence[str], timeout: float = 0) -> int:
+        """
+        Queue the REFERENCES edges of one scraped article.
+
+        Args:
+            source_url: URL of the scraped article
+            links: Its absolute outbound URLs
+            timeout: Seconds to wait per edge for queue space (0 never blocks)
+
+        Returns:
+            Number of edges queued
+        """
+        queued = 0
+        for reference in extract_references(source_url, links):
+            if self.sink.submit(reference, timeout=timeout):
+                queued += 1
+        return queued
+
+    def submit_duplicates(self, source_url: str, matches: Sequence[Tuple[str, float]], timeout: float = 0) -> int:
+        """
+        Queue DUPLICATES edges from an article to its near-duplicates.
+
+        Args:
+            source_url: URL of the scraped article
+            matches: (url, similarity) pairs from the near-duplicate index
+            timeout: Seconds to wait per edge for queue space (0 never blocks)
+
+        Returns:
+            Number of edges queued
+        """
+        source = normalize_url(source_url)
+        queued = 0
+        for target, similarity in matches:
+            edge = {'source': source, 'target': target, 'kind': 'duplicate', 'similarity': similarity}
+            if self.sink.submit(edge, timeout=timeout):
+                queued += 1
+        return queued
+
+    def stats(self) -> Dict[str, int]:
+        """Get submitted/written/dropped edge counters and the queue depth"""
+        return self.sink.stats()
+
+    def close(self, timeout: float = 10.0):
+        """Flush queued edges and stop the writer"""
+        self.sink.close(timeout)
+
+def crawl(seed_urls: Sequence[str], max_depth: int = 1, max_pages: int = 100,
+          scrape: Optional[Callable[[str], Dict[str, Any]]] = None,
+          pipeline: Optional[LinkGraphPipeline] = None, article_sink: Optional[GraphSink] = None,
+          max_workers: int = 16, per_host_limit: int = 2) -> Dict[str, int]:
+    """
+    Breadth-first crawl of referenced articles, up to a fixed depth.
+
+    Every page is scraped on a worker pool (with a per-host concurrency cap);
+    its article goes to the graph sink and its references to the pipeline.
+    Article references found at one depth become the next depth's frontier.
+
+    Args:
+        seed_urls: Starting article URLs (depth 0)
+        max_depth: Deepest level of references to fetch
+        max_pages: Maximum pages fetched in total
+        scrape: Function returning a scrape_article-style dict
+        pipeline: Link pipeline receiving REFERENCES edges
+        article_sink: Sink receiving scraped articles
+        max_workers: Concurrent fetches
+        per_host_limit: Concurrent fetches per host
+
+    Returns:
+        Dictionary with pages fetched, failures, edges queued and depth reached
+    """
+    if scrape is None:
+        from scraper import scrape_article
+        scrape = scrape_article
+    pipeline = pipeline or get_link_pipeline()
+    article_sink = article_sink or get_graph_sink()
+    analyzer = BatchAnalyzer(scrape, max_workers=max_workers, per_host_limit=per_host_limit)
+
+    seen = set()
+    frontier = []
+    for url in seed_urls:
+        key = normalize_url(url)
+        if key not in seen:
+            seen.add(key)
+            frontier.append(url)
+
+    stats = {'pages': 0, 'failed': 0, 'edges': 0, 'depth': 0}
+    for depth in range(max_depth + 1):
+        frontier = frontier[:max(max_pages - stats['pages'] - stats['failed'], 0)]
+        if not frontier:
+            break
+        stats['depth'] = depth
+        next_frontier = []
+        for result in analyzer.run(frontier):
+            url = result['url']
+            if 'error' in result:
+                stats['failed'] += 1
+                continue
+            stats['pages'] += 1
+            # Block briefly on a full queue so the crawl slows down to
+            # ingestion speed instead of dropping items
+            article_sink.submit({**result, 'url': normalize_url(url)}, timeout=1.0)
+            references = extract_references(url, result.get('links', []))
+            for reference in references:
+                if pipeline.sink.submit(reference, timeout=1.0):
+                    stats['edges'] += 1
+                if reference['kind'] == 'article' and reference['target'] not in seen:
+                    seen.add(reference['target'])
+                    next_frontier.append(reference['target'])
+        frontier = next_frontier
+        logger.info(f"Crawl depth {depth}: {stats['pages']} pages, {len(frontier)} new references")
+    return stats
+
+_pipeline: Optional[LinkGraphPipeline] = None
+_pipeline_lock = threading.Lock()
+
+def get_link_pipeline() -> LinkGraphPipeline:
+    """Get the process-wide LinkGraphPipeline, starting it on first use"""
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                _pipeline = LinkGraphPipeline()
+                logger.info("Link graph pipeline started")
+    return _pipeline
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Crawl referenced articles into the graph")
+    parser.add_argument('urls', nargs='+')
+    parser.add_argument('--depth', type=int, default=1)
+    parser.add_argument('--max-pages', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=16)
+    args = parser.parse_args()
+
+    stats = crawl(args.urls, max_depth=args.depth, max_pages=args.max_pages, max_workers=args.workers)
+    get_link_pipeline().close()
+    get_graph_sink().close()
+    print(stats)
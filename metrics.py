@@ -0,0 +1,257 @@
+import bisect
+import cProfile
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Any, Iterable, Iterator, List, Optional, Sequence
+
+# Histogram bucket upper bounds in seconds (0.1 ms .. 10 s)
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Fraction of hot-path events that are logged (NEWSBUSTER_LOG_SAMPLE_RATE)
+LOG_SAMPLE_RATE = float(os.environ.get('NEWSBUSTER_LOG_SAMPLE_RATE', '0.01'))
+
+# Per-request profiling is off unless NEWSBUSTER_PROFILE_DIR is set
+PROFILE_DIR = os.environ.get('NEWSBUSTER_PROFILE_DIR')
+
+class Histogram:
+    """Fixed-bucket latency histogram (cumulative counts, Prometheus style)"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        cumulative = []
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            cumulative.append((bound, total))
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'mean_ms': round(self.sum / self.count * 1000, 3) if self.count else 0.0,
+            'p50_ms': self._quantile(0.5),
+            'p99_ms': self._quantile(0.99),
+            'buckets': cumulative
+        }
+
+    def _quantile(self, q: float) -> Optional[float]:
+        """Upper bound (ms) of the bucket holding quantile q"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            if total >= rank:
+                return bound * 1000
+        return float('inf')
+
+class MetricsRegistry:
+    """
+    Per-stage latency histograms and event counters.
+
+    Updates take one lock acquisition and a bisect, cheap enough for
+    every request and every page.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._histograms: Dict[str, Histogram] = {}
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float):
+        """Record one duration for a stage"""
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def increment(self, name: str, value: int = 1):
+        """Add to a counter"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """Time the enclosed block as one observation of a stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get all metrics.
+
+        Returns:
+            Dictionary with 'stages' (histogram summaries) and 'counters'
+        """
+        with self._lock:
+            return {
+                'stages': {name: h.snapshot() for name, h in sorted(self._histograms.items())},
+                'counters': dict(sorted(self._counters.items()))
+            }
+
+    def render_prometheus(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Returns:
+            Exposition text
+        """
+        snapshot = self.snapshot()
+        lines: List[str] = [
+            '# HELP newsbuster_stage_seconds Time spent per pipeline stage',
+            '# TYPE newsbuster_stage_seconds histogram'
+        ]
+        for stage, h in snapshot['stages'].items():
+            for bound, count in h['buckets']:
+                lines.append(f'newsbuster_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+            lines.append(f'newsbuster_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {h["count"]}')
+            lines.append(f'newsbuster_stage_seconds_sum{{stage="{stage}"}} {h["sum"]}')
+            lines.append(f'newsbuster_stage_seconds_count{{stage="{stage}"}} {h["count"]}')
+        lines.append('# TYPE newsbuster_events_total counter')
+        for name, value in snapshot['counters'].items():
+            lines.append(f'newsbuster_events_total{{event="{name}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        """Drop all recorded metrics"""
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+# Process-wide registry used by the pipeline modules
+REGISTRY = MetricsRegistry()
+observe = REGISTRY.observe
+increment = REGISTRY.increment
+timer = REGISTRY.timer
+
+def log_sampled(logger: logging.Logger, event: str, rate: Optional[float] = None, **fields):
+    """
+    Log a hot-path event as one JSON line, for a random sample of calls.
+
+    Nothing is formatted unless the event is sampled and INFO is enabled.
+
+    Args:
+        logger: Logger to write to
+        event: Event name
+        rate: Sampling probability (defaults to LOG_SAMPLE_RATE)
+        **fields: Structured fields of the event
+    """
+    if random.random() >= (LOG_SAMPLE_RATE if rate is None else rate):
+        return
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps({'event': event, **fields}, default=str))
+
+class RequestProfiler:
+    """
+    Opt-in cProfile capture for single requests.
+
+    Only active when a profile directory is configured; each profiled
+    request writes one .prof file (load it with pstats or snakeviz).
+    Python 3.12+ allows one active profiler per process, so one request
+    is profiled at a time and the others run unprofiled.
+    """
+
+    def __init__(self, profile_dir: Optional[str] = PROFILE_DIR):
+        self.profile_dir = profile_dir
+        self._active = threading.Lock()
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.profile_dir)
+
+    def start(self) -> Optional[cProfile.Profile]:
+        """
+        Start profiling, unless another request is being profiled.
+
+        Returns:
+            The running profile, or None if profiling is busy
+        """
+        if not self._active.acquire(blocking=False):
+            increment('profile_skipped')
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another tool (e.g. a debugger or coverage) holds the profiler hook
+            self._active.release()
+            increment('profile_skipped')
+            return None
+        return profile
+
+    def path_for(self, name: str) -> str:
+        """Get a new .prof file path labelled with a name (e.g. the endpoint)"""
+        safe_name = ''.join(c if c.isalnum() else '_' for c in name).strip('_') or 'request'
+        return os.path.join(self.profile_dir, f"{safe_name}-{time.time_ns()}.prof")
+
+    def stop(self, profile: cProfile.Profile, path: str) -> str:
+        """
+        Stop a profile and save it.
+
+        Args:
+            profile: Profile returned by start()
+            path: File to write (see path_for())
+
+        Returns:
+            Path of the written .prof file
+        """
+        try:
+            profile.disable()
+            profile.dump_stats(path)
+        finally:
+            self._active.release()
+        return path
+
+    def wrap(self, body: Iterable[Any], profile: cProfile.Profile, path: str) -> "_ProfiledBody":
+        """
+        Keep a profile running while a streamed response body is produced.
+
+        Args:
+            body: Response iterable, produced after the view returns
+            profile: Profile returned by start()
+            path: File to write when the body is closed
+
+        Returns:
+            Iterable that stops the profile when the server closes it
+        """
+        return _ProfiledBody(body, lambda: self.stop(profile, path))
+
+class _ProfiledBody:
+    def __init__(self, body: Iterable[Any], stop: Callable[[], Any]):
+        self.body = body
+        self._stop = stop
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.body)
+
+    def close(self):
+        stop, self._stop = self._stop, None
+        try:
+            close = getattr(self.body, 'close', None)
+            if close is not None:
+                close()
+        finally:
+            if stop is not None:
+                stop()
@@ -0,0 +1,670 @@
+import hashlib
+import json
+import os
+import shutil
+import string
+import struct
+import threading
+import time
+import zlib
+import logging
+import numpy as np
+from typing import Dict, Any, Iterator, List, Optional, Sequence, Tuple
+from reputation import domain_of, normalize_domain
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DUPLICATE_INDEX_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "near_duplicates")
+
+NUM_PERM = 128
+# 16 bands of 8 rows: pairs above ~0.7 Jaccard similarity share a bucket
+LSH_BANDS = 16
+SHINGLE_SIZE = 5  # words
+MIN_SHINGLES = 20  # shorter bodies (paywalls, cookie walls) are not indexed
+DUPLICATE_THRESHOLD = 0.8  # estimated Jaccard similarity of a near-duplicate
+MAX_CANDIDATES = 2000
+COMPACT_THRESHOLD = 50000  # overlay entries merged into the sorted arrays at once
+# Articles a serving process keeps in its private overlay; later ones are
+# still matched and journaled, but only matchable after the next merge
+MAX_LIVE_OVERLAY = 50000
+# Seconds between checks for a newer saved index
+REFRESH_INTERVAL = 30.0
+# Seconds the merge job waits after rotating the journal, for appends in flight
+JOURNAL_SETTLE = 1.0
+# Journal record header: URL length in bytes
+_JOURNAL_HEADER = struct.Struct('<H')
+# Shingles and permutations hashed per vectorized MinHash step (bounds the
+# temporary matrix to 32 x 16384 uint32, 2 MB)
+_SHINGLE_CHUNK = 16384
+_PERM_BLOCK = 32
+
+# Punctuation becomes whitespace before splitting into words (about 5x
+# faster than a \w+ regex on article-sized text)
+_PUNCTUATION = str.maketrans({c: ' ' for c in string.punctuation + '\u2018\u2019\u201c\u201d\u2013\u2014\u2026'})
+_EMPTY = np.iinfo(np.uint32).max
+
+def _url_key(url: str) -> int:
+    """64-bit hash of a normalized URL"""
+    return int.from_bytes(hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest(), 'little')
+
+def journal_path(path: str) -> str:
+    """Journal of the articles serving processes added to the index saved at path"""
+    return f"{path.rstrip(os.sep)}.journal"
+
+def append_journal(path: str, urls: Sequence[str], signatures: Sequence[np.ndarray]) -> None:
+    """
+    Append added articles to a journal.
+
+    The file is opened per call in append mode and written with one
+    write(), so records from concurrent processes do not interleave and a
+    journal rotated by the merge job is not written to afterwards.
+    """
+    records = []
+    for url, signature in zip(urls, signatures):
+        encoded = url.encode('utf-8')
+        records.append(_JOURNAL_HEADER.pack(len(encoded)) + encoded + np.ascontiguousarray(signature).tobytes())
+    if not records:
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, b''.join(records))
+    finally:
+        os.close(fd)
+
+def read_journal(path: str, num_perm: int = NUM_PERM) -> Iterator[Tuple[str, np.ndarray]]:
+    """
+    Read the (url, signature) records of a journal.
+
+    A record cut short (a writer killed mid-append) ends the journal.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb') as f:
+        data = f.read()
+    size = num_perm * 4
+    pos = 0
+    while pos + _JOURNAL_HEADER.size <= len(data):
+        (length,) = _JOURNAL_HEADER.unpack_from(data, pos)
+        end = pos + _JOURNAL_HEADER.size + length + size
+        if end > len(data):
+            break
+        url = data[pos + _JOURNAL_HEADER.size:end - size].decode('utf-8')
+        yield url, np.frombuffer(data, dtype=np.uint32, count=num_perm, offset=end - size).copy()
+        pos = end
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> np.ndarray:
+    """
+    Hash the overlapping word n-grams of a text.
+
+    Args:
+        text: Article body
+        size: Words per shingle
+
+    Returns:
+        uint32 array of shingle hashes (may contain repeats)
+    """
+    tokens = text.casefold().translate(_PUNCTUATION).split()
+    if not tokens:
+        return np.zeros(0, dtype=np.uint32)
+    hashes = np.fromiter(map(zlib.crc32, map(str.encode, tokens)), dtype=np.uint32,
+                         count=len(tokens)).astype(np.uint64)
+    if len(hashes) < size:
+        size = len(hashes)
+    n = len(hashes) - size + 1
+    combined = np.zeros(n, dtype=np.uint64)
+    for offset in range(size):
+        # Polynomial combine; uint64 arithmetic wraps around
+        combined = combined * np.uint64(0x100000001B3) + hashes[offset:offset + n]
+    return (combined ^ (combined >> np.uint64(32))).astype(np.uint32)
+
+class MinHasher:
+    """
+    MinHash signatures computed in NumPy batches.
+
+    Each of the num_perm permutations is x -> a * x + b (mod 2**32) with
+    odd a, a bijection of the 32-bit shingle hashes. Staying in uint32
+    keeps the (num_perm, shingles) matrix small and several times faster
+    to build than 64-bit multiply-shift hashing.
+    """
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self._a = rng.integers(1, 2 ** 32, size=num_perm, dtype=np.uint32) | np.uint32(1)
+        self._b = rng.integers(0, 2 ** 32, size=num_perm, dtype=np.uint32)
+
+    def signatures(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Compute MinHash signatures for many texts.
+
+        Args:
+            texts: Article bodies
+
+        Returns:
+            (len(texts), num_perm) uint32 array; texts with fewer than
+            MIN_SHINGLES shingles get an all-0xFFFFFFFF signature
+        """
+        result = np.full((len(texts), self.num_perm), _EMPTY, dtype=np.uint32)
+        group: List[Tuple[int, np.ndarray]] = []
+        pending = 0
+        for i, text in enumerate(texts):
+            # Repeated shingles do not change the minimum; no need to dedupe
+            values = shingles(text or '')
+            if len(values) < MIN_SHINGLES:
+                continue
+            group.append((i, values))
+            pending += len(values)
+            if pending >= _SHINGLE_CHUNK:
+                self._fill(result, group)
+                group, pending = [], 0
+        if group:
+            self._fill(result, group)
+        return result
+
+    def _fill(self, result: np.ndarray, group: List[Tuple[int, np.ndarray]]):
+        values = np.concatenate([v for _, v in group])
+        offsets = np.cumsum([0] + [len(v) for _, v in group[:-1]])
+        rows = [i for i, _ in group]
+        hashed = np.empty((_PERM_BLOCK, len(values)), dtype=np.uint32)
+        for start in range(0, self.num_perm, _PERM_BLOCK):
+            a = self._a[start:start + _PERM_BLOCK]
+            block = hashed[:len(a)]
+            # uint32 arithmetic wraps mod 2**32
+            np.multiply.outer(a, values, out=block)
+            block += self._b[start:start + _PERM_BLOCK, None]
+            result[rows, start:start + len(a)] = np.minimum.reduceat(block, offsets, axis=1).T
+
+def band_keys(signatures: np.ndarray, bands: int = LSH_BANDS) -> np.ndarray:
+    """
+    Hash each band of each signature into one 64-bit bucket key.
+
+    Args:
+        signatures: (n, num_perm) uint32 signatures
+        bands: Number of LSH bands
+
+    Returns:
+        (n, bands) uint64 bucket keys
+    """
+    n, num_perm = signatures.shape
+    rows = num_perm // bands
+    banded = signatures[:, :bands * rows].reshape(n, bands, rows).astype(np.uint64)
+    keys = np.zeros((n, bands), dtype=np.uint64)
+    for r in range(rows):
+        keys = keys * np.uint64(0x9E3779B97F4A7C15) + banded[:, :, r]
+    return keys
+
+class NearDuplicateIndex:
+    """
+    MinHash/LSH index of article bodies.
+
+    The built part is a set of NumPy arrays (signatures, per-band bucket
+    keys sorted with their document ids, URLs) that are saved to a
+    directory and memory-mapped by every worker; a lookup is one binary
+    search per band. Articles added since are kept in a small overlay of
+    per-band dicts and merged into the arrays in bulk by compact().
+
+    A serving index (open()) never compacts: that would copy the shared
+    arrays into each worker's private memory and stall its queries. It
+    appends what it adds to a journal next to the saved index instead;
+    merge_journal(), run as an offline job, folds the journal into a new
+    saved index, and serving indexes switch to it from a background
+    thread (start_refresher()), keeping only the overlay entries the merge
+    did not include.
+    """
+
+    def __init__(self, num_perm: int = NUM_PERM, bands: int = LSH_BANDS, seed: int = 1,
+                 threshold: float = DUPLICATE_THRESHOLD):
+        self.hasher = MinHasher(num_perm, seed)
+        self.bands = bands
+        self.seed = seed
+        self.threshold = threshold
+        # Saved index this one serves and follows (see open())
+        self.path: Optional[str] = None
+        self.journal: Optional[str] = None
+        self.generation = 0
+        self._refresher_pid: Optional[int] = None
+        self._overlay_full = False
+        self._lock = threading.Lock()
+        # Built part
+        self._signatures = np.zeros((0, num_perm), dtype=np.uint32)
+        self._band_keys = np.zeros((bands, 0), dtype=np.uint64)
+        self._band_ids = np.zeros((bands, 0), dtype=np.uint32)
+        self._url_keys = np.zeros(0, dtype=np.uint64)
+        self._url_key_ids = np.zeros(0, dtype=np.uint32)
+        self._url_offsets = np.zeros(1, dtype=np.uint64)
+        self._url_bytes = np.zeros(0, dtype=np.uint8)
+        # Overlay of articles added since the last compaction
+        self._new_signatures: List[np.ndarray] = []
+        self._new_urls: List[str] = []
+        self._new_url_ids: Dict[str, int] = {}
+        self._new_buckets: List[Dict[int, List[int]]] = [{} for _ in range(bands)]
+
+    def __len__(self) -> int:
+        return len(self._signatures) + len(self._new_urls)
+
+    def url(self, doc_id: int) -> str:
+        """Get the URL of a document id"""
+        base = len(self._signatures)
+        if doc_id >= base:
+            return self._new_urls[doc_id - base]
+        start, end = int(self._url_offsets[doc_id]), int(self._url_offsets[doc_id + 1])
+        return bytes(self._url_bytes[start:end]).decode('utf-8')
+
+    def _doc_id(self, url: str) -> Optional[int]:
+        doc_id = self._new_url_ids.get(url)
+        if doc_id is not None:
+            return doc_id
+        key = np.uint64(_url_key(url))
+        lo = int(np.searchsorted(self._url_keys, key, 'left'))
+        hi = int(np.searchsorted(self._url_keys, key, 'right'))
+        for candidate in self._url_key_ids[lo:hi]:
+            if self.url(int(candidate)) == url:
+                return int(candidate)
+        return None
+
+    def _signature(self, doc_id: int) -> np.ndarray:
+        base = len(self._signatures)
+        return self._new_signatures[doc_id - base] if doc_id >= base else self._signatures[doc_id]
+
+    def _query(self, signature: np.ndarray, keys: np.ndarray) -> List[Tuple[int, float]]:
+        candidates = []
+        if len(self._signatures):
+            for band, key in enumerate(keys):
+                sorted_keys = self._band_keys[band]
+                lo = sorted_keys.searchsorted(key, 'left')
+                hi = sorted_keys.searchsorted(key, 'right')
+                if hi > lo:
+                    candidates.append(self._band_ids[band][lo:hi])
+        overlay = set()
+        for band, key in enumerate(keys.tolist()):
+            overlay.update(self._new_buckets[band].get(key, ()))
+        if overlay:
+            candidates.append(np.fromiter(overlay, dtype=np.uint32, count=len(overlay)))
+        if not candidates:
+            return []
+        ids = np.unique(np.concatenate(candidates))[:MAX_CANDIDATES]
+        base = len(self._signatures)
+        old, new = ids[ids < base], ids[ids >= base]
+        rows = [self._signatures[old]] if len(old) else []
+        rows += [self._new_signatures[i - base][None, :] for i in new.tolist()]
+        similarity = (np.concatenate(rows) == signature).mean(axis=1)
+        ids = np.concatenate([old, new])
+        keep = similarity >= self.threshold
+        return sorted(zip(ids[keep].tolist(), similarity[keep].round(3).tolist()), key=lambda m: -m[1])
+
+    def query(self, text: str) -> List[Tuple[str, float]]:
+        """
+        Find indexed articles whose body is a near-duplicate of a text.
+
+        Args:
+            text: Article body
+
+        Returns:
+            List of (url, estimated Jaccard similarity), most similar first
+        """
+        signature = self.hasher.signatures([text])
+        if signature[0, 0] == _EMPTY:
+            return []
+        with self._lock:
+            matches = self._query(signature[0], band_keys(signature, self.bands)[0])
+            return [(self.url(doc_id), similarity) for doc_id, similarity in matches]
+
+    def match_and_add(self, url: str, text: str) -> List[Tuple[str, float]]:
+        """
+        Find the near-duplicates of an article, then add it to the index.
+
+        Args:
+            url: Normalized article URL
+            text: Article body
+
+        Returns:
+            List of (url, estimated Jaccard similarity) of other articles,
+            most similar first (empty for short bodies)
+        """
+        return self.add_batch([url], [text])[0]
+
+    def add_batch(self, urls: Sequence[str], texts: Sequence[str]) -> List[List[Tuple[str, float]]]:
+        """
+        Match and add many articles; signatures are computed in one batch.
+
+        Added articles go to the overlay (and the journal of a serving
+        index); call compact() to merge them into the arrays.
+
+        Args:
+            urls: Normalized article URLs
+            texts: Article bodies
+
+        Returns:
+            Near-duplicates of each article (see match_and_add), in order
+        """
+        signatures = self.hasher.signatures(texts)
+        keys = band_keys(signatures, self.bands)
+        results = []
+        journaled_urls, journaled = [], []
+        with self._lock:
+            for url, signature, key in zip(urls, signatures, keys):
+                if signature[0] == _EMPTY:
+                    results.append([])
+                    continue
+                doc_id = self._doc_id(url)
+                matches = [(self.url(i), s) for i, s in self._query(signature, key) if i != doc_id]
+                results.append(matches)
+                if doc_id is not None:
+                    continue
+                if self.journal is None:
+                    self._add(url, signature, key)
+                    continue
+                journaled_urls.append(url)
+                journaled.append(signature)
+                if len(self._new_urls) < MAX_LIVE_OVERLAY:
+                    self._add(url, signature, key)
+                elif not self._overlay_full:
+                    self._overlay_full = True
+                    logger.warning(f"Near-duplicate overlay full ({MAX_LIVE_OVERLAY} articles); "
+                                   f"run 'python near_duplicates.py --merge' to fold in {self.journal}")
+            if journaled:
+                append_journal(self.journal, journaled_urls, journaled)
+        return results
+
+    def _add(self, url: str, signature: np.ndarray, keys: np.ndarray):
+        doc_id = len(self)
+        self._new_signatures.append(signature)
+        self._new_urls.append(url)
+        self._new_url_ids[url] = doc_id
+        for band in range(self.bands):
+            self._new_buckets[band].setdefault(int(keys[band]), []).append(doc_id)
+
+    def compact(self):
+        """Merge the overlay into the sorted arrays"""
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        if not self._new_urls:
+            return
+        base = len(self._signatures)
+        new_signatures = np.stack(self._new_signatures)
+        new_ids = np.arange(base, base + len(new_signatures), dtype=np.uint32)
+        new_keys = band_keys(new_signatures, self.bands)
+
+        band_keys_merged = []
+        band_ids_merged = []
+        for band in range(self.bands):
+            order = np.argsort(new_keys[:, band], kind='stable')
+            keys, ids = new_keys[order, band], new_ids[order]
+            # Linear merge into the sorted arrays (np.insert at search positions)
+            positions = np.searchsorted(self._band_keys[band], keys, 'right')
+            band_keys_merged.append(np.insert(self._band_keys[band], positions, keys))
+            band_ids_merged.append(np.insert(self._band_ids[band], positions, ids))
+
+        url_keys = np.fromiter((_url_key(u) for u in self._new_urls), dtype=np.uint64, count=len(new_ids))
+        order = np.argsort(url_keys, kind='stable')
+        positions = np.searchsorted(self._url_keys, url_keys[order], 'right')
+        encoded = [u.encode('utf-8') for u in self._new_urls]
+        lengths = np.fromiter((len(e) for e in encoded), dtype=np.uint64, count=len(encoded))
+
+        self._url_keys = np.insert(self._url_keys, positions, url_keys[order])
+        self._url_key_ids = np.insert(self._url_key_ids, positions, new_ids[order])
+        self._url_offsets = np.concatenate([self._url_offsets, self._url_offsets[-1] + np.cumsum(lengths)])
+        self._url_bytes = np.concatenate([self._url_bytes, np.frombuffer(b''.join(encoded), dtype=np.uint8)])
+        self._signatures = np.concatenate([self._signatures, new_signatures])
+        self._band_keys = np.stack(band_keys_merged)
+        self._band_ids = np.stack(band_ids_merged)
+        self._new_signatures, self._new_urls, self._new_url_ids = [], [], {}
+        self._new_buckets = [{} for _ in range(self.bands)]
+
+    def refresh(self) -> bool:
+        """
+        Switch to the saved index if the merge job has written a new one.
+
+        The new generation is mapped and the overlay checked against it
+        without holding the lock; queries and additions only wait for the
+        swap itself. Serving indexes call this from a background thread
+        (see start_refresher()).
+
+        Returns:
+            True if a new generation was loaded
+        """
+        try:
+            with open(os.path.join(self.path, 'meta.json'), 'r', encoding='utf-8') as f:
+                generation = json.load(f).get('generation', 0)
+            if generation == self.generation:
+                return False
+            saved = NearDuplicateIndex.load(self.path)
+        except (OSError, ValueError) as e:
+            # Missing while the merge job swaps directories; try again later
+            logger.debug(f"Near-duplicate index not refreshed: {str(e)}")
+            return False
+
+        # Keep the overlay entries the merge has not folded in yet. The
+        # overlay lists are only appended to until they are replaced, so a
+        # snapshot of their length can be checked outside the lock
+        with self._lock:
+            urls, signatures, checked = self._new_urls, self._new_signatures, len(self._new_urls)
+        pending = [(urls[i], signatures[i]) for i in range(checked) if saved._doc_id(urls[i]) is None]
+        keys = band_keys(np.stack([signature for _, signature in pending]), self.bands) if pending else []
+
+        with self._lock:
+            if self._new_urls is urls:
+                late = list(zip(urls[checked:], signatures[checked:]))
+            else:
+                # Compacted meanwhile: check the whole current overlay
+                pending, keys = [], []
+                late = list(zip(self._new_urls, self._new_signatures))
+            for name in self._ARRAYS:
+                setattr(self, f"_{name}", getattr(saved, f"_{name}"))
+            self.generation = saved.generation
+            self._new_signatures, self._new_urls, self._new_url_ids = [], [], {}
+            self._new_buckets = [{} for _ in range(self.bands)]
+            self._overlay_full = False
+            for (url, signature), key in zip(pending, keys):
+                self._add(url, signature, key)
+            self._add_signatures(late)
+        logger.info(f"Near-duplicate index generation {self.generation} loaded, "
+                    f"{len(pending) + len(late)} articles pending")
+        return True
+
+    def start_refresher(self, interval: float = REFRESH_INTERVAL) -> None:
+        """
+        Follow the saved index with refresh() from a background thread.
+
+        One thread per process: forked workers start their own on first use.
+
+        Args:
+            interval: Seconds between checks for a new generation
+        """
+        if self.path is None or self._refresher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._refresher_pid == os.getpid():
+                return
+            self._refresher_pid = os.getpid()
+        threading.Thread(target=self._follow, args=(interval,), name="near-duplicate-refresh", daemon=True).start()
+
+    def _follow(self, interval: float):
+        while True:
+            time.sleep(interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Near-duplicate index refresh failed: {str(e)}")
+
+    def _add_signatures(self, entries: Sequence[Tuple[str, np.ndarray]]):
+        """Add (url, signature) pairs not indexed yet to the overlay"""
+        if not entries:
+            return
+        keys = band_keys(np.stack([signature for _, signature in entries]), self.bands)
+        for (url, signature), key in zip(entries, keys):
+            if self._doc_id(url) is None:
+                self._add(url, signature, key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get document counts, the saved generation and memory footprint"""
+        arrays = (self._signatures, self._band_keys, self._band_ids, self._url_keys,
+                  self._url_key_ids, self._url_offsets, self._url_bytes)
+        return {
+            'articles': len(self),
+            'overlay_articles': len(self._new_urls),
+            'bands': self.bands,
+            'threshold': self.threshold,
+            'generation': self.generation,
+            'memory_bytes': int(sum(a.nbytes for a in arrays))
+        }
+
+    _ARRAYS = ('signatures', 'band_keys', 'band_ids', 'url_keys', 'url_key_ids', 'url_offsets', 'url_bytes')
+
+    def save(self, path: str) -> None:
+        """
+        Compact and write the index to a directory of .npy files.
+
+        The files are written to a new directory that then replaces path,
+        so processes still mapping the old files are not disturbed.
+        """
+        self.compact()
+        path = path.rstrip(os.sep)
+        staging = f"{path}.tmp-{os.getpid()}"
+        os.makedirs(staging, exist_ok=True)
+        for name in self._ARRAYS:
+            np.save(os.path.join(staging, f"{name}.npy"), getattr(self, f"_{name}"))
+        self.generation = time.time_ns()
+        with open(os.path.join(staging, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'num_perm': self.hasher.num_perm, 'bands': self.bands, 'seed': self.seed,
+                       'threshold': self.threshold, 'generation': self.generation}, f)
+        if os.path.exists(path):
+            retired = f"{path}.old-{os.getpid()}"
+            os.rename(path, retired)
+            os.rename(staging, path)
+            shutil.rmtree(retired)
+        else:
+            os.rename(staging, path)
+
+    @classmethod
+    def load(cls, path: str) -> "NearDuplicateIndex":
+        """Memory-map an index written by save()"""
+        with open(os.path.join(path, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        index = cls(meta['num_perm'], meta['bands'], meta['seed'], meta['threshold'])
+        for name in cls._ARRAYS:
+            setattr(index, f"_{name}", np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r'))
+        index.generation = meta.get('generation', 0)
+        return index
+
+    @classmethod
+    def open(cls, path: str) -> "NearDuplicateIndex":
+        """
+        Open the index saved at path for serving.
+
+        Memory-maps the saved index (or starts empty), replays the journal
+        articles it does not include yet, and journals what is added.
+        """
+        if os.path.exists(os.path.join(path, 'meta.json')):
+            index = cls.load(path)
+        else:
+            index = cls()
+        index.path = path
+        index.journal = journal_path(path)
+        entries = []
+        for url, signature in read_journal(index.journal, index.hasher.num_perm):
+            if len(entries) >= MAX_LIVE_OVERLAY:
+                break
+            entries.append((url, signature))
+        index._add_signatures(entries)
+        return index
+
+def merge_journal(path: str) -> int:
+    """
+    Fold the serving processes' journal into the index saved at path.
+
+    Meant to run as a periodic offline job: the journal is rotated, the
+    saved index is loaded, compacted with the journaled articles and
+    saved as a new generation that serving indexes pick up on refresh().
+
+    Args:
+        path: Directory of the saved index
+
+    Returns:
+        Number of articles added
+    """
+    journal = journal_path(path)
+    merging = f"{journal}.merging"
+    # A rotated journal left by an interrupted merge is merged first
+    if not os.path.exists(merging):
+        if not os.path.exists(journal):
+            return 0
+        os.rename(journal, merging)
+        time.sleep(JOURNAL_SETTLE)
+    if os.path.exists(os.path.join(path, 'meta.json')):
+        index = NearDuplicateIndex.load(path)
+    else:
+        index = NearDuplicateIndex()
+    before = len(index)
+    entries = list(read_journal(merging, index.hasher.num_perm))
+    for start in range(0, len(entries), COMPACT_THRESHOLD):
+        index._add_signatures(entries[start:start + COMPACT_THRESHOLD])
+        index.compact()
+    index.save(path)
+    os.remove(merging)
+    return len(index) - before
+
+def other_domains(matches: Sequence[Tuple[str, float]], domain: str) -> int:
+    """Count the distinct domains, other than the article's own, among its near-duplicates"""
+    own = normalize_domain(domain)
+    return len({domain_of(url) for url, _ in matches} - {own})
+
+_index: Optional[NearDuplicateIndex] = None
+_index_lock = threading.Lock()
+
+def get_duplicate_index() -> NearDuplicateIndex:
+    """Get the process-wide index, memory-mapping the saved one if present"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = NearDuplicateIndex.open(DUPLICATE_INDEX_PATH)
+                logger.info(f"Near-duplicate index opened: {_index.stats()}")
+    _index.start_refresher()
+    return _index
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the near-duplicate index from a JSONL file of {url, text}")
+    parser.add_argument('articles', nargs='?', help="JSONL file with 'url' and 'text' per line")
+    parser.add_argument('--out', default=DUPLICATE_INDEX_PATH)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--merge', action='store_true',
+                        help="Fold the serving processes' journal into the index at --out (run periodically)")
+    args = parser.parse_args()
+
+    if args.merge:
+        start = time.perf_counter()
+        added = merge_journal(args.out)
+        print(f"Merged {added} journaled articles in {time.perf_counter() - start:.1f}s -> {args.out}")
+        raise SystemExit(0)
+    if not args.articles:
+        parser.error("articles is required unless --merge is given")
+
+    from cache import normalize_url
+    index = NearDuplicateIndex()
+    start = time.perf_counter()
+    clustered = 0
+    with open(args.articles, 'r', encoding='utf-8') as f:
+        batch = []
+        for line in f:
+            if line.strip():
+                batch.append(json.loads(line))
+            if len(batch) >= args.batch_size:
+                results = index.add_batch([normalize_url(a['url']) for a in batch], [a.get('text') or '' for a in batch])
+                clustered += sum(1 for r in results if r)
+                batch = []
+                if index.stats()['overlay_articles'] >= COMPACT_THRESHOLD:
+                    index.compact()
+        if batch:
+            results = index.add_batch([normalize_url(a['url']) for a in batch], [a.get('text') or '' for a in batch])
+            clustered += sum(1 for r in results if r)
+    index.save(args.out)
+    print(f"Indexed {len(index)} articles ({clustered} with near-duplicates) "
+          f"in {time.perf_counter() - start:.1f}s -> {args.out}")
@@ -0,0 +1,329 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import logging
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+REPUTATION_INDEX_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "domain_reputation.npy")
+
+# Reputation = QUALITY_WEIGHT * mean article score + RANK_WEIGHT * normalized PageRank
+QUALITY_WEIGHT = 0.7
+RANK_WEIGHT = 0.3
+# Mean article scores are smoothed toward a neutral prior worth
+# PRIOR_ARTICLES articles, so one article cannot swing a domain
+PRIOR_SCORE = 0.5
+PRIOR_ARTICLES = 3
+
+_ENTRY_DTYPE = np.dtype([('key', '<u8'), ('articles', '<u4'), ('quality', '<f4'), ('rank', '<f4')])
+
+def normalize_domain(domain: str) -> str:
+    """Lowercase a domain and drop the port and a leading 'www.'"""
+    domain = domain.strip().lower().split(':')[0]
+    return domain[4:] if domain.startswith('www.') else domain
+
+def domain_of(url: str) -> str:
+    """Get the normalized domain of a URL"""
+    # Plain string splitting; urlparse dominates index build time
+    scheme, sep, rest = url.partition('://')
+    if not sep:
+        return normalize_domain(urlparse(url).netloc)
+    netloc = rest.split('/', 1)[0].split('?', 1)[0].split('#', 1)[0]
+    return normalize_domain(netloc.rpartition('@')[2])
+
+# Second-level labels under which country-code domains are registered (bbc.co.uk)
+_SECOND_LEVEL_LABELS = {'ac', 'co', 'com', 'edu', 'gov', 'net', 'org'}
+
+def registrable_domain(domain: str) -> str:
+    """
+    Get the domain a normalized host is registered under (news.bbc.co.uk
+    -> bbc.co.uk), approximating the public suffix list with the common
+    second-level labels of country-code domains.
+    """
+    labels = domain.split('.')
+    if len(labels) > 2 and len(labels[-1]) == 2 and labels[-2] in _SECOND_LEVEL_LABELS:
+        return '.'.join(labels[-3:])
+    if labels[-1].isdigit():
+        # IPv4 address
+        return domain
+    return '.'.join(labels[-2:])
+
+def _domain_key(domain: str) -> int:
+    """64-bit hash of a normalized domain (0 marks an empty slot)"""
+    key = int.from_bytes(hashlib.blake2b(domain.encode('utf-8'), digest_size=8).digest(), 'little')
+    return key or 1
+
+def domain_pagerank(domains: List[str], edges: Iterable[Tuple[str, str]],
+                    quality: np.ndarray, damping: float = 0.85,
+                    iterations: int = 30) -> np.ndarray:
+    """
+    PageRank over the domain reference graph, teleporting by article quality.
+
+    Args:
+        domains: Domain names, one per node
+        edges: (source domain, target domain) pairs from REFERENCES edges
+        quality: Mean article score per domain, used as the teleport vector
+        damping: Probability of following a reference instead of teleporting
+        iterations: Power-iteration steps
+
+    Returns:
+        Rank per domain, summing to 1
+    """
+    n = len(domains)
+    if n == 0:
+        return np.zeros(0)
+    position = {domain: i for i, domain in enumerate(domains)}
+    src, dst = [], []
+    for source, target in edges:
+        if source != target and source in position and target in position:
+            src.append(position[source])
+            dst.append(position[target])
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+
+    out_weight = np.bincount(src, minlength=n).astype(float)
+    teleport = quality / quality.sum() if quality.sum() > 0 else np.full(n, 1.0 / n)
+    dangling = out_weight == 0
+    rank = np.full(n, 1.0 / n)
+    for _ in range(iterations):
+        flow = np.zeros(n)
+        if len(src):
+            np.add.at(flow, dst, rank[src] / out_weight[src])
+        flow += rank[dangling].sum() * teleport
+        rank = damping * flow + (1 - damping) * teleport
+    return rank / rank.sum()
+
+class DomainReputationIndex:
+    """
+    Open-addressing hash table of domain -> reputation (0-100).
+
+    Stored as one NumPy array of (64-bit key, article count, mean article
+    score, normalized rank) slots, so it can be saved and memory-mapped
+    read-only by every worker. Articles ingested since the last build are
+    folded into a small per-domain overlay of (count, score sum).
+    """
+
+    def __init__(self, table: Optional[np.ndarray] = None, build_seconds: float = 0.0,
+                 max_tracked_urls: int = 100000):
+        if table is None:
+            table = np.zeros(8, dtype=_ENTRY_DTYPE)
+        self._table = table
+        self._keys = table['key']
+        self._mask = len(table) - 1
+        self.build_seconds = build_seconds
+        self._lock = threading.Lock()
+        # Incremental updates: domain -> [article count, score sum]
+        self._overlay: Dict[str, List[float]] = {}
+        self._seen_urls: "OrderedDict[str, None]" = OrderedDict()
+        self._max_tracked_urls = max_tracked_urls
+
+    @classmethod
+    def build(cls, article_scores: Dict[str, float],
+              references: Iterable[Tuple[str, str]]) -> "DomainReputationIndex":
+        """
+        Build the index from stored articles and their references.
+
+        Args:
+            article_scores: Article URL -> credibility score (0-1)
+            references: (source URL, target URL) pairs of REFERENCES edges
+
+        Returns:
+            A new DomainReputationIndex
+        """
+        start = time.perf_counter()
+        totals: Dict[str, List[float]] = {}
+        for url, score in article_scores.items():
+            entry = totals.setdefault(domain_of(url), [0, 0.0])
+            entry[0] += 1
+            entry[1] += score
+        domains = list(totals)
+        quality = np.array([totals[d][1] / totals[d][0] for d in domains])
+        rank = domain_pagerank(domains, ((domain_of(s), domain_of(t)) for s, t in references), quality)
+        if len(rank) and rank.max() > 0:
+            rank = rank / rank.max()
+
+        size = 8
+        while size < 2 * len(domains):
+            size *= 2
+        table = np.zeros(size, dtype=_ENTRY_DTYPE)
+        mask = size - 1
+        for i, domain in enumerate(domains):
+            key = _domain_key(domain)
+            slot = key & mask
+            while int(table['key'][slot]) not in (0, key):
+                slot = (slot + 1) & mask
+            table[slot] = (key, totals[domain][0], quality[i], rank[i])
+        return cls(table, build_seconds=time.perf_counter() - start)
+
+    def _slot(self, domain: str) -> Optional[int]:
+        key = _domain_key(domain)
+        slot = key & self._mask
+        while True:
+            found = int(self._keys[slot])
+            if found == key:
+                return slot
+            if found == 0:
+                return None
+            slot = (slot + 1) & self._mask
+
+    def lookup(self, domain: str) -> Optional[float]:
+        """
+        Get a domain's reputation.
+
+        Domains seen only since the last build have no rank yet and are
+        scored on their (smoothed) article quality alone.
+
+        Args:
+            domain: Domain (e.g. 'www.bbc.com')
+
+        Returns:
+            Reputation between 0 and 100, or None for unknown domains
+        """
+        domain = normalize_domain(domain)
+        slot = self._slot(domain)
+        overlay = self._overlay.get(domain)
+        if overlay is not None:
+            count, total = overlay
+        elif slot is not None:
+            count = int(self._table['articles'][slot])
+            total = count * float(self._table['quality'][slot])
+        else:
+            return None
+        quality = (total + PRIOR_ARTICLES * PRIOR_SCORE) / (count + PRIOR_ARTICLES)
+        if slot is None:
+            return round(100 * quality, 1)
+        rank = float(self._table['rank'][slot])
+        return round(100 * (QUALITY_WEIGHT * quality + RANK_WEIGHT * rank), 1)
+
+    def update(self, url: str, article_score: float) -> None:
+        """
+        Fold a newly ingested article into its domain's reputation.
+
+        Args:
+            url: Normalized article URL (repeat URLs are counted once)
+            article_score: Credibility score of the article (0-1)
+        """
+        with self._lock:
+            if url in self._seen_urls:
+                return
+            self._seen_urls[url] = None
+            if len(self._seen_urls) > self._max_tracked_urls:
+                self._seen_urls.popitem(last=False)
+            domain = domain_of(url)
+            entry = self._overlay.get(domain)
+            if entry is None:
+                # Start from the built totals so one article does not replace them
+                slot = self._slot(domain)
+                if slot is not None:
+                    count = int(self._table['articles'][slot])
+                    entry = [count, count * float(self._table['quality'][slot])]
+                else:
+                    entry = [0, 0.0]
+            self._overlay[domain] = [entry[0] + 1, entry[1] + article_score]
+
+    def stats(self) -> Dict[str, Any]:
+        """Get size, build time and memory footprint of the index"""
+        return {
+            'domains': int(np.count_nonzero(self._keys)),
+            'slots': len(self._table),
+            'overlay_domains': len(self._overlay),
+            'build_seconds': round(self.build_seconds, 3),
+            'memory_bytes': int(self._table.nbytes)
+        }
+
+    def save(self, path: str) -> None:
+        """Write the table to a .npy file, and its build time to a .meta.json file next to it"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        np.save(path, self._table)
+        with open(_meta_path(path), 'w', encoding='utf-8') as f:
+            json.dump({'build_seconds': self.build_seconds}, f)
+
+    @classmethod
+    def load(cls, path: str) -> "DomainReputationIndex":
+        """Memory-map a table written by save()"""
+        try:
+            with open(_meta_path(path), 'r', encoding='utf-8') as f:
+                build_seconds = json.load(f).get('build_seconds', 0.0)
+        except (OSError, ValueError):
+            # Tables saved before the metadata file existed
+            build_seconds = 0.0
+        return cls(np.load(path, mmap_mode='r'), build_seconds=build_seconds)
+
+def _meta_path(path: str) -> str:
+    """Metadata file of a table saved at path (np.save adds .npy when missing)"""
+    base = path[:-len('.npy')] if path.endswith('.npy') else path
+    return f"{base}.meta.json"
+
+def fetch_graph_data(db) -> Tuple[Dict[str, float], List[Tuple[str, str]]]:
+    """
+    Read article scores and REFERENCES edges from the graph.
+
+    Args:
+        db: Connected GraphDB
+
+    Returns:
+        Tuple of (article URL -> score, list of (source URL, target URL))
+    """
+    from scoring import score_batch
+
+    with db.driver.session() as session:
+        # Skip stub nodes created only as reference targets
+        rows = session.run("""
+            MATCH (a:Article)
+            WHERE a.text_length IS NOT NULL OR a.text IS NOT NULL
+            RETURN a.url as url, a.author as author, a.date as date,
+                   coalesce(a.text_length, size(a.text), 0) as text_length,
+                   COUNT { (a)-[:REFERENCES]->(:Article) } as referenceCount
+        """).data()
+        references = [
+            (record['source'], record['target'])
+            for record in session.run("""
+                MATCH (a:Article)-[:REFERENCES]->(b:Article)
+                RETURN a.url as source, b.url as target
+            """)
+        ]
+    scores = score_batch(rows, [row['referenceCount'] for row in rows],
+                         [row['text_length'] for row in rows])
+    return {row['url']: float(score) for row, score in zip(rows, scores)}, references
+
+_index: Optional[DomainReputationIndex] = None
+_index_lock = threading.Lock()
+
+def get_reputation_index() -> DomainReputationIndex:
+    """Get the process-wide index, memory-mapping the built file if present"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                if os.path.exists(REPUTATION_INDEX_PATH):
+                    _index = DomainReputationIndex.load(REPUTATION_INDEX_PATH)
+                    logger.info(f"Domain reputation index loaded: {_index.stats()}")
+                else:
+                    _index = DomainReputationIndex()
+                    logger.info("No domain reputation index found, starting empty")
+    return _index
+
+if __name__ == "__main__":
+    import argparse
+    from graph import GraphDB
+
+    parser = argparse.ArgumentParser(description="Build the domain reputation index from Neo4j")
+    parser.add_argument('--out', default=REPUTATION_INDEX_PATH)
+    args = parser.parse_args()
+
+    db = GraphDB().connect()
+    try:
+        article_scores, references = fetch_graph_data(db)
+    finally:
+        db.close()
+    index = DomainReputationIndex.build(article_scores, references)
+    index.save(args.out)
+    print(f"Wrote {args.out}: {index.stats()}")
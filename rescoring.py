@@ -0,0 +1,247 @@
+import threading
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, Any, Iterable, List, Optional, Set
+from cache import ResponseCache, get_cache
+from host_scheduler import TokenBucket
+from metrics import increment, timer
+from trusted_authors import TrustedAuthors, normalize_name
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Background rescoring budget: articles per second and per batch
+RESCORE_RATE = 100.0
+RESCORE_BATCH_SIZE = 200
+# Seconds between polls of the registry change feed
+POLL_INTERVAL = 2.0
+MAX_TRACKED_ARTICLES = 100000
+
+def article_keys(url: str, author: str, author_id: Optional[str]) -> List[str]:
+    """
+    Dependency keys of a scored article.
+
+    Args:
+        url: Article URL
+        author: Byline as extracted
+        author_id: Trusted author the byline matched, if any
+
+    Returns:
+        'author:<author_id>' and one 'token:<word>' per byline word (a newly
+        trusted name can only match bylines containing all of its words)
+    """
+    keys = []
+    if author_id is not None:
+        keys.append(f"author:{author_id}")
+    keys.extend(f"token:{token}" for token in sorted(set(normalize_name(author or '').split())))
+    return keys
+
+class DependencyIndex:
+    """
+    Reverse index from dependency keys (author, byline words) to
+    the articles whose results were computed with them.
+
+    Bounded: the least recently recorded articles are forgotten first.
+    """
+
+    def __init__(self, max_articles: int = MAX_TRACKED_ARTICLES):
+        self.max_articles = max_articles
+        self._articles: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._by_key: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._articles)
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._articles
+
+    def record(self, url: str, keys: Iterable[str]):
+        """Set the dependency keys of an article (replacing earlier ones)"""
+        keys = list(keys)
+        with self._lock:
+            self._unlink(url)
+            self._articles[url] = keys
+            for key in keys:
+                self._by_key.setdefault(key, set()).add(url)
+            while len(self._articles) > self.max_articles:
+                self._unlink(next(iter(self._articles)))
+
+    def forget(self, url: str):
+        """Stop tracking an article"""
+        with self._lock:
+            self._unlink(url)
+
+    def _unlink(self, url: str):
+        for key in self._articles.pop(url, ()):
+            urls = self._by_key.get(key)
+            if urls is not None:
+                urls.discard(url)
+                if not urls:
+                    del self._by_key[key]
+
+    def lookup(self, key: str) -> Set[str]:
+        """Get the articles depending on a key"""
+        with self._lock:
+            return set(self._by_key.get(key, ()))
+
+    def lookup_all(self, keys: List[str]) -> Set[str]:
+        """Get the articles depending on every one of several keys"""
+        with self._lock:
+            sets = sorted((self._by_key.get(key, set()) for key in keys), key=len)
+            if not sets:
+                return set()
+            return set(sets[0]).intersection(*sets[1:])
+
+class Rescorer:
+    def __init__(self, trusted_authors: TrustedAuthors,
+                 refresh: Callable[[Dict[str, Any], str], Dict[str, Any]],
+                 index: DependencyIndex, namespace: str = 'article',
+                 cache: Optional[ResponseCache] = None, rate: float = RESCORE_RATE,
+                 batch_size: int = RESCORE_BATCH_SIZE, poll_interval: float = POLL_INTERVAL):
+        """
+        Rescore cached results affected by trusted-author registry changes.
+
+        Follows the registry's change feed, maps each changed author to the
+        articles that depend on it through the DependencyIndex, and
+        rewrites just those cached results in background batches. A token
+        bucket caps the rescoring rate so live requests keep the CPU.
+
+        Args:
+            trusted_authors: Registry whose changes are followed
+            refresh: Function recomputing the trust fields of a cached
+                result (given the result and its URL); it records the new
+                dependencies itself
+            index: Dependencies of the cached results
+            namespace: Cache namespace of the results
+            cache: ResponseCache holding them (the shared one by default)
+            rate: Maximum articles rescored per second
+            batch_size: Maximum articles rescored per batch
+            poll_interval: Seconds between change feed polls
+        """
+        self.trusted_authors = trusted_authors
+        self.refresh = refresh
+        self.index = index
+        self.namespace = namespace
+        self.cache = cache
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.bucket = TokenBucket(rate, max(batch_size / 10, 1))
+        # Only changes made after tracking starts can make results stale
+        self.seq = trusted_authors.last_change_seq()
+        self._pending: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {'changes': 0, 'queued': 0, 'rescored': 0, 'changed': 0, 'evicted': 0}
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def _affected(self, author_id: str, op: str) -> Set[str]:
+        urls = self.index.lookup(f"author:{author_id}")
+        if op == 'put':
+            author = self.trusted_authors.authors.get(author_id) or {}
+            for name in [author.get('name', '')] + list(author.get('aliases', [])):
+                tokens = normalize_name(name).split()
+                if tokens:
+                    urls |= self.index.lookup_all([f"token:{token}" for token in tokens])
+        return urls
+
+    def poll(self) -> int:
+        """
+        Read new registry changes and queue the affected articles.
+
+        Returns:
+            Number of articles newly queued
+        """
+        changes = self.trusted_authors.changes_since(self.seq)
+        if not changes:
+            return 0
+        queued = 0
+        for seq, author_id, op in changes:
+            for url in self._affected(author_id, op):
+                with self._lock:
+                    if url not in self._pending:
+                        self._pending[url] = None
+                        queued += 1
+            self.seq = seq
+        self._count('changes', len(changes))
+        self._count('queued', queued)
+        increment('rescore_queued', queued)
+        logger.info(f"Registry changes up to #{self.seq}: {queued} articles queued for rescoring")
+        return queued
+
+    def run_batch(self) -> int:
+        """
+        Rescore up to batch_size queued articles, within the rate limit.
+
+        Returns:
+            Number of articles processed, including those no longer cached
+        """
+        with self._lock:
+            urls = [self._pending.popitem(last=False)[0] for _ in range(min(self.batch_size, len(self._pending)))]
+        if not urls:
+            return 0
+        cache = self.cache or get_cache()
+        processed = rescored = 0
+        with timer('rescore_batch'):
+            for url in urls:
+                wait = self.bucket.reserve()
+                if wait > 0 and self._stop.wait(wait):
+                    # Stopping: leave the rest queued, in order
+                    with self._lock:
+                        for rest in reversed(urls[processed:]):
+                            self._pending[rest] = None
+                            self._pending.move_to_end(rest, last=False)
+                    break
+                processed += 1
+                before = {}
+
+                def rebuild(article, url=url):
+                    before.update(article)
+                    return self.refresh(article, url)
+
+                after = cache.update(url, self.namespace, rebuild)
+                if after is None:
+                    self.index.forget(url)
+                    self._count('evicted')
+                    continue
+                rescored += 1
+                if any(after.get(k) != before.get(k) for k in after):
+                    self._count('changed')
+        self._count('rescored', rescored)
+        increment('rescored', rescored)
+        return processed
+
+    def start(self) -> "Rescorer":
+        """Start the background thread (idempotent)"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="rescorer", daemon=True)
+                self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+                if self.run_batch():
+                    continue
+            except Exception as e:
+                logger.error(f"Rescoring failed: {str(e)}")
+            self._stop.wait(self.poll_interval)
+
+    def stats(self) -> Dict[str, int]:
+        """Get change/queue/rescore counters, the backlog and the feed position"""
+        with self._lock:
+            return {**self._stats, 'pending': len(self._pending), 'seq': self.seq,
+                    'tracked': len(self.index)}
+
+    def close(self, timeout: float = 5.0):
+        """Stop the background thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
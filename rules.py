@@ -0,0 +1,179 @@
+import json
+import os
+import re
+from typing import Dict, Any, FrozenSet, List, NamedTuple, Optional, Sequence, Set
+
+# Heuristics shared by the server and the browser extension (content.js)
+RULES_PATH = os.path.join(os.path.dirname(__file__), 'rules.json')
+
+# Supported selector forms: tag, .class, [attr="value"] and tag[attr="value"]
+_SELECTOR_RE = re.compile(r'^(?P<tag>[a-z][a-z0-9]*)?(?:\.(?P<cls>[\w-]+))?'
+                          r'(?:\[(?P<attr>[\w:-]+)="(?P<value>[^"]*)"\])?$')
+
+class Selector(NamedTuple):
+    css: str
+    tag: Optional[str]
+    cls: Optional[str]
+    attr: Optional[str]
+    value: Optional[str]
+
+    @property
+    def is_meta(self) -> bool:
+        """Whether the value comes from the content attribute instead of the element text"""
+        return self.tag == 'meta'
+
+def parse_selector(css: str) -> Selector:
+    """
+    Parse a simple CSS selector from the rules file.
+
+    Args:
+        css: Selector such as ".byline" or 'meta[name="author"]'
+
+    Returns:
+        Parsed Selector
+
+    Raises:
+        ValueError: If the selector uses unsupported syntax
+    """
+    match = _SELECTOR_RE.match(css.strip())
+    if match is None or not any(match.groups()):
+        raise ValueError(f"Unsupported selector: {css}")
+    return Selector(css, match.group('tag'), match.group('cls'),
+                    match.group('attr'), match.group('value'))
+
+class SelectorIndex:
+    """
+    Selectors compiled into lookup tables keyed by tag, class and attribute.
+
+    match() only tests the selectors that share a key with the element,
+    instead of trying every selector on every element.
+    """
+
+    def __init__(self, selectors: Sequence[str]):
+        self.selectors = [parse_selector(css) for css in selectors]
+        self._by_class: Dict[str, List[int]] = {}
+        self._by_attr: Dict[tuple, List[int]] = {}
+        self._by_tag: Dict[str, List[int]] = {}
+        for i, selector in enumerate(self.selectors):
+            if selector.cls:
+                self._by_class.setdefault(selector.cls, []).append(i)
+            elif selector.attr:
+                self._by_attr.setdefault((selector.attr, selector.value), []).append(i)
+            else:
+                self._by_tag.setdefault(selector.tag, []).append(i)
+
+    def __len__(self) -> int:
+        return len(self.selectors)
+
+    def match(self, tag: str, attrs: Dict[str, str], classes: Set[str]) -> List[int]:
+        """
+        Find the selectors matching one element.
+
+        Args:
+            tag: Lowercase tag name
+            attrs: Element attributes
+            classes: Element class names
+
+        Returns:
+            Indexes (into the selector list) of the matching selectors
+        """
+        candidates = list(self._by_tag.get(tag, ()))
+        if self._by_class:
+            for cls in classes:
+                candidates.extend(self._by_class.get(cls, ()))
+        if self._by_attr:
+            for item in attrs.items():
+                candidates.extend(self._by_attr.get(item, ()))
+        return [i for i in candidates if self._matches(self.selectors[i], tag, attrs, classes)]
+
+    @staticmethod
+    def _matches(selector: Selector, tag: str, attrs: Dict[str, str], classes: Set[str]) -> bool:
+        return ((selector.tag is None or selector.tag == tag)
+                and (selector.cls is None or selector.cls in classes)
+                and (selector.attr is None or attrs.get(selector.attr) == selector.value))
+
+class TextMatcher:
+    """
+    Named groups of case-insensitive patterns compiled into one regex.
+
+    scan() searches with the combined alternation. When a group is found
+    it is dropped from the regex and the search resumes at the same
+    position, so overlapping matches of other groups are not lost; with k
+    groups the text is searched at most k + 1 times, each search starting
+    where the previous match began.
+    """
+
+    def __init__(self, groups: Dict[str, Sequence[str]], literal: bool = False):
+        """
+        Args:
+            groups: Group name -> regex patterns (or plain strings when literal)
+            literal: Treat patterns as plain strings
+        """
+        self.groups = {
+            name: [re.escape(p) if literal else p for p in patterns]
+            for name, patterns in groups.items()
+        }
+        self._compiled: Dict[FrozenSet[str], re.Pattern] = {}
+        self.regex = self._regex(frozenset(self.groups))
+
+    def _regex(self, names: FrozenSet[str]) -> re.Pattern:
+        regex = self._compiled.get(names)
+        if regex is None:
+            alternation = '|'.join(
+                f"(?P<{name}>{'|'.join(patterns)})"
+                for name, patterns in self.groups.items() if name in names
+            )
+            regex = self._compiled[names] = re.compile(alternation, re.IGNORECASE)
+        return regex
+
+    def search(self, text: str) -> bool:
+        """Check whether any pattern occurs in the text"""
+        return self.regex.search(text) is not None
+
+    def scan(self, text: str) -> Set[str]:
+        """
+        Find which groups have at least one match in the text.
+
+        Runs one search per group found (plus a final one that finds
+        nothing), not a single pass over the text.
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            Set of matching group names
+        """
+        remaining = frozenset(self.groups)
+        found: Set[str] = set()
+        pos = 0
+        while remaining:
+            match = self._regex(remaining).search(text, pos)
+            if match is None:
+                break
+            found.add(match.lastgroup)
+            remaining = remaining - {match.lastgroup}
+            pos = match.start()
+        return found
+
+def load_rules(path: str = RULES_PATH) -> Dict[str, Any]:
+    """
+    Load the rules file.
+
+    Args:
+        path: Path of the JSON rules file
+
+    Returns:
+        Rules dictionary (who, selectors, text_signals, extension_weights)
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+RULES = load_rules()
+
+WHO_AUTHOR: str = RULES['who']['author']
+WHO_PATTERNS: List[str] = RULES['who']['patterns']
+WHO_MATCHER = TextMatcher({'who': WHO_PATTERNS}, literal=True)
+
+AUTHOR_SELECTORS = SelectorIndex(RULES['selectors']['author'])
+DATE_SELECTORS = SelectorIndex(RULES['selectors']['date'])
+TEXT_CONTAINERS = SelectorIndex(RULES['selectors']['text_containers'])
@@ -0,0 +1,285 @@
+import queue
+import threading
+import time
+import logging
+import numpy as np
+from typing import Callable, Dict, Any, List, Optional, Sequence
+from urllib.parse import urlsplit
+from metrics import timer
+from reputation import domain_of, normalize_domain, registrable_domain
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Same rule weights as the Cypher scoring query in graph.py:
+# (points when the signal is present, points when it is missing)
+AUTHOR_WEIGHTS = (0.3, 0.1)
+REFERENCE_WEIGHTS = (0.3, 0.1)
+DATE_WEIGHTS = (0.2, 0.1)
+TEXT_WEIGHTS = (0.2, 0.1)
+MIN_TEXT_LENGTH = 500
+
+# Bodies copied onto several other domains (content farms, scraped
+# syndication) lose points; applied on top of the graph rules
+DUPLICATE_PENALTY = 0.1
+MIN_DUPLICATE_DOMAINS = 3
+
+# Articles repeating fact-checked false claims lose points per claim, up to a cap
+CLAIM_PENALTY = 0.15
+MAX_CLAIM_PENALTY = 0.3
+
+# Outbound links that are page furniture rather than sources: share
+# buttons and social profiles, ad and tracking hosts, CDNs and static files
+NON_REFERENCE_DOMAINS = frozenset({
+    'facebook.com', 'twitter.com', 'x.com', 'linkedin.com', 'pinterest.com', 'reddit.com',
+    'instagram.com', 'tiktok.com', 'tumblr.com', 'whatsapp.com', 'wa.me', 't.me', 'telegram.me',
+    'vk.com', 'threads.net', 'getpocket.com', 'flipboard.com', 'addtoany.com', 'sharethis.com',
+    'doubleclick.net', 'googlesyndication.com', 'googletagmanager.com', 'google-analytics.com',
+    'amazon-adsystem.com', 'taboola.com', 'outbrain.com', 'cloudfront.net', 'akamaihd.net',
+    'fastly.net', 'jsdelivr.net', 'cloudflare.com', 'gstatic.com', 'googleapis.com'
+})
+ASSET_HOST_LABELS = frozenset({'cdn', 'static', 'assets', 'img', 'images', 'media', 'fonts'})
+ASSET_EXTENSIONS = ('.js', '.css', '.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.ico',
+                    '.woff', '.woff2', '.ttf', '.mp3', '.mp4', '.zip')
+
+def is_page_furniture(url: str) -> bool:
+    """Check whether a link points at a share/social, ad or CDN host or a static file"""
+    parts = urlsplit(url)
+    host = domain_of(url)
+    return (registrable_domain(host) in NON_REFERENCE_DOMAINS
+            or host.split('.', 1)[0] in ASSET_HOST_LABELS
+            or parts.path.lower().endswith(ASSET_EXTENSIONS))
+
+def count_references(links: Sequence[str], domain: str) -> int:
+    """
+    Count the articles on other sites that an article links to.
+
+    Mirrors the graph's REFERENCES->Article edges (link_graph.extract_references):
+    distinct links to non-homepage URLs on another domain, leaving out
+    page furniture (see is_page_furniture).
+
+    Args:
+        links: Absolute outbound URLs of the article
+        domain: The article's own domain
+
+    Returns:
+        Number of distinct referenced articles
+    """
+    own = normalize_domain(domain)
+    targets = set()
+    for link in links:
+        parts = urlsplit(link)
+        host = domain_of(link)
+        if not host or host == own or (parts.path in ('', '/') and not parts.query) or is_page_furniture(link):
+            continue
+        targets.add((host, parts.path.rstrip('/'), parts.query))
+    return len(targets)
+
+def score_article(content: Dict[str, Any], reference_count: int = 0) -> float:
+    """
+    Score one article with the graph scoring rules, without a database.
+
+    Args:
+        content: Scraped article dict (author, date, text)
+        reference_count: Number of articles this one references
+
+    Returns:
+        Credibility score between 0 and 1
+    """
+    score = AUTHOR_WEIGHTS[0] if content.get('author') else AUTHOR_WEIGHTS[1]
+    score += REFERENCE_WEIGHTS[0] if reference_count > 0 else REFERENCE_WEIGHTS[1]
+    score += DATE_WEIGHTS[0] if content.get('date') else DATE_WEIGHTS[1]
+    score += TEXT_WEIGHTS[0] if len(content.get('text') or '') > MIN_TEXT_LENGTH else TEXT_WEIGHTS[1]
+    return round(score, 4)
+
+def duplicate_penalty(duplicate_domains: int) -> float:
+    """
+    Points deducted for an article whose body appears on other domains.
+
+    Args:
+        duplicate_domains: Distinct other domains carrying a near-duplicate
+
+    Returns:
+        Penalty to subtract from the score
+    """
+    return DUPLICATE_PENALTY if duplicate_domains >= MIN_DUPLICATE_DOMAINS else 0.0
+
+def claim_penalty(matched_claims: int) -> float:
+    """
+    Points deducted for an article repeating debunked claims.
+
+    Args:
+        matched_claims: Distinct fact-checked claims found in the text
+
+    Returns:
+        Penalty to subtract from the score
+    """
+    return min(CLAIM_PENALTY * matched_claims, MAX_CLAIM_PENALTY)
+
+def score_batch(articles: Sequence[Dict[str, Any]],
+                reference_counts: Optional[Sequence[int]] = None,
+                text_lengths: Optional[Sequence[int]] = None) -> np.ndarray:
+    """
+    Score many articles at once.
+
+    Args:
+        articles: Scraped article dicts (author, date, text)
+        reference_counts: Reference count per article (0 when omitted)
+        text_lengths: Body length per article, used instead of the
+            articles' 'text' (which may then be left out)
+
+    Returns:
+        Array of credibility scores between 0 and 1, in input order
+    """
+    n = len(articles)
+    has_author = np.fromiter((bool(a.get('author')) for a in articles), dtype=bool, count=n)
+    has_date = np.fromiter((bool(a.get('date')) for a in articles), dtype=bool, count=n)
+    if text_lengths is None:
+        text_length = np.fromiter((len(a.get('text') or '') for a in articles), dtype=np.int64, count=n)
+    else:
+        text_length = np.asarray(text_lengths, dtype=np.int64)
+    if reference_counts is None:
+        references = np.zeros(n, dtype=np.int64)
+    else:
+        references = np.asarray(reference_counts, dtype=np.int64)
+
+    scores = np.where(has_author, *AUTHOR_WEIGHTS)
+    scores = scores + np.where(references > 0, *REFERENCE_WEIGHTS)
+    scores = scores + np.where(has_date, *DATE_WEIGHTS)
+    scores = scores + np.where(text_length > MIN_TEXT_LENGTH, *TEXT_WEIGHTS)
+    return np.round(scores, 4)
+
+class GraphSink:
+    def __init__(self, graph_factory: Optional[Callable[[], Any]] = None, batch_size: int = 200,
+                 flush_interval: float = 1.0, max_queue: int = 10000, retry_delay: float = 5.0,
+                 write: Optional[Callable[[Any, List[Dict[str, Any]]], Any]] = None,
+                 name: str = "graph-sink"):
+        """
+        Background writer that batches items into the graph.
+
+        Items are queued without blocking the caller and written from a
+        daemon thread, by default as articles with GraphDB.ingest_articles.
+        When the queue is full or Neo4j is unavailable, items are dropped
+        and counted.
+
+        Args:
+            graph_factory: Callable returning a connected GraphDB
+            batch_size: Maximum items per write call
+            flush_interval: Seconds to wait for a batch to fill up
+            max_queue: Maximum queued items
+            retry_delay: Seconds to wait before reconnecting after a failure
+            write: Function taking (GraphDB, batch) that writes one batch
+            name: Name of the writer thread
+        """
+        if graph_factory is None:
+            from graph import GraphDB
+            graph_factory = GraphDB
+        self.graph_factory = graph_factory
+        self.write = write or (lambda db, batch: db.ingest_articles(batch, batch_size=len(batch)))
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_delay = retry_delay
+        # Metrics stage for write calls, e.g. "graph_sink_write"
+        self.stage = f"{name.replace('-', '_')}_write"
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queue)
+        self._db = None
+        self._stopped = threading.Event()
+        self._stats = {'submitted': 0, 'written': 0, 'dropped': 0, 'failed_batches': 0}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def submit(self, item: Dict[str, Any], timeout: float = 0) -> bool:
+        """
+        Queue an item for writing.
+
+        Args:
+            item: Item to write, e.g. an article dict with 'url' (or 'source'),
+                title, author, date, text
+            timeout: Seconds to wait for queue space (0 never blocks)
+
+        Returns:
+            False if the queue stayed full and the item was dropped
+        """
+        try:
+            if timeout > 0:
+                self._queue.put(item, timeout=timeout)
+            else:
+                self._queue.put_nowait(item)
+        except queue.Full:
+            self._count('dropped')
+            return False
+        self._count('submitted')
+        return True
+
+    def _next_batch(self) -> List[Dict[str, Any]]:
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stopped.is_set() or not self._queue.empty():
+            batch = self._next_batch()
+            if not batch:
+                continue
+            try:
+                if self._db is None:
+                    self._db = self.graph_factory()
+                with timer(self.stage):
+                    self.write(self._db, batch)
+                self._count('written', len(batch))
+            except Exception as e:
+                logger.error(f"Graph sink failed to write {len(batch)} items: {str(e)}")
+                self._count('failed_batches')
+                self._count('dropped', len(batch))
+                # Close the failed connection's driver and pool before reconnecting
+                if self._db is not None:
+                    try:
+                        self._db.close()
+                    except Exception as close_error:
+                        logger.warning(f"Graph sink failed to close its connection: {str(close_error)}")
+                    self._db = None
+                self._stopped.wait(self.retry_delay)
+
+    def stats(self) -> Dict[str, int]:
+        """Get submitted/written/dropped counters and the queue depth"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['queued'] = self._queue.qsize()
+        return stats
+
+    def close(self, timeout: float = 10.0):
+        """Flush queued items and stop the writer thread"""
+        self._stopped.set()
+        self._thread.join(timeout)
+        if self._db is not None:
+            self._db.close()
+
+_sink: Optional[GraphSink] = None
+_sink_lock = threading.Lock()
+
+def get_graph_sink() -> GraphSink:
+    """Get the process-wide GraphSink, starting it on first use"""
+    global _sink
+    if _sink is None:
+        with _sink_lock:
+            if _sink is None:
+                _sink = GraphSink()
+                logger.info("Graph sink started")
+    return _sink
@@ -1,19 +1,50 @@
-from bs4 import BeautifulSoup
 import requests
 import logging
-from typing import Dict, Any, List
-from urllib.parse import urlparse
-from .trusted_authors import TrustedAuthors
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
+from urllib.parse import urljoin, urlparse
+from trusted_authors import TrustedAuthors, get_trusted_authors
+from extractor import extract_article
+from rules import WHO_AUTHOR, WHO_MATCHER, RULES
+from cache import get_cache, normalize_url
+from host_scheduler import HostUnavailable
+from metrics import log_sampled
+from rescoring import DependencyIndex, Rescorer, article_keys
+
+if TYPE_CHECKING:
+    # Only the reference _extract_* methods take soups; bs4 is not imported at runtime
+    from bs4 import BeautifulSoup
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class ArticleScraper:
-    def __init__(self):
-        self.trusted_authors = TrustedAuthors()
+    def __init__(self, trusted_authors: Optional[TrustedAuthors] = None, rescore: bool = True):
+        """
+        Args:
+            trusted_authors: Registry to match bylines against
+            rescore: Whether analyze_article starts a background thread
+                rescoring cached results when the registry changes (the
+                rescorer can also be driven by hand through self.rescorer)
+        """
+        self.trusted_authors = trusted_authors or get_trusted_authors()
+        self.rescore = rescore
+        # Results depend on the registry, so each registry caches its own
+        self.namespace = f"article:{self.trusted_authors.identity}"
+        # Created by the first analyze_article() call, so bulk scoring
+        # through build_article() tracks nothing
+        self.dependencies: Optional[DependencyIndex] = None
+        self.rescorer: Optional[Rescorer] = None
         logger.info("ArticleScraper initialized")
 
+    def _track(self):
+        if self.rescorer is None:
+            self.dependencies = DependencyIndex()
+            self.rescorer = Rescorer(self.trusted_authors, self.refresh_trust, self.dependencies,
+                                     namespace=self.namespace)
+            if self.rescore:
+                self.rescorer.start()
+
     def analyze_article(self, url: str) -> Dict[str, Any]:
         """
         Analyze a news article by scraping its content and metadata.
@@ -25,39 +56,13 @@ class ArticleScraper:
             Dictionary containing article content and metadata
         """
         try:
-            logger.info(f"Analyzing article: {url}")
-            
-            # Fetch the webpage
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            # Parse the HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Extract article content
-            author = self._extract_author(soup)
-            logger.info(f"Extracted author: {author}")
-            
-            author_details = self.trusted_authors.get_author_details(author) if author else None
-            is_trusted = self.trusted_authors.is_trusted_author(author) if author else False
-            
-            logger.info(f"Author details: {author_details}")
-            logger.info(f"Is trusted author: {is_trusted}")
-            
-            article_content = {
-                'title': self._extract_title(soup),
-                'text': self._extract_text(soup),
-                'author': author,
-                'author_details': author_details,
-                'is_trusted_author': is_trusted,
-                'date': self._extract_date(soup),
-                'source': url
-            }
-            
-            return article_content
+            self._track()
+            # Fetch the webpage (or reuse a cached/revalidated result)
+            article = get_cache().get_or_fetch(url, self.namespace, self.build_article)
+            if normalize_url(url) not in self.dependencies:
+                # Cached before tracking started (e.g. in the disk tier)
+                article = get_cache().update(url, self.namespace, lambda a: self.refresh_trust(a, url)) or article
+            return article
             
         except requests.RequestException as e:
             logger.error(f"Error fetching article: {str(e)}")
@@ -66,62 +71,93 @@ class ArticleScraper:
             logger.error(f"Error analyzing article: {str(e)}")
             raise
 
-    def _extract_author(self, soup: BeautifulSoup) -> str:
+    def parse_article(self, html: str, url: str) -> Dict[str, Any]:
+        """
+        Extract article content and metadata from an already fetched page.
+        
+        Args:
+            html: HTML of the article page
+            url: The URL the page was fetched from
+            
+        Returns:
+            Dictionary containing article content and metadata
+        """
+        # Extract all fields in a single pass over the HTML
+        return self.build_article(extract_article(html), url)
+
+    def build_article(self, fields: Dict[str, Any], url: str) -> Dict[str, Any]:
+        """
+        Build the analyze_article result from extracted page fields.
+        
+        Args:
+            fields: Fields returned by extract_article()
+            url: The URL the page was fetched from
+            
+        Returns:
+            Dictionary containing article content and metadata
+        """
+        article = {
+            'title': fields['title'],
+            'text': fields['text'],
+            'author': fields['author'],
+            'author_details': None,
+            'is_trusted_author': False,
+            'date': fields['date'],
+            'source': url
+        }
+        return self.refresh_trust(article, url)
+
+    def refresh_trust(self, article: Dict[str, Any], url: str) -> Dict[str, Any]:
+        """
+        Set an article's trust fields from the current registry.
+        
+        Args:
+            article: analyze_article result (updated in place)
+            url: The URL the page was fetched from
+            
+        Returns:
+            The article
+        """
+        author = article['author']
+        
+        # Single indexed lookup (name, alias or byline match)
+        match = self.trusted_authors.lookup_author(author)
+        article['author_details'] = match[1] if match else None
+        article['is_trusted_author'] = match is not None
+        
+        log_sampled(logger, 'article_author', url=url, author=author, is_trusted=match is not None)
+        
+        if self.dependencies is not None:
+            self.dependencies.record(normalize_url(url), article_keys(url, author, match[0] if match else None))
+        return article
+
+    def _extract_author(self, soup: 'BeautifulSoup') -> str:
         """Extract article author"""
-        logger.info("Extracting author information")
-        
-        # Check for WHO specific patterns
-        who_patterns = [
-            "World Health Organization",
-            "WHO",
-            "World Health Organisation"
-        ]
-        
-        # Check if any WHO pattern is in the text
-        text = soup.get_text().lower()
-        for pattern in who_patterns:
-            if pattern.lower() in text:
-                logger.info("Found WHO pattern in text")
-                return "World Health Organization"
+        # Check for WHO specific patterns (one combined scan of the text)
+        if WHO_MATCHER.search(soup.get_text()):
+            return WHO_AUTHOR
         
         # Common author selectors
-        selectors = [
-            '.author',
-            '[itemprop="author"]',
-            '.byline',
-            'meta[name="author"]',
-            '.article-meta__author',
-            '.article-author',
-            '.author-name',
-            '.article__author',
-            '.entry-author',
-            '.post-author'
-        ]
+        selectors = RULES['selectors']['author']
         
         for selector in selectors:
             author = soup.select_one(selector)
             if author:
                 author_text = author.text.strip() if not author.name == 'meta' else author['content']
-                logger.info(f"Found author using selector {selector}: {author_text}")
+                log_sampled(logger, 'author_selector', selector=selector, author=author_text)
                 return author_text
         
-        logger.info("No author found")
         return ''
 
-    def _extract_title(self, soup: BeautifulSoup) -> str:
+    def _extract_title(self, soup: 'BeautifulSoup') -> str:
         """Extract article title"""
         title = soup.find('h1')
         return title.text.strip() if title else ''
 
-    def _extract_text(self, soup: BeautifulSoup) -> str:
+    def _extract_text(self, soup: 'BeautifulSoup') -> str:
         """Extract main article text"""
         # Common article content selectors
-        selectors = [
-            'article p',
-            '.article-content p',
-            '.post-content p',
-            'main p'
-        ]
+        selectors = [f"{container} p" for container in RULES['selectors']['text_containers']]
         
         for selector in selectors:
             paragraphs = soup.select(selector)
@@ -130,15 +166,10 @@ class ArticleScraper:
         
         return ''
 
-    def _extract_date(self, soup: BeautifulSoup) -> str:
+    def _extract_date(self, soup: 'BeautifulSoup') -> str:
         """Extract article publication date"""
         # Common date selectors
-        selectors = [
-            'time',
-            '.date',
-            '[itemprop="datePublished"]',
-            'meta[property="article:published_time"]'
-        ]
+        selectors = RULES['selectors']['date']
         
         for selector in selectors:
             date = soup.select_one(selector)
@@ -147,6 +178,60 @@ class ArticleScraper:
         
         return ''
 
+def _extract_title(soup: 'BeautifulSoup') -> str:
+    """Extract page title from the first <h1>, falling back to <title>"""
+    title = soup.find('h1') or soup.find('title')
+    return title.text.strip() if title else ''
+
+def _resolve_links(hrefs: List[str], domain: str) -> List[str]:
+    """Make root-relative links absolute and drop non-HTTP links"""
+    links = []
+    for href in hrefs:
+        # Convert relative URLs to absolute
+        if href.startswith('/'):
+            href = f"https://{domain}{href}"
+        elif not href.startswith(('http://', 'https://')):
+            continue
+        links.append(href)
+    return links
+
+def parse_scraped_page(html: str, url: str) -> Dict[str, Any]:
+    """
+    Build the scrape_article result from an already fetched page.
+    
+    Args:
+        html: HTML of the article page
+        url: The URL the page was fetched from
+        
+    Returns:
+        Dictionary containing title, domain, links, author, date, text and
+        canonical (absolute canonical URL declared by the page, or '')
+    """
+    # Extract every field in a single pass over the HTML
+    return build_scraped_page(extract_article(html), url)
+
+def build_scraped_page(fields: Dict[str, Any], url: str) -> Dict[str, Any]:
+    """
+    Build the scrape_article result from extracted page fields.
+    
+    Args:
+        fields: Fields returned by extract_article()
+        url: The URL the page was fetched from
+        
+    Returns:
+        Same dictionary as parse_scraped_page()
+    """
+    domain = urlparse(url).netloc
+    return {
+        'title': fields['title'] or fields['page_title'],
+        'domain': domain,
+        'links': _resolve_links(fields['links'], domain),
+        'author': fields['author'],
+        'date': fields['date'],
+        'text': fields['text'],
+        'canonical': urljoin(url, fields['canonical']) if fields['canonical'] else ''
+    }
+
 def scrape_article(url: str) -> Dict[str, Any]:
     """
     Scrape a news article for its title, domain, and outbound links.
@@ -159,44 +244,19 @@ def scrape_article(url: str) -> Dict[str, Any]:
         - title: Article title (string)
         - domain: Website domain (string)
         - links: List of outbound URLs (list of strings)
+        - author, date, text: Article metadata and body text (strings)
+        - canonical: Canonical URL declared by the page (string, may be empty)
         - error: Error message if scraping fails (string, optional)
+        - retry_after: Seconds until the host is tried again, when it was
+          skipped as unhealthy (float, optional)
     """
     try:
-        # Set timeout and headers for the request
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
-        # Fetch the webpage with timeout
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        # Parse the HTML
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Extract domain from URL
-        domain = urlparse(url).netloc
-        
-        # Extract title
-        title = _extract_title(soup)
-        
-        # Extract all links
-        links = []
-        for link in soup.find_all('a', href=True):
-            href = link['href']
-            # Convert relative URLs to absolute
-            if href.startswith('/'):
-                href = f"https://{domain}{href}"
-            elif not href.startswith(('http://', 'https://')):
-                continue
-            links.append(href)
-        
-        return {
-            'title': title,
-            'domain': domain,
-            'links': links
-        }
+        # Fetch the webpage (or reuse a cached/revalidated result)
+        return get_cache().get_or_fetch(url, 'scrape', build_scraped_page)
         
+    except HostUnavailable as e:
+        log_sampled(logger, 'host_unavailable', url=url, retry_after=e.retry_after)
+        return {'error': f"Failed to fetch URL: {str(e)}", 'retry_after': e.retry_after}
     except requests.exceptions.RequestException as e:
         logger.error(f"Request error: {str(e)}")
         return {'error': f"Failed to fetch URL: {str(e)}"}
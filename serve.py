@@ -0,0 +1,60 @@
+import argparse
+import gc
+import multiprocessing
+from typing import Dict, Any
+from gunicorn.app.base import BaseApplication
+
+# Production defaults: a few processes, each with a pool of threads, since
+# a request spends most of its time waiting on the article fetch. The app
+# is preloaded in the master, so new and respawned workers are forked with
+# everything imported and indexed instead of starting from scratch.
+SERVER_OPTIONS = {
+    'preload_app': True,
+    'bind': '0.0.0.0:5000',
+    'workers': multiprocessing.cpu_count() * 2 + 1,
+    'worker_class': 'gthread',
+    'threads': 32,
+    'timeout': 30,
+    'graceful_timeout': 10,
+    'keepalive': 5,
+    'backlog': 2048,
+    'max_requests': 10000,
+    'max_requests_jitter': 1000,
+    'accesslog': None
+}
+
+class NewsBusterServer(BaseApplication):
+    """Gunicorn application serving app.app with SERVER_OPTIONS"""
+
+    def __init__(self, options: Dict[str, Any]):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key, value)
+
+    def load(self):
+        from app import app, preload
+        if self.options.get('preload_app'):
+            preload()
+            # Keep the preloaded objects out of GC passes so their pages
+            # stay shared with the workers instead of being copied
+            gc.freeze()
+        return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API with multi-process, multi-thread workers")
+    parser.add_argument('--bind', default=SERVER_OPTIONS['bind'])
+    parser.add_argument('--workers', type=int, default=SERVER_OPTIONS['workers'])
+    parser.add_argument('--threads', type=int, default=SERVER_OPTIONS['threads'])
+    parser.add_argument('--no-preload', action='store_true', help="Import the app in each worker instead")
+    args = parser.parse_args()
+
+    options = dict(SERVER_OPTIONS, bind=args.bind, workers=args.workers, threads=args.threads,
+                   preload_app=not args.no_preload)
+    NewsBusterServer(options).run()
+
+if __name__ == '__main__':
+    main()
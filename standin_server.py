@@ -0,0 +1,88 @@
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+PAGES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures', 'pages')
+
+class _OriginHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are separate writes; avoid Nagle/delayed-ACK stalls
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+        if server.error_rate and server.random.random() < server.error_rate:
+            self._send(503, b'Service Unavailable', 'text/plain')
+            return
+        name = self.path.split('?', 1)[0].strip('/') or 'index.html'
+        body = server.pages.get(name)
+        if body is None:
+            self._send(404, b'Not Found', 'text/plain')
+            return
+        self._send(200, body, 'text/html; charset=utf-8')
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        with self.server.lock:
+            self.server.requests += 1
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class OriginServer(ThreadingHTTPServer):
+    """
+    Local stand-in for news sites, serving saved pages.
+
+    GET /<name> returns fixtures/pages/<name> (query strings are ignored,
+    so unique URLs can be generated to defeat caches). Latency and a
+    random error rate simulate slow or flaky hosts.
+    """
+    daemon_threads = True
+
+    def __init__(self, pages_dir: str = PAGES_DIR, latency: float = 0.0,
+                 error_rate: float = 0.0, port: int = 0, seed: Optional[int] = None):
+        super().__init__(('127.0.0.1', port), _OriginHandler)
+        self.pages: Dict[str, bytes] = {}
+        for name in sorted(os.listdir(pages_dir)):
+            with open(os.path.join(pages_dir, name), 'rb') as f:
+                self.pages[name] = f.read()
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def handle_error(self, request, client_address):
+        # Clients that stop reading early (streamed fetches) just hang up
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}"
+
+def start_origin_server(**kwargs) -> Tuple[OriginServer, threading.Thread]:
+    """
+    Start an OriginServer on a background thread.
+
+    Args:
+        **kwargs: OriginServer arguments (pages_dir, latency, error_rate, port, seed)
+
+    Returns:
+        Tuple of (server, thread); call server.shutdown() to stop it
+    """
+    server = OriginServer(**kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, thread
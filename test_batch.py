@@ -0,0 +1,52 @@
+import json
+import threading
+import time
+from batch import BatchAnalyzer
+
+def test_batch_per_host_limit():
+    active = {}
+    peak = {}
+    lock = threading.Lock()
+
+    def slow_analyze(url):
+        host = url.split('/')[2]
+        with lock:
+            active[host] = active.get(host, 0) + 1
+            peak[host] = max(peak.get(host, 0), active[host])
+        time.sleep(0.02)
+        with lock:
+            active[host] -= 1
+        return {'title': url}
+
+    urls = [f"https://site{i % 3}.example/article/{i}" for i in range(30)]
+    analyzer = BatchAnalyzer(slow_analyze, max_workers=16, per_host_limit=2)
+    results = list(analyzer.run(urls))
+
+    assert sorted(r['url'] for r in results) == sorted(urls)
+    assert all(count <= 2 for count in peak.values())
+
+def test_batch_endpoint_streams_ndjson(monkeypatch):
+    import app as app_module
+
+    def fake_analyze_url(url):
+        if 'bad' in url:
+            return {'error': 'Failed to scrape article: boom'}, 400
+        return {'title': 'Title', 'domain': 'example.com', 'score': 80.0, 'color': 'green'}, 200
+
+    monkeypatch.setattr(app_module, 'analyze_url', fake_analyze_url)
+    client = app_module.app.test_client()
+    response = client.post('/analyze/batch', json={
+        'urls': ['https://example.com/good', 'https://example.com/bad']
+    })
+
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.data.decode().splitlines()]
+    by_url = {line['url']: line for line in lines}
+    assert by_url['https://example.com/good']['color'] == 'green'
+    assert 'error' in by_url['https://example.com/bad']
+
+    assert client.post('/analyze/batch', json={'urls': []}).status_code == 400
+
+if __name__ == "__main__":
+    test_batch_per_host_limit()
+    print("BatchAnalyzer per-host limit OK")
@@ -0,0 +1,87 @@
+import gzip
+import json
+import os
+import zlib
+from bulk import iter_warc, run_bulk
+from fetcher import MAX_PAGE_BYTES
+from standin_server import PAGES_DIR, start_origin_server
+
+def _write_warc(path, pages, content_encoding=None):
+    with gzip.open(path, 'wb') as f:
+        for i, (url, html) in enumerate(pages):
+            body = html if isinstance(html, bytes) else html.encode('utf-8')
+            encoding = b"Content-Encoding: " + content_encoding.encode() + b"\r\n" if content_encoding else b""
+            http = (b"HTTP/1.1 200 OK\r\nContent-Type: text/html; charset=utf-8\r\n" + encoding +
+                    b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+            header = (f"WARC/1.0\r\nWARC-Type: response\r\nWARC-Record-ID: <urn:uuid:{i}>\r\n"
+                      f"WARC-Target-URI: {url}\r\nContent-Type: application/http; msgtype=response\r\n"
+                      f"Content-Length: {len(http)}\r\n\r\n").encode()
+            f.write(header + http + b"\r\n\r\n")
+        # Non-response records are skipped
+        f.write(b"WARC/1.0\r\nWARC-Type: request\r\nContent-Length: 4\r\n\r\nGET \r\n\r\n")
+
+def _read_rows(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+def test_bulk_scores_all_inputs_and_resumes(tmp_path):
+    with open(os.path.join(PAGES_DIR, 'bbc_like.html'), 'r', encoding='utf-8') as f:
+        html = f.read()
+    warc = str(tmp_path / 'crawl.warc.gz')
+    _write_warc(warc, [(f"https://www.example.com/a{i}", html) for i in range(3)])
+    assert [r['url'] for r in iter_warc(warc)] == [f"https://www.example.com/a{i}" for i in range(3)]
+
+    origin, _ = start_origin_server()
+    try:
+        urls = str(tmp_path / 'urls.jsonl')
+        with open(urls, 'w') as f:
+            f.write(json.dumps(f"{origin.base_url}/who_like.html") + '\n')
+            f.write(json.dumps({'id': 'missing', 'url': f"{origin.base_url}/missing.html"}) + '\n')
+        inputs = [PAGES_DIR, warc, urls]
+
+        full = str(tmp_path / 'full.jsonl')
+        stats = run_bulk(inputs, full, workers=2, chunk_size=2, base_url='https://news.example.com')
+        rows = _read_rows(full)
+        assert stats['records'] == len(rows) == 8
+        assert stats['errors'] == 1 and 'error' in rows[-1]
+        assert rows[0]['url'] == 'https://news.example.com/bbc_like.html'
+        assert all(0 <= row['score'] <= 100 for row in rows[:-1])
+        assert stats['stage_records']['fetch'] == 1 and stats['stage_records']['extract'] == 6
+
+        # An interrupted run picks up where its checkpoint left off
+        partial = str(tmp_path / 'partial.jsonl')
+        run_bulk(inputs, partial, workers=2, chunk_size=2, base_url='https://news.example.com', limit=4)
+        assert len(_read_rows(partial)) == 4
+        stats = run_bulk(inputs, partial, workers=2, chunk_size=2, base_url='https://news.example.com',
+                         resume=True)
+        assert stats['records'] == 4
+        assert _read_rows(partial) == _read_rows(full)
+
+        # A checkpoint whose output is gone starts a fresh run
+        os.remove(partial)
+        stats = run_bulk(inputs, partial, workers=2, chunk_size=2, base_url='https://news.example.com',
+                         resume=True)
+        assert stats['records'] == 8
+        assert _read_rows(partial) == _read_rows(full)
+    finally:
+        origin.shutdown()
+
+def test_warc_rejects_oversized_and_truncated_bodies(tmp_path):
+    def deflate(data):
+        compressor = zlib.compressobj(wbits=31)
+        return compressor.compress(data) + compressor.flush()
+
+    page = b"<html><body><p>" + b"x" * 1000 + b"</p></body></html>"
+    bomb = b"<html><body><p>" + b"x" * MAX_PAGE_BYTES + b"</p></body></html>"
+    warc = str(tmp_path / 'compressed.warc.gz')
+    _write_warc(warc, [('https://www.example.com/ok', deflate(page)),
+                       ('https://www.example.com/bomb', deflate(bomb)),
+                       ('https://www.example.com/cut', deflate(page)[:-20])], content_encoding='gzip')
+    assert [record['url'] for record in iter_warc(warc)] == ['https://www.example.com/ok']
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    with tempfile.TemporaryDirectory() as tmp:
+        test_bulk_scores_all_inputs_and_resumes(Path(tmp))
+    print("Bulk scoring OK")
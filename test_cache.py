@@ -0,0 +1,118 @@
+import threading
+import time
+import pytest
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from cache import ResponseCache, _DiskStore, _Entry, normalize_url
+from scraper import build_scraped_page
+
+class _ETagHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    full_responses = 0
+
+    def do_GET(self):
+        if self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        type(self).full_responses += 1
+        body = f'<html><h1>{self.path}</h1><a href="/next">next</a></html>'.encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('ETag', '"v1"')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def test_normalize_url():
+    assert normalize_url('HTTPS://News.Example.com:443/a?b=2&a=1#frag') == \
+        'https://news.example.com/a?a=1&b=2'
+    assert normalize_url('http://example.com') == 'http://example.com/'
+
+def test_cache_hits_and_revalidation(tmp_path):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _ETagHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    try:
+        cache = ResponseCache(max_entries=2, ttl=60)
+        first = cache.get_or_fetch(f"{base}/story#top", 'scrape', build_scraped_page)
+        second = cache.get_or_fetch(f"{base}/story", 'scrape', build_scraped_page)
+        assert first == second and first['title'] == '/story'
+        assert _ETagHandler.full_responses == 1
+        assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+        # Expired entries are revalidated and a 304 reuses the parsed result
+        stale = ResponseCache(ttl=0, disk_path=str(tmp_path / 'cache.sqlite3'))
+        stale.get_or_fetch(f"{base}/story", 'scrape', build_scraped_page)
+        result = stale.get_or_fetch(f"{base}/story", 'scrape', build_scraped_page)
+        assert result['title'] == '/story'
+        assert stale.stats()['not_modified'] == 1
+        assert _ETagHandler.full_responses == 2
+
+        # The disk tier survives a new in-memory cache
+        reopened = ResponseCache(ttl=60, disk_path=str(tmp_path / 'cache.sqlite3'))
+        assert reopened.get_or_fetch(f"{base}/story", 'scrape', build_scraped_page)['title'] == '/story'
+        assert reopened.stats()['hits'] == 1
+
+        # LRU eviction keeps at most max_entries
+        for path in ('/a', '/b', '/c'):
+            cache.get_or_fetch(f"{base}{path}", 'scrape', build_scraped_page)
+        assert cache.stats()['size'] == 2
+        assert cache.stats()['evictions'] == 2
+    finally:
+        server.shutdown()
+
+def test_results_are_deep_copies():
+    cache = ResponseCache()
+    value = {'title': 'T', 'links': ['https://a.example/1'], 'author_details': {'aliases': ['J. Doe']}}
+    first = cache.get_or_compute('k', 'test', lambda: value)
+    first['links'].append('https://b.example/2')
+    first['author_details']['aliases'].clear()
+    second = cache.get_or_compute('k', 'test', lambda: None)
+    assert second['links'] == ['https://a.example/1']
+    assert second['author_details'] == {'aliases': ['J. Doe']}
+
+def test_disk_store_is_pruned(tmp_path):
+    store = _DiskStore(str(tmp_path / 'cache.sqlite3'), ttl=60, max_entries=3)
+    now = time.time()
+    store.put('old', _Entry({'n': 0}, None, None, now - 120))
+    for i in range(5):
+        store.put(f"k{i}", _Entry({'n': i}, None, None, now + i))
+    assert store.prune() == 3
+    assert store.get('old') is None and store.get('k1') is None
+    assert [store.get(f"k{i}").value['n'] for i in (2, 3, 4)] == [2, 3, 4]
+
+class _DownHandler(_ETagHandler):
+    down = False
+
+    def do_GET(self):
+        if type(self).down:
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        super().do_GET()
+
+def test_stale_result_served_while_host_is_down():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _DownHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/down"
+    try:
+        cache = ResponseCache(ttl=0)
+        assert cache.get_or_fetch(url, 'scrape', build_scraped_page)['title'] == '/down'
+
+        _DownHandler.down = True
+        assert cache.get_or_fetch(url, 'scrape', build_scraped_page)['title'] == '/down'
+        assert cache.stats()['stale'] == 1
+        with pytest.raises(requests.HTTPError):
+            cache.get_or_fetch(f"{url}/never-cached", 'scrape', build_scraped_page)
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    test_normalize_url()
+    print("URL normalization OK")
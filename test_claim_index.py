@@ -0,0 +1,165 @@
+import numpy as np
+import pytest
+import claim_index
+from claim_index import (ClaimIndex, asserts_claim, cites_fact_check, decode_varints, encode_varints, is_debunked,
+                         split_sentences, tokenize)
+from near_duplicates import NearDuplicateIndex
+from scoring import MAX_CLAIM_PENALTY, claim_penalty
+
+CLAIMS = [
+    {'id': 'fc-1', 'claim': 'Drinking rainwater cures COVID-19 within three days', 'rating': 'False',
+     'url': 'https://factcheck.example/rain'},
+    {'id': 'fc-2', 'claim': '5G towers spread the coronavirus through radio waves', 'rating': 'False',
+     'url': 'https://factcheck.example/5g'},
+    {'id': 'fc-3', 'claim': 'Garlic soup protects children against measles infection', 'rating': 'Misleading'},
+]
+
+# Unrelated claims, so that single additions barely move the statistics
+FILLER = [{'id': f"filler-{i}", 'claim': f"filler{i} topic{i % 17} item{i % 23} note{i % 29}", 'rating': 'False'}
+          for i in range(300)]
+
+class _NullSink:
+    def submit(self, *args, **kwargs):
+        return True
+
+    def submit_duplicates(self, *args, **kwargs):
+        return 0
+
+ARTICLE = ("Residents were told by neighbours that drinking rainwater cures covid-19 within three days, "
+           "a message shared thousands of times before the health ministry stepped in.")
+
+def test_varints_round_trip():
+    values = np.array([0, 1, 127, 128, 300, 2 ** 32 + 5, 2 ** 63], dtype=np.uint64)
+    data, sizes = encode_varints(values)
+    assert sizes.tolist() == [1, 1, 1, 2, 2, 5, 10]
+    assert (decode_varints(data) == values).all()
+    assert tokenize('The towers, the TOWER!') == ['tower', 'tower']
+
+def test_match_overlay_compact_and_mmap_load(tmp_path):
+    index = ClaimIndex()
+    assert index.add_batch(CLAIMS + FILLER) == 303
+    matches = index.query(ARTICLE)
+    assert [match['id'] for match in matches] == ['fc-1']
+    assert matches[0]['coverage'] >= index.threshold and matches[0]['rating'] == 'False'
+    assert index.query('The weather was mild and the trains ran on time.') == []
+
+    index.save(str(tmp_path))
+    loaded = ClaimIndex.load(str(tmp_path))
+    assert len(loaded) == 303 and loaded.stats()['overlay_claims'] == 0
+    assert [match['id'] for match in loaded.query(ARTICLE)] == ['fc-1']
+
+    # New claims go to the overlay and are matched next to the mapped lists
+    loaded.add_batch([{'id': 'fc-4', 'claim': 'The health ministry banned rainwater sales', 'rating': 'False'}])
+    assert loaded.stats()['overlay_claims'] == 1
+    assert {match['id'] for match in loaded.query(ARTICLE + ' The ministry banned rainwater sales.')} == {'fc-1', 'fc-4'}
+    loaded.compact()
+    assert loaded.stats()['overlay_claims'] == 0
+    assert {match['id'] for match in loaded.query(ARTICLE + ' The ministry banned rainwater sales.')} == {'fc-1', 'fc-4'}
+
+def test_append_to_the_mapped_path_and_reload(tmp_path, monkeypatch):
+    path = str(tmp_path / 'claims')
+    built = ClaimIndex()
+    built.add_batch(CLAIMS + FILLER)
+    built.save(path)
+
+    # Serving workers keep querying the mapped files while an append rewrites the index
+    monkeypatch.setattr(claim_index, 'CLAIM_INDEX_PATH', path)
+    monkeypatch.setattr(claim_index, '_index', ClaimIndex.load(path))
+    serving = claim_index._index
+    assert not claim_index.reload_claim_index()
+    for extra in ([], [{'id': 'fc-4', 'claim': 'The health ministry banned rainwater sales', 'rating': 'False'}]):
+        appended = ClaimIndex.load(path)
+        appended.add_batch(extra)
+        appended.save(path)
+        assert [match['id'] for match in serving.query(ARTICLE)] == ['fc-1']
+        assert [match['id'] for match in ClaimIndex.load(path).query(ARTICLE)] == ['fc-1']
+    assert len(ClaimIndex.load(path)) == 304
+
+    assert claim_index.reload_claim_index()
+    assert claim_index._index is not serving and len(claim_index._index) == 304
+    assert 'fc-4' in {match['id'] for match in claim_index._index.query('The ministry banned rainwater sales.')}
+
+def test_duplicates_are_skipped_and_matches_penalize(monkeypatch):
+    index = ClaimIndex()
+    index.add_batch(CLAIMS)
+    # Known ids and texts without an id already indexed are skipped, as are claims too short to match
+    assert index.add_batch([CLAIMS[0], {'claim': CLAIMS[1]['claim'], 'rating': 'False'},
+                            {'claim': 'Vaccines', 'rating': 'False'}]) == 1
+    assert index.add_batch([{'claim': CLAIMS[1]['claim'], 'rating': 'False'},
+                            {'id': 'fc-1', 'claim': 'An edited claim that rainwater cures covid', 'rating': 'False'}]) == 0
+    assert len(index) == 4
+    assert claim_penalty(0) == 0.0
+    assert claim_penalty(5) == MAX_CLAIM_PENALTY
+
+    import app as app_module
+    monkeypatch.setattr(app_module, 'get_claim_index', lambda: index)
+    monkeypatch.setattr(app_module, 'get_graph_sink', lambda: _NullSink())
+    monkeypatch.setattr(app_module, 'get_link_pipeline', lambda: _NullSink())
+    duplicates = NearDuplicateIndex()
+    monkeypatch.setattr(app_module, 'get_duplicate_index', lambda: duplicates)
+    article = {'title': 'Story', 'domain': 'news.example.com', 'links': [], 'author': 'Jane Doe',
+               'date': '2024-01-01', 'text': ARTICLE * 4}
+    clean = {**article, 'text': 'The weather was mild and the trains ran on time. ' * 12}
+    result = app_module.score_article_data('https://news.example.com/rain', article)
+    assert [claim['id'] for claim in result['debunked_claims']] == ['fc-1']
+    assert result['debunked_claims'][0]['url'] == 'https://factcheck.example/rain'
+    unflagged = app_module.score_article_data('https://news.example.com/weather', clean)
+    assert unflagged['debunked_claims'] == []
+    assert unflagged['score'] - result['score'] == pytest.approx(claim_penalty(1) * 100)
+
+def test_only_debunked_claims_cited_fact_checks_are_exempt(monkeypatch):
+    index = ClaimIndex()
+    true_claim = {'id': 'fc-5', 'claim': 'Handwashing with soap reduces spread of influenza viruses', 'rating': 'True'}
+    assert index.add_batch(CLAIMS + [true_claim, {**true_claim, 'id': 'fc-6', 'rating': 'Half true'}]) == 3
+    assert index.query('Handwashing with soap reduces the spread of influenza viruses, doctors say.') == []
+    assert is_debunked('Mostly  FALSE.') and is_debunked('Pants on Fire!') and not is_debunked(None)
+
+    rain = CLAIMS[0]
+    assert cites_fact_check(rain, 'news.example.com', ['https://www.factcheck.example/rain/?ref=x'])
+    assert cites_fact_check(rain, 'www.factcheck.example', [])
+    assert not cites_fact_check(rain, 'news.example.com', ['https://factcheck.example/other'])
+
+    import app as app_module
+    monkeypatch.setattr(app_module, 'get_claim_index', lambda: index)
+    monkeypatch.setattr(app_module, 'get_graph_sink', lambda: _NullSink())
+    monkeypatch.setattr(app_module, 'get_link_pipeline', lambda: _NullSink())
+    duplicates = NearDuplicateIndex()
+    monkeypatch.setattr(app_module, 'get_duplicate_index', lambda: duplicates)
+    debunking = {'title': 'Fact check', 'domain': 'news.example.com', 'author': 'Jane Doe', 'date': '2024-01-01',
+                 'links': ['https://factcheck.example/rain'],
+                 'text': 'No, drinking rainwater does not cure COVID-19 within three days. ' * 10}
+    result = app_module.score_article_data('https://news.example.com/fact-check', debunking)
+    assert [(claim['id'], claim['cited']) for claim in result['debunked_claims']] == [('fc-1', True)]
+    assert result['debunked_claims'][0]['asserted'] is False
+
+    # Debunking text is not penalized even without the fact-check link
+    uncited = app_module.score_article_data('https://news.example.com/copy', {**debunking, 'links': ['https://other.example/story']})
+    assert [(claim['asserted'], claim['cited']) for claim in uncited['debunked_claims']] == [(False, False)]
+    assert uncited['score'] == result['score']
+    repeating = app_module.score_article_data('https://news.example.com/repeat', {
+        **debunking, 'links': ['https://other.example/story'],
+        'text': 'Drinking rainwater cures COVID-19 within three days, readers were told. ' * 10})
+    assert [(claim['asserted'], claim['cited']) for claim in repeating['debunked_claims']] == [(True, False)]
+    assert result['score'] - repeating['score'] == pytest.approx(claim_penalty(1) * 100)
+
+def test_asserts_claim_needs_one_unnegated_sentence():
+    claim = CLAIMS[0]['claim']
+    assert asserts_claim(claim, split_sentences(ARTICLE))
+    assert not asserts_claim(claim, split_sentences("Rainwater doesn't cure COVID-19 within three days."))
+    assert not asserts_claim(claim, split_sentences('It is a myth that drinking rainwater cures COVID-19 within three days.'))
+    # The words spread over unrelated sentences are no statement of the claim
+    assert not asserts_claim(claim, split_sentences('Drinking water matters. Rainwater tanks filled. '
+                                                    'COVID-19 cases fell. Three days passed. Cures are rare.'))
+    # Negations the claim itself contains are part of the statement
+    assert asserts_claim('Measles vaccines do not prevent infection', split_sentences('Measles vaccines do not prevent infection, he said.'))
+
+def test_additions_never_outrun_the_prefixes():
+    index = ClaimIndex()
+    index.add_batch(CLAIMS + FILLER)
+    index.compact()
+    # Claims sharing one word lower its idf; the index compacts before prefixes could miss a match
+    for i in range(40):
+        index.add_batch([{'id': f"new-{i}", 'claim': f"rainwater story{i} source{i} detail{i}", 'rating': 'False'}])
+        assert index.prefix_drift() < index.max_prefix_drift
+        assert [match['id'] for match in index.query(ARTICLE)] == ['fc-1']
+        assert f"new-{i}" in {match['id'] for match in index.query(f"rainwater story{i} source{i} detail{i}")}
@@ -0,0 +1,81 @@
+import base64
+import gzip
+import pytest
+from client_content import MAX_SNAPSHOT_BYTES, parse_client_content
+
+class _RecordingSink:
+    def __init__(self):
+        self.items = []
+
+    def submit(self, *args, **kwargs):
+        self.items.append(args)
+        return True
+
+    def submit_duplicates(self, *args, **kwargs):
+        self.items.append(args)
+        return 0
+
+@pytest.fixture
+def client(monkeypatch):
+    import app as app_module
+
+    def no_fetch(url):
+        raise AssertionError("client content must not be fetched")
+
+    monkeypatch.setattr(app_module, 'scrape_article', no_fetch)
+    sink = _RecordingSink()
+    monkeypatch.setattr(app_module, 'get_graph_sink', lambda: sink)
+    monkeypatch.setattr(app_module, 'get_link_pipeline', lambda: sink)
+    app_module.get_cache().clear()
+    client = app_module.app.test_client()
+    client.sink = sink
+    return client
+
+def test_content_mode_shares_analysis(client):
+    body = {
+        'url': 'https://news.example.com/story?utm_source=x',
+        'content': {'title': 'Story', 'text': 'x' * 600, 'author': 'Jane Doe'}
+    }
+    first = client.post('/analyze', json=body).get_json()
+    second = client.post('/analyze', json=body).get_json()
+    assert first == second
+    assert first['title'] == 'Story'
+    assert first['domain'] == 'news.example.com'
+    assert first['score'] == 70.0
+    assert first['fingerprint'].startswith('content:')
+    assert first['unverified'] is True
+
+def test_client_content_is_not_recorded(client):
+    import app as app_module
+    text = ' '.join(f"word{i % 97} term{i % 89}" for i in range(300))
+    duplicates = len(app_module.get_duplicate_index())
+    reputation = app_module.get_reputation_index().stats()
+    body = {'url': 'https://victim.example/story', 'content': {'title': 'Story', 'text': text,
+                                                               'links': ['https://other.example/a']}}
+    assert client.post('/analyze', json=body).status_code == 200
+    # Nothing about the claimed page reaches the graph, the duplicate index or the reputations
+    assert client.sink.items == []
+    assert len(app_module.get_duplicate_index()) == duplicates
+    assert app_module.get_reputation_index().stats() == reputation
+
+def test_html_snapshot_mode(client):
+    html = '<html><h1>Snapshot</h1><article><p class="byline">By Jane</p><p>Body</p></article></html>'
+    body = {
+        'url': 'https://news.example.com/story',
+        'html_gzip': base64.b64encode(gzip.compress(html.encode())).decode()
+    }
+    response = client.post('/analyze', json=body)
+    assert response.status_code == 200
+    assert response.get_json()['title'] == 'Snapshot'
+
+    body['html_gzip'] = 'not base64!'
+    assert client.post('/analyze', json=body).status_code == 400
+
+def test_snapshot_size_limit():
+    bomb = base64.b64encode(gzip.compress(b'a' * (MAX_SNAPSHOT_BYTES + 10))).decode()
+    with pytest.raises(ValueError):
+        parse_client_content('https://example.com/', {'html_gzip': bomb})
+
+if __name__ == "__main__":
+    test_snapshot_size_limit()
+    print("Snapshot limit OK")
@@ -0,0 +1,78 @@
+import threading
+import time
+from cache import normalize_url
+from coalesce import CanonicalUrls, SingleFlight
+
+def test_normalize_strips_tracking_params():
+    url = 'https://News.example.com/story?utm_source=tw&id=7&fbclid=abc&UTM_Medium=x#comments'
+    assert normalize_url(url) == 'https://news.example.com/story?id=7'
+
+def test_single_flight_coalesces_concurrent_calls():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return {'score': 80.0}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do('k', slow))) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    while flight.stats()['coalesced'] < 9:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{'score': 80.0}] * 10
+    # Every caller gets its own response dict, also inside (response, status) tuples
+    assert len({id(result) for result in results}) == 10
+    tuples = []
+    release.clear()
+    threads = [threading.Thread(target=lambda: tuples.append(flight.do('t', lambda: (slow(), 200))))
+               for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    while flight.stats()['coalesced'] < 11:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert [status for _, status in tuples] == [200] * 3
+    assert len({id(response) for response, _ in tuples}) == 3
+    assert flight.stats() == {'executed': 2, 'coalesced': 11, 'in_flight': 0}
+
+def test_single_flight_shares_errors():
+    flight = SingleFlight()
+    try:
+        flight.do('k', lambda: 1 / 0)
+    except ZeroDivisionError:
+        pass
+    assert flight.do('k', lambda: 'fresh') == 'fresh'
+
+def test_canonical_urls():
+    canonical = CanonicalUrls(max_entries=2)
+    canonical.record('https://m.example.com/a?utm_source=x', 'https://example.com/a')
+    assert canonical.resolve('https://m.example.com/a#top') == 'https://example.com/a'
+    canonical.record('https://www.example.com/1', 'https://example.com/1')
+    canonical.record('https://amp.example.com/2', 'https://example.com/2')
+    assert canonical.resolve('https://m.example.com/a') == 'https://m.example.com/a'
+    assert len(canonical) == 2
+
+def test_canonical_urls_ignore_other_domains():
+    canonical = CanonicalUrls()
+    canonical.record('https://evil.example/x', 'https://bbc.com/x')
+    canonical.record('https://bbc.com/y', 'https://evil.example/y')
+    canonical.record('https://news.evil.co.uk/z', 'https://bbc.co.uk/z')
+    assert len(canonical) == 0
+    assert canonical.resolve('https://evil.example/x') == 'https://evil.example/x'
+    canonical.record('https://www.bbc.co.uk/news/1', 'https://bbc.co.uk/news/1')
+    assert canonical.resolve('https://www.bbc.co.uk/news/1') == 'https://bbc.co.uk/news/1'
+
+if __name__ == "__main__":
+    test_single_flight_coalesces_concurrent_calls()
+    print("Single flight OK")
@@ -0,0 +1,71 @@
+import glob
+import os
+from bs4 import BeautifulSoup
+from extractor import IncrementalExtractor, extract_article
+from scraper import ArticleScraper, parse_scraped_page
+
+PAGES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures', 'pages')
+
+def test_extractor_matches_soup_on_fixtures():
+    scraper = ArticleScraper.__new__(ArticleScraper)
+    for path in sorted(glob.glob(os.path.join(PAGES_DIR, '*.html'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        soup = BeautifulSoup(html, 'html.parser')
+        for backend in ('lxml', 'html.parser'):
+            fields = extract_article(html, backend)
+            assert fields['title'] == scraper._extract_title(soup)
+            assert fields['author'] == scraper._extract_author(soup)
+            assert fields['date'] == scraper._extract_date(soup)
+            assert fields['text'] == scraper._extract_text(soup)
+            assert fields['links'] == [a['href'] for a in soup.find_all('a', href=True)]
+
+def test_incremental_extractor_matches_full_parse():
+    with open(os.path.join(PAGES_DIR, 'bbc_like.html'), 'r', encoding='utf-8') as f:
+        html = f.read()
+    for backend in ('lxml', 'html.parser'):
+        full = extract_article(html, backend)
+        for extractor in (IncrementalExtractor(max_paragraphs=None, backend=backend),
+                          IncrementalExtractor(backend=backend)):
+            for start in range(0, len(html), 1000):
+                assert not extractor.feed(html[start:start + 1000])
+            assert extractor.close() == full
+
+        # With a paragraph budget the header fields are kept and parsing stops early
+        extractor = IncrementalExtractor(max_paragraphs=2, backend=backend)
+        for start in range(0, len(html), 1000):
+            if extractor.feed(html[start:start + 1000]):
+                break
+        partial = extractor.close()
+        assert extractor.stopped_early
+        for key in ('title', 'author', 'date'):
+            assert partial[key] == full[key]
+        assert full['text'].startswith(partial['text'])
+
+def test_extractor_selector_priority():
+    html = """<html><head><title>Page</title>
+    <meta name="author" content="Meta Author"></head><body>
+    <div class="article-content"><p>ignored</p></div>
+    <article><span class="byline">Byline Author</span>
+    <p>First <b>para</b></p><script>var x = 1;</script><p>Second</p></article>
+    <meta property="article:published_time" content="2024-01-01">
+    </body></html>"""
+    fields = extract_article(html)
+    assert fields['title'] == ''
+    assert fields['page_title'] == 'Page'
+    assert fields['author'] == 'Byline Author'
+    assert fields['date'] == '2024-01-01'
+    assert fields['text'] == 'First para Second'
+
+def test_parse_scraped_page_links():
+    html = '<h1>T</h1><a href="/a">a</a><a href="https://x.org/b">b</a><a href="#c">c</a>'
+    result = parse_scraped_page(html, 'https://news.example.com/story')
+    assert result['title'] == 'T'
+    assert result['domain'] == 'news.example.com'
+    assert result['links'] == ['https://news.example.com/a', 'https://x.org/b']
+
+if __name__ == "__main__":
+    test_extractor_matches_soup_on_fixtures()
+    test_extractor_selector_priority()
+    test_parse_scraped_page_links()
+    print("Extractor OK")
@@ -0,0 +1,119 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from fetcher import ContentRejected, Fetcher
+from extractor import IncrementalExtractor
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = b'<html><h1>Hello</h1></html>'
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class _StreamHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    chunks_sent = 0
+
+    def do_GET(self):
+        if self.path == '/image':
+            self._send_headers('image/png', b'\x89PNG')
+            self.wfile.write(b'\x89PNG')
+            return
+        if self.path == '/latin1':
+            body = '<html><head><meta charset="iso-8859-1"></head><h1>Caf\u00e9</h1></html>'.encode('latin-1')
+            self._send_headers('text/html', body)
+            self.wfile.write(body)
+            return
+        # Endless chunked article: header, then paragraphs forever
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        head = ('<html><h1>Endless</h1><span class="author">A. Writer</span>'
+                '<time>2024-01-01</time><article>').encode()
+        try:
+            self._chunk(head)
+            while type(self).chunks_sent < 10000:
+                type(self).chunks_sent += 1
+                self._chunk(b'<p>' + 'caf\u00e9 '.encode() * 200 + b'</p>')
+            self._chunk(b'')
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _send_headers(self, content_type, body):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+
+    def _chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+    def log_message(self, format, *args):
+        pass
+
+def test_fetcher_reuses_connections():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    fetcher = Fetcher(max_retries=0)
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/article"
+        for _ in range(5):
+            response = fetcher.get(url)
+            assert response.status_code == 200
+            assert response.request.headers['User-Agent'].startswith('Mozilla/5.0')
+
+        stats = fetcher.stats()
+        assert stats['requests'] == 5
+        assert stats['connections'] == 1
+        assert stats['reused'] == 4
+    finally:
+        fetcher.close()
+        server.shutdown()
+
+def test_fetch_html_limits():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _StreamHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    fetcher = Fetcher(max_retries=0)
+    base = f"http://127.0.0.1:{server.server_port}"
+    try:
+        with pytest.raises(ContentRejected):
+            fetcher.fetch_html(f"{base}/image", lambda text: False)
+
+        # An endless page is cut off at the size limit
+        with pytest.raises(ContentRejected):
+            fetcher.fetch_html(f"{base}/endless", lambda text: False, max_bytes=256 * 1024)
+
+        # The extractor stops the download once it has what it needs
+        extractor = IncrementalExtractor(max_paragraphs=5)
+        fetcher.fetch_html(f"{base}/endless", extractor.feed)
+        fields = extractor.close()
+        assert extractor.stopped_early
+        assert fields['title'] == 'Endless'
+        assert fields['author'] == 'A. Writer'
+        assert fields['text'].startswith('caf\u00e9 ')
+
+        stats = fetcher.stats()['pages']
+        assert stats['rejected'] == 2
+        assert stats['stopped_early'] == 1
+        assert stats['bytes'] < 256 * 1024
+
+        # Without a header charset the page's <meta charset> is used
+        extractor = IncrementalExtractor()
+        fetcher.fetch_html(f"{base}/latin1", extractor.feed)
+        assert extractor.close()['title'] == 'Caf\u00e9'
+    finally:
+        fetcher.close()
+        server.shutdown()
+
+if __name__ == "__main__":
+    test_fetcher_reuses_connections()
+    print("Fetcher connection reuse OK")
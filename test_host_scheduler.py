@@ -0,0 +1,117 @@
+import time
+import pytest
+import requests
+from extractor import IncrementalExtractor
+from fetcher import Fetcher
+from host_scheduler import HostScheduler, HostUnavailable, TokenBucket
+from standin_server import start_origin_server
+
+def _fetch(fetcher, url):
+    return fetcher.fetch_html(url, IncrementalExtractor().feed)
+
+def test_token_bucket_waits():
+    now = [0.0]
+    bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0])
+    assert [bucket.reserve() for _ in range(4)] == [0.0, 0.0, 0.5, 1.0]
+    now[0] = 1.0
+    assert bucket.reserve() == 0.5
+
+def test_concurrency_limit_fails_fast():
+    scheduler = HostScheduler(max_concurrency=1, max_wait=0.05, rate=0)
+    lease = scheduler.acquire('http://busy.example/a')
+    with pytest.raises(HostUnavailable, match='saturated'):
+        scheduler.acquire('http://busy.example/b')
+    # Other hosts are unaffected
+    scheduler.release(scheduler.acquire('http://other.example/a'))
+    scheduler.release(lease)
+    scheduler.release(scheduler.acquire('http://busy.example/b'))
+
+def test_flaky_host_opens_circuit_and_recovers():
+    origin, _ = start_origin_server(error_rate=1.0, seed=1)
+    scheduler = HostScheduler(failure_threshold=3, cooldown=0.2, rate=0)
+    fetcher = Fetcher(max_retries=0, scheduler=scheduler)
+    url = f"{origin.base_url}/bbc_like.html"
+    host = url.split('/')[2]
+    try:
+        for _ in range(3):
+            with pytest.raises(requests.HTTPError):
+                _fetch(fetcher, url)
+        # Open: fail fast without contacting the host
+        with pytest.raises(HostUnavailable) as error:
+            _fetch(fetcher, url)
+        assert 0 < error.value.retry_after <= 0.2
+        assert origin.requests == 3
+        assert scheduler.stats()[host]['state'] == 'open'
+
+        # A failed probe reopens the circuit for twice as long
+        time.sleep(0.25)
+        with pytest.raises(requests.HTTPError):
+            _fetch(fetcher, url)
+        with pytest.raises(HostUnavailable) as error:
+            _fetch(fetcher, url)
+        assert error.value.retry_after > 0.2
+
+        time.sleep(0.45)
+        origin.error_rate = 0.0
+        assert _fetch(fetcher, url).status_code == 200
+        stats = scheduler.stats()[host]
+        assert stats['state'] == 'closed'
+        assert stats['failures'] == 4 and stats['rejected'] == 2
+    finally:
+        fetcher.close()
+        origin.shutdown()
+
+def test_timeouts_adapt_to_host_latency():
+    fast, _ = start_origin_server()
+    slow, _ = start_origin_server(latency=0.3)
+    scheduler = HostScheduler(min_timeout=0.1, max_timeout=5.0, rate=0)
+    fetcher = Fetcher(max_retries=0, scheduler=scheduler)
+    try:
+        for _ in range(5):
+            _fetch(fetcher, f"{fast.base_url}/bbc_like.html")
+        for _ in range(3):
+            _fetch(fetcher, f"{slow.base_url}/bbc_like.html")
+        stats = fetcher.stats()['scheduler']
+        assert stats[fast.base_url[7:]]['timeout'] < 0.3
+        assert stats[slow.base_url[7:]]['timeout'] >= 0.3
+
+        # A fast host that hangs is given up on after its own short timeout
+        fast.latency = 2.0
+        start = time.perf_counter()
+        with pytest.raises((requests.Timeout, requests.ConnectionError)):
+            _fetch(fetcher, f"{fast.base_url}/bbc_like.html")
+        assert time.perf_counter() - start < 1.0
+    finally:
+        fetcher.close()
+        fast.shutdown()
+        slow.shutdown()
+
+class _NullSink:
+    def submit(self, *args, **kwargs):
+        return True
+
+    def submit_duplicates(self, *args, **kwargs):
+        return 0
+
+def test_analyze_degrades_while_host_is_down(monkeypatch):
+    import app as app_module
+    import cache
+
+    origin, _ = start_origin_server(error_rate=1.0)
+    fetcher = Fetcher(max_retries=0, scheduler=HostScheduler(failure_threshold=1, cooldown=30, rate=0))
+    monkeypatch.setattr(cache, 'get_fetcher', lambda: fetcher)
+    monkeypatch.setattr(app_module, 'get_graph_sink', lambda: _NullSink())
+    monkeypatch.setattr(app_module, 'get_link_pipeline', lambda: _NullSink())
+    client = app_module.app.test_client()
+    try:
+        first = client.post('/analyze', json={'url': f"{origin.base_url}/bbc_like.html"})
+        assert first.status_code == 400
+        second = client.post('/analyze', json={'url': f"{origin.base_url}/who_like.html"})
+        assert second.status_code == 503
+        body = second.get_json()
+        assert body['degraded'] and body['domain_score'] == 50.0
+        assert int(second.headers['Retry-After']) >= 29
+        assert origin.requests == 1
+    finally:
+        fetcher.close()
+        origin.shutdown()
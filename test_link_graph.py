@@ -0,0 +1,61 @@
+from link_graph import LinkGraphPipeline, crawl, extract_references
+
+def test_extract_references():
+    links = [
+        'https://news.example.com/other-story',
+        'https://www.who.int/news/item/1#section',
+        'https://www.who.int/news/item/1',
+        'https://www.bbc.com/',
+        'https://www.bbc.com',
+    ]
+    refs = extract_references('https://news.example.com/story?utm=1', links)
+    assert refs == [
+        {'source': 'https://news.example.com/story?utm=1',
+         'target': 'https://www.who.int/news/item/1', 'kind': 'article'},
+        {'source': 'https://news.example.com/story?utm=1',
+         'target': 'bbc.com', 'kind': 'domain'},
+    ]
+
+class _FakeGraph:
+    def __init__(self):
+        self.articles = []
+        self.references = []
+
+    def ingest_articles(self, articles, batch_size=500):
+        self.articles.extend(articles)
+
+    def add_references(self, references, batch_size=1000):
+        self.references.extend(references)
+        return len(references)
+
+    def close(self):
+        pass
+
+def test_crawl_bounded_depth():
+    # a.test -> b.test -> c.test -> d.test
+    chain = {'https://a.test/1': 'https://b.test/1', 'https://b.test/1': 'https://c.test/1',
+             'https://c.test/1': 'https://d.test/1', 'https://d.test/1': 'https://e.test/1'}
+    fetched = []
+
+    def fake_scrape(url):
+        fetched.append(url)
+        return {'title': url, 'domain': url.split('/')[2], 'links': [chain[url]]}
+
+    graph = _FakeGraph()
+    pipeline = LinkGraphPipeline(lambda: graph, flush_interval=0.01)
+    from scoring import GraphSink
+    sink = GraphSink(lambda: graph, flush_interval=0.01)
+    stats = crawl(['https://a.test/1'], max_depth=2, scrape=fake_scrape,
+                  pipeline=pipeline, article_sink=sink)
+    pipeline.close()
+    sink.close()
+
+    assert fetched == ['https://a.test/1', 'https://b.test/1', 'https://c.test/1']
+    assert stats == {'pages': 3, 'failed': 0, 'edges': 3, 'depth': 2}
+    assert len(graph.articles) == 3
+    assert [r['target'] for r in graph.references] == \
+        ['https://b.test/1', 'https://c.test/1', 'https://d.test/1']
+
+if __name__ == "__main__":
+    test_extract_references()
+    print("Reference extraction OK")
@@ -0,0 +1,88 @@
+import logging
+import os
+import pstats
+from metrics import MetricsRegistry, RequestProfiler, log_sampled
+
+class _NullSink:
+    def submit(self, *args, **kwargs):
+        return True
+
+    def submit_duplicates(self, *args, **kwargs):
+        return 0
+
+def test_registry_histograms_and_prometheus():
+    registry = MetricsRegistry(buckets=(0.001, 0.01, 0.1))
+    for seconds in (0.0005, 0.005, 0.005, 0.05):
+        registry.observe('fetch', seconds)
+    registry.increment('cache_hits', 3)
+    with registry.timer('score'):
+        pass
+
+    fetch = registry.snapshot()['stages']['fetch']
+    assert fetch['count'] == 4
+    assert fetch['buckets'] == [(0.001, 1), (0.01, 3), (0.1, 4)]
+    assert fetch['p50_ms'] == 10.0
+    assert registry.snapshot()['counters'] == {'cache_hits': 3}
+
+    text = registry.render_prometheus()
+    assert 'newsbuster_stage_seconds_bucket{stage="fetch",le="0.01"} 3' in text
+    assert 'newsbuster_stage_seconds_count{stage="score"} 1' in text
+    assert 'newsbuster_events_total{event="cache_hits"} 3' in text
+
+def test_log_sampled(caplog):
+    logger = logging.getLogger('test_metrics')
+    with caplog.at_level(logging.INFO, logger='test_metrics'):
+        log_sampled(logger, 'skipped', rate=0.0, url='x')
+        log_sampled(logger, 'kept', rate=1.0, url='x')
+    assert [r.getMessage() for r in caplog.records] == ['{"event": "kept", "url": "x"}']
+
+def test_metrics_endpoint_and_profiling(monkeypatch, tmp_path):
+    import app as app_module
+    monkeypatch.setattr(app_module, 'get_graph_sink', lambda: _NullSink())
+    monkeypatch.setattr(app_module, 'get_link_pipeline', lambda: _NullSink())
+    monkeypatch.setattr(app_module, 'profiler', RequestProfiler(str(tmp_path)))
+    app_module.get_cache().clear()
+    client = app_module.app.test_client()
+
+    html = '<html><h1>T</h1><article><p class="byline">By Jane</p><p>Body</p></article></html>'
+    response = client.post('/analyze', json={'url': 'https://news.example.com/m', 'html': html},
+                           headers={'X-Profile': '1'})
+    assert response.status_code == 200
+    assert os.path.exists(response.headers['X-Profile-File'])
+    pstats.Stats(response.headers['X-Profile-File'])
+
+    stages = client.get('/metrics?format=json').get_json()['stages']
+    for stage in ('parse', 'score', 'request_analyze'):
+        assert stages[stage]['count'] >= 1
+    text = client.get('/metrics').get_data(as_text=True)
+    assert 'newsbuster_stage_seconds_count{stage="request_analyze"}' in text
+    # Requests without the header are not profiled
+    assert 'X-Profile-File' not in client.get('/health').headers
+
+    # Streamed batch responses are profiled until their body is closed
+    response = client.post('/analyze/batch', json={'urls': ['not-a-url']}, headers={'X-Profile': '1'})
+    assert not os.path.exists(response.headers['X-Profile-File'])
+    assert response.get_data(as_text=True).count('\n') == 1
+    response.close()
+    functions = {name for _, _, name in pstats.Stats(response.headers['X-Profile-File']).stats}
+    assert 'generate' in functions
+
+def test_profiler_runs_one_profile_at_a_time(tmp_path):
+    profiler = RequestProfiler(str(tmp_path))
+    profile = profiler.start()
+    assert profile is not None and profiler.start() is None
+
+    def body():
+        yield b'chunk'
+
+    wrapped = profiler.wrap(body(), profile, profiler.path_for('/analyze/batch'))
+    assert list(wrapped) == [b'chunk'] and profiler.start() is None
+    wrapped.close()
+    wrapped.close()
+    assert len(os.listdir(tmp_path)) == 1
+    profiler.stop(profiler.start(), profiler.path_for('/analyze'))
+    assert len(os.listdir(tmp_path)) == 2
+
+if __name__ == "__main__":
+    test_registry_histograms_and_prometheus()
+    print("Metrics registry OK")
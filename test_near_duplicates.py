@@ -0,0 +1,116 @@
+import random
+import os
+import time
+import near_duplicates
+from near_duplicates import NearDuplicateIndex, journal_path, merge_journal, other_domains, shingles
+from scoring import MIN_DUPLICATE_DOMAINS, duplicate_penalty
+
+def _text(seed: int, length: int = 300) -> str:
+    rng = random.Random(seed)
+    return ' '.join(f"word{rng.randrange(3000)}" for _ in range(length))
+
+def test_shingles_are_stable_and_case_insensitive():
+    assert len(shingles('one two three four five six')) == 2
+    assert (shingles('One TWO three four five') == shingles('one two three four five')).all()
+    assert len(shingles('')) == 0
+
+def test_match_and_add_finds_edited_copies():
+    index = NearDuplicateIndex()
+    original = _text(1)
+    copy = original.replace(original.split()[20], 'edited', 1) + ' syndicated from the wire'
+    assert index.match_and_add('https://a.example/story', original) == []
+    matches = index.match_and_add('https://b.example/copy', copy)
+    assert [url for url, _ in matches] == ['https://a.example/story']
+    assert matches[0][1] >= index.threshold
+    assert index.match_and_add('https://c.example/other', _text(2)) == []
+    # Re-analyzing a URL does not match itself or add it twice
+    assert [url for url, _ in index.match_and_add('https://a.example/story', original)] == ['https://b.example/copy']
+    assert len(index) == 3
+    # Short bodies are neither indexed nor matched
+    assert index.match_and_add('https://d.example/short', 'Subscribe to read') == []
+    assert len(index) == 3
+
+def test_save_compact_and_mmap_load(tmp_path):
+    index = NearDuplicateIndex()
+    texts = [_text(seed) for seed in range(50)]
+    index.add_batch([f"https://site{i}.example/a" for i in range(50)], texts)
+    index.save(str(tmp_path))
+
+    loaded = NearDuplicateIndex.load(str(tmp_path))
+    assert len(loaded) == 50 and loaded.stats()['overlay_articles'] == 0
+    assert [url for url, _ in loaded.query(texts[7])] == ['https://site7.example/a']
+
+    # New articles go to the overlay and are matched next to the mapped arrays
+    loaded.match_and_add('https://new.example/a', texts[3] + ' more')
+    assert {url for url, _ in loaded.query(texts[3])} == {'https://site3.example/a', 'https://new.example/a'}
+    loaded.compact()
+    assert loaded.stats()['overlay_articles'] == 0
+    assert {url for url, _ in loaded.query(texts[3])} == {'https://site3.example/a', 'https://new.example/a'}
+
+def test_serving_indexes_journal_and_follow_merges(tmp_path, monkeypatch):
+    path = str(tmp_path / 'index')
+    monkeypatch.setattr(near_duplicates, 'JOURNAL_SETTLE', 0)
+    # Two worker processes serving the same (not yet built) index
+    first, second = NearDuplicateIndex.open(path), NearDuplicateIndex.open(path)
+    original, other = _text(1), _text(2)
+    assert first.match_and_add('https://a.example/story', original) == []
+    assert second.match_and_add('https://b.example/other', other) == []
+    # Each overlay is private until the journal is merged
+    assert second.query(original) == []
+
+    assert merge_journal(path) == 2
+    assert not os.path.exists(journal_path(path))
+    assert second.refresh() and not second.refresh()
+    assert second.stats()['overlay_articles'] == 0 and len(second) == 2
+    assert [url for url, _ in second.query(original)] == ['https://a.example/story']
+
+    # A restarted process replays what was journaled since the merge
+    second.match_and_add('https://c.example/copy', original + ' syndicated')
+    restarted = NearDuplicateIndex.open(path)
+    assert {url for url, _ in restarted.query(original)} == {'https://a.example/story', 'https://c.example/copy'}
+
+    # A full overlay is never compacted in the request path; articles are only journaled
+    monkeypatch.setattr(near_duplicates, 'MAX_LIVE_OVERLAY', 1)
+    restarted.match_and_add('https://d.example/new', _text(3))
+    assert restarted.stats()['overlay_articles'] == 1
+    assert merge_journal(path) == 2
+    restarted.refresh()
+    assert len(restarted) == 4 and restarted.stats()['overlay_articles'] == 0
+
+def test_refresh_keeps_articles_added_while_loading(tmp_path, monkeypatch):
+    path = str(tmp_path / 'index')
+    monkeypatch.setattr(near_duplicates, 'JOURNAL_SETTLE', 0)
+    serving = NearDuplicateIndex.open(path)
+    serving.match_and_add('https://a.example/story', _text(1))
+    assert merge_journal(path) == 1
+    serving.match_and_add('https://b.example/story', _text(2))
+
+    # The new generation is loaded without the lock; a request adding an
+    # article meanwhile is neither blocked nor lost by the swap
+    load = NearDuplicateIndex.load
+    def load_during_request(path):
+        saved = load(path)
+        serving.match_and_add('https://c.example/story', _text(3))
+        return saved
+    monkeypatch.setattr(NearDuplicateIndex, 'load', staticmethod(load_during_request))
+    assert serving.refresh()
+    assert len(serving) == 3 and serving.stats()['overlay_articles'] == 2
+    assert [url for url, _ in serving.query(_text(3))] == ['https://c.example/story']
+    monkeypatch.setattr(NearDuplicateIndex, 'load', staticmethod(load))
+
+    # Requests never load generations themselves; the refresher thread does
+    assert merge_journal(path) == 2
+    serving.match_and_add('https://d.example/story', _text(4))
+    assert serving.stats()['overlay_articles'] == 3
+    serving.start_refresher(interval=0.01)
+    deadline = time.monotonic() + 5
+    while serving.stats()['overlay_articles'] != 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(serving) == 4 and serving.stats()['overlay_articles'] == 1
+
+def test_duplicate_domains_penalty():
+    matches = [('https://www.a.example/1', 0.9), ('https://a.example/2', 0.9),
+               ('https://b.example/1', 0.8), ('https://own.example/x', 1.0)]
+    assert other_domains(matches, 'www.own.example') == 2
+    assert duplicate_penalty(MIN_DUPLICATE_DOMAINS - 1) == 0.0
+    assert duplicate_penalty(MIN_DUPLICATE_DOMAINS) > 0
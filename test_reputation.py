@@ -0,0 +1,57 @@
+from reputation import DomainReputationIndex, domain_pagerank, normalize_domain
+import numpy as np
+
+def _sample_index():
+    article_scores = {
+        'https://www.bbc.com/news/1': 0.9,
+        'https://www.bbc.com/news/2': 0.7,
+        'https://who.int/report': 1.0,
+        'https://miraclecure.xyz/cure': 0.4,
+    }
+    references = [
+        ('https://www.bbc.com/news/1', 'https://who.int/report'),
+        ('https://miraclecure.xyz/cure', 'https://who.int/report'),
+        ('https://www.bbc.com/news/2', 'https://www.bbc.com/news/1'),
+    ]
+    return DomainReputationIndex.build(article_scores, references)
+
+def test_pagerank_favours_referenced_domains():
+    rank = domain_pagerank(['a', 'b', 'c'], [('a', 'c'), ('b', 'c')], np.ones(3))
+    assert rank.argmax() == 2
+    assert abs(rank.sum() - 1) < 1e-9
+
+def test_index_lookup_and_update():
+    index = _sample_index()
+    assert normalize_domain('WWW.BBC.com:443') == 'bbc.com'
+    assert index.lookup('www.who.int') > index.lookup('bbc.com') > index.lookup('miraclecure.xyz')
+    assert index.lookup('unknown.example') is None
+
+    before = index.lookup('miraclecure.xyz')
+    index.update('https://miraclecure.xyz/another', 1.0)
+    index.update('https://miraclecure.xyz/another', 1.0)
+    assert index.lookup('miraclecure.xyz') > before
+    assert index.stats()['overlay_domains'] == 1
+
+    # A first article moves a new domain from the neutral prior only as far as its evidence allows
+    index.update('https://new.example/a', 0.5)
+    assert index.lookup('new.example') == 50.0
+    index.update('https://weak.example/a', 0.2)
+    assert 40.0 < index.lookup('weak.example') < 50.0
+    empty = DomainReputationIndex()
+    empty.update('https://fresh.example/a', 0.9)
+    assert empty.lookup('fresh.example') > 50.0
+
+def test_index_save_and_mmap_load(tmp_path):
+    index = _sample_index()
+    index.build_seconds = 1.25
+    path = str(tmp_path / 'reputation.npy')
+    index.save(path)
+    loaded = DomainReputationIndex.load(path)
+    for domain in ('bbc.com', 'who.int', 'miraclecure.xyz'):
+        assert loaded.lookup(domain) == index.lookup(domain)
+    assert loaded.stats()['domains'] == 3
+    assert loaded.stats()['memory_bytes'] == index.stats()['memory_bytes']
+    assert loaded.stats()['build_seconds'] == 1.25
+
+if __name__ == "__main__":
+    print(_sample_index().stats())
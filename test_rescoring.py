@@ -0,0 +1,71 @@
+import cache
+from rescoring import DependencyIndex, article_keys
+from metrics import REGISTRY
+from scraper import ArticleScraper
+from standin_server import start_origin_server
+from trusted_authors import TrustedAuthors
+
+def test_dependency_index():
+    index = DependencyIndex(max_articles=2)
+    index.record('a', article_keys('https://x.example/a', 'By Jane Doe, BBC News', 'bbc'))
+    index.record('b', article_keys('https://y.example/b', 'John Doe', None))
+    assert index.lookup('author:bbc') == {'a'}
+    assert index.lookup_all(['token:jane', 'token:doe']) == {'a'}
+    assert index.lookup('token:doe') == {'a', 'b'}
+    index.record('c', article_keys('https://x.example/c', 'Jane Roe', None))
+    # 'a' was the least recently recorded
+    assert 'a' not in index and index.lookup('token:doe') == {'b'}
+    assert index.lookup('token:roe') == {'c'}
+
+def test_registry_change_rescores_cached_article(tmp_path, monkeypatch):
+    origin, _ = start_origin_server()
+    monkeypatch.setattr(cache, '_cache', cache.ResponseCache())
+    authors = TrustedAuthors(str(tmp_path / "trusted_authors.json"))
+    scraper = ArticleScraper(authors, rescore=False)
+    url = f"{origin.base_url}/bbc_like.html"
+    try:
+        article = scraper.analyze_article(url)
+        assert article['author'].startswith('Jane Doe') and not article['is_trusted_author']
+        other = scraper.analyze_article(f"{origin.base_url}/who_like.html")
+        fetched = origin.requests
+        rescored = REGISTRY.snapshot()['counters'].get('rescored', 0)
+
+        authors.add_trusted_author("jane", {"name": "Jane Doe", "aliases": []})
+        # Only the article with a matching byline is queued
+        assert scraper.rescorer.poll() == 1
+        assert scraper.rescorer.run_batch() == 1
+        article = scraper.analyze_article(url)
+        assert article['is_trusted_author'] and article['author_details']['name'] == 'Jane Doe'
+
+        authors.remove_trusted_author("jane")
+        scraper.rescorer.poll()
+        scraper.rescorer.run_batch()
+        assert not scraper.analyze_article(url)['is_trusted_author']
+        assert scraper.analyze_article(f"{origin.base_url}/who_like.html") == other
+
+        stats = scraper.rescorer.stats()
+        assert stats['rescored'] == 2 and stats['changed'] == 2 and stats['pending'] == 0
+        assert REGISTRY.snapshot()['counters']['rescored'] - rescored == 2
+
+        # An article dropped from the cache is processed but not counted as rescored
+        authors.add_trusted_author("jane", {"name": "Jane Doe", "aliases": []})
+        cache.get_cache().clear()
+        scraper.rescorer.poll()
+        assert scraper.rescorer.run_batch() == 1
+        stats = scraper.rescorer.stats()
+        assert stats['rescored'] == 2 and stats['evicted'] == 1
+        assert REGISTRY.snapshot()['counters']['rescored'] - rescored == 2
+        authors.remove_trusted_author("jane")
+        # Rescoring never refetched the pages
+        assert origin.requests == fetched
+
+        # A scraper with another registry keeps its own results
+        trusting = TrustedAuthors(str(tmp_path / "other_authors.json"))
+        trusting.add_trusted_author("jane", {"name": "Jane Doe", "aliases": []})
+        other_scraper = ArticleScraper(trusting, rescore=False)
+        assert other_scraper.analyze_article(url)['is_trusted_author']
+        assert not scraper.analyze_article(url)['is_trusted_author']
+        other_scraper.rescorer.close()
+    finally:
+        scraper.rescorer.close()
+        origin.shutdown()
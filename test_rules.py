@@ -0,0 +1,34 @@
+import pytest
+from rules import RULES, SelectorIndex, TextMatcher, WHO_MATCHER, parse_selector
+
+def test_parse_selector():
+    assert parse_selector('meta[name="author"]')[1:] == ('meta', None, 'name', 'author')
+    assert parse_selector('.byline')[1:] == (None, 'byline', None, None)
+    with pytest.raises(ValueError):
+        parse_selector('article > p')
+
+def test_selector_index_matches_only_candidates():
+    index = SelectorIndex(['.author', '[itemprop="author"]', 'meta[name="author"]', 'time'])
+    assert index.match('span', {'class': 'author x'}, {'author', 'x'}) == [0]
+    assert index.match('div', {'itemprop': 'author'}, set()) == [1]
+    assert index.match('meta', {'name': 'author', 'content': 'A'}, set()) == [2]
+    assert index.match('div', {'name': 'author'}, set()) == []
+    assert index.match('time', {}, set()) == [3]
+    assert index.selectors[2].is_meta
+
+def test_text_signals_overlapping_matches():
+    # The extension's text heuristics; "by 12 March 2024" is both a byline and a date
+    text_signals = TextMatcher(RULES['text_signals'])
+    assert text_signals.scan('Posted by 12 March 2024') == {'author', 'date'}
+    assert text_signals.scan('Studies show it works. Source: Example') == {'references'}
+    assert text_signals.scan('nothing to see') == set()
+
+def test_literal_matcher():
+    matcher = TextMatcher({'who': ['W.H.O.']}, literal=True)
+    assert matcher.search('the w.h.o. said')
+    assert not matcher.search('the wxhxox said')
+    assert WHO_MATCHER.search('World Health Organisation guidance')
+
+if __name__ == "__main__":
+    test_text_signals_overlapping_matches()
+    print("Text signals OK")
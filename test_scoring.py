@@ -0,0 +1,91 @@
+import random
+import time
+from scoring import GraphSink, count_references, score_article, score_batch
+
+def test_score_article_rules():
+    assert score_article({}) == 0.4
+    full = {'author': 'Jane Doe', 'date': '2024-01-01', 'text': 'x' * 501}
+    assert score_article(full, reference_count=2) == 1.0
+    assert score_article({**full, 'text': 'short'}, reference_count=0) == 0.7
+
+def test_score_batch_matches_single():
+    random.seed(3)
+    articles = [{
+        'author': random.choice(['Jane', '']),
+        'date': random.choice(['2024-01-01', '']),
+        'text': 'x' * random.randint(0, 1000)
+    } for _ in range(200)]
+    counts = [random.randint(0, 3) for _ in articles]
+    batch = score_batch(articles, counts)
+    assert list(batch) == [score_article(a, c) for a, c in zip(articles, counts)]
+    lengths = [len(a['text']) for a in articles]
+    stripped = [{'author': a['author'], 'date': a['date']} for a in articles]
+    assert list(score_batch(stripped, counts, lengths)) == list(batch)
+
+def test_count_references():
+    links = ['https://news.example.com/a', 'https://who.int/report', 'https://bbc.co.uk/x']
+    assert count_references(links, 'news.example.com') == 2
+    # Share buttons, ads, assets, homepages and repeats are not references
+    furniture = ['https://www.facebook.com/sharer/sharer.php?u=x', 'https://twitter.com/intent/tweet',
+                 'https://cdn.example.net/app.js', 'https://other.example/logo.png',
+                 'https://securepubads.g.doubleclick.net/tag', 'https://www.bbc.co.uk/', 'https://who.int/report/']
+    assert count_references(links + furniture, 'www.news.example.com') == 2
+
+class _FakeGraph:
+    def __init__(self):
+        self.batches = []
+
+    def ingest_articles(self, articles, batch_size=500):
+        self.batches.append(list(articles))
+        return {a['url']: 0.5 for a in articles}
+
+    def close(self):
+        pass
+
+def test_graph_sink_batches_writes():
+    graph = _FakeGraph()
+    sink = GraphSink(lambda: graph, batch_size=10, flush_interval=0.05)
+    for i in range(25):
+        assert sink.submit({'url': f'https://example.com/{i}'})
+    sink.close()
+    assert sum(len(b) for b in graph.batches) == 25
+    assert max(len(b) for b in graph.batches) <= 10
+    assert sink.stats()['written'] == 25
+
+def test_graph_sink_drops_when_graph_down():
+    def unavailable():
+        raise ConnectionError("Neo4j is down")
+
+    sink = GraphSink(unavailable, flush_interval=0.01, retry_delay=0.01)
+    start = time.perf_counter()
+    sink.submit({'url': 'https://example.com/a'})
+    assert time.perf_counter() - start < 0.01
+    sink.close()
+    assert sink.stats()['dropped'] == 1
+
+def test_graph_sink_closes_failed_connection():
+    class _FailingGraph(_FakeGraph):
+        closed = False
+
+        def ingest_articles(self, articles, batch_size=500):
+            raise ConnectionError("connection reset")
+
+        def close(self):
+            self.closed = True
+
+    graphs = []
+    def connect():
+        graphs.append(_FailingGraph())
+        return graphs[-1]
+
+    sink = GraphSink(connect, flush_interval=0.01, retry_delay=0.01)
+    sink.submit({'url': 'https://example.com/a'})
+    time.sleep(0.1)
+    sink.submit({'url': 'https://example.com/b'})
+    sink.close()
+    assert len(graphs) == 2 and all(graph.closed for graph in graphs)
+
+if __name__ == "__main__":
+    test_score_article_rules()
+    test_score_batch_matches_single()
+    print("Scoring OK")
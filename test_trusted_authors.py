@@ -0,0 +1,100 @@
+import json
+import trusted_authors
+from trusted_authors import TrustedAuthors, normalize_name
+
+def test_normalize_name():
+    assert normalize_name("  By Jane   Doe, BBC-News ") == "jane doe bbc news"
+    assert normalize_name("Written by J. Smith") == "j smith"
+
+def test_alias_and_byline_lookup(tmp_path):
+    authors = TrustedAuthors(str(tmp_path / "trusted_authors.json"))
+
+    assert authors.is_trusted_author("World Health Organisation")
+    assert authors.get_author_details("who")["name"] == "World Health Organization"
+    assert not authors.is_trusted_author("By Jane Doe, BBC News")
+
+    author_id, details = authors.lookup_author("By Jane Doe, BBC News")
+    assert author_id == "bbc" and details["name"] == "BBC"
+    assert authors.lookup_author("Jane Doe") is None
+
+    authors.add_trusted_author("jane", {"name": "Jane Doe", "aliases": ["J. Doe"]})
+    assert authors.lookup_author("By J Doe, BBC News")[0] == "jane"
+    authors.remove_trusted_author("jane")
+    assert authors.lookup_author("J. Doe") is None
+
+def test_single_word_aliases_only_match_a_whole_segment(tmp_path):
+    authors = TrustedAuthors(str(tmp_path / "trusted_authors.json"))
+
+    assert authors.lookup_author("Jane Doe, BBC")[0] == "bbc"
+    assert authors.lookup_author("Jane Doe | WHO")[0] == "who"
+    assert authors.lookup_author("Reporters who covered the outbreak") is None
+    assert authors.lookup_author("Via BBC and Reuters") is None
+    assert authors.lookup_author("Jane Doe, reporters who covered it") is None
+
+    # Re-adding an author replaces its old aliases without touching others
+    authors.add_trusted_author("jane", {"name": "Jane Doe", "aliases": ["J. Doe"]})
+    authors.add_trusted_author("jane", {"name": "Jane Doe", "aliases": ["Janie Doe"]})
+    assert authors.lookup_author("J. Doe") is None
+    assert authors.lookup_author("Janie Doe")[0] == "jane"
+    assert authors.lookup_author("BBC News")[0] == "bbc"
+
+def test_json_change_log_is_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(trusted_authors, 'MAX_CHANGE_LOG', 3)
+    authors = TrustedAuthors(str(tmp_path / "trusted_authors.json"))
+    for i in range(5):
+        authors.add_trusted_author(f"author_{i}", {"name": f"Author {i}"})
+    assert authors.last_change_seq() == 5
+    assert [seq for seq, _, _ in authors.changes_since(0)] == [3, 4, 5]
+    assert authors.changes_since(4) == [(5, "author_4", "put")]
+
+def test_lookup_at_100k_authors(tmp_path):
+    path = tmp_path / "trusted_authors.json"
+    registry = {
+        f"author_{i}": {"name": f"Reporter Number {i}", "aliases": [f"R{i} Desk"]}
+        for i in range(100000)
+    }
+    path.write_text(json.dumps(registry), encoding="utf-8")
+    authors = TrustedAuthors(str(path))
+
+    for i in range(1000):
+        assert authors.lookup_author(f"By Reporter Number {i * 7}, Some Outlet Staff")[0] == f"author_{i * 7}"
+        assert authors.lookup_author(f"Unknown Person {i}") is None
+
+def test_process_registry_uses_configured_store(tmp_path, monkeypatch):
+    store_path = str(tmp_path / "authors.sqlite3")
+    writer = TrustedAuthors(store_path=store_path)
+    writer.add_trusted_author("bbc", {"name": "BBC", "aliases": ["BBC News"]})
+    monkeypatch.setattr(trusted_authors, 'AUTHOR_STORE_PATH', store_path)
+    monkeypatch.setattr(trusted_authors, '_trusted_authors', None)
+
+    registry = trusted_authors.get_trusted_authors()
+    assert registry.store is not None and registry.store.readonly
+    assert registry.lookup_author("By Jane Doe, BBC News")[0] == "bbc"
+    writer.add_trusted_author("jane", {"name": "Jane Doe"})
+    assert registry.is_trusted_author("Jane Doe")
+
+def test_store_updates_visible_to_readers(tmp_path):
+    store_path = str(tmp_path / "authors.sqlite3")
+    writer = TrustedAuthors(store_path=store_path)
+    writer.store.put_many({
+        "who": {"name": "World Health Organization", "aliases": ["WHO"]},
+        "bbc": {"name": "BBC", "aliases": ["BBC News"]}
+    })
+    reader = TrustedAuthors(store_path=store_path, readonly=True)
+
+    assert reader.lookup_author("By Jane Doe, BBC News")[0] == "bbc"
+    assert reader.lookup_author("Jane Doe") is None
+
+    # Incremental writes are picked up by the already-open reader
+    writer.add_trusted_author("jane", {"name": "Jane Doe"})
+    assert reader.lookup_author("Jane Doe")[0] == "jane"
+    writer.remove_trusted_author("who")
+    assert not reader.is_trusted_author("WHO")
+    assert len(reader.get_all_authors()) == 2
+
+    changes = writer.store.changes_since(2)
+    assert [(author_id, op) for _, author_id, op in changes] == [("jane", "put"), ("who", "delete")]
+
+if __name__ == "__main__":
+    test_normalize_name()
+    print("Name normalization OK")
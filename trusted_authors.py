@@ -1,17 +1,117 @@
-from typing import Dict, List, Optional
+from typing import Dict, List, Mapping, Optional, Tuple
+from collections import deque
 import json
 import os
+import re
+import threading
+import time
 import logging
+from author_store import AuthorStore
+from metrics import observe
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_NON_WORD = re.compile(r"[^\w\s]+")
+_BYLINE_PREFIX = re.compile(r"^(?:written\s+)?by\s+")
+# SQLite AuthorStore serving the process-wide registry instead of the JSON
+# file (NEWSBUSTER_AUTHOR_STORE; import the JSON file into it with
+# "python author_store.py trusted_authors.json <path>")
+AUTHOR_STORE_PATH = os.environ.get('NEWSBUSTER_AUTHOR_STORE')
+# Changes kept in the JSON registry's in-memory change log
+MAX_CHANGE_LOG = 10000
+# Separators between the parts of a byline ("Jane Doe, BBC", "Jane Doe | WHO")
+_BYLINE_SEPARATORS = re.compile(r"[,;|/]|\s[-\u2013\u2014]\s")
+
+def normalize_name(name: str) -> str:
+    """
+    Normalize an author or outlet name for index lookups.
+
+    Casefolds, replaces punctuation with spaces, collapses whitespace and
+    drops a leading "By"/"Written by".
+
+    Args:
+        name: Raw author name or byline
+
+    Returns:
+        Normalized name
+    """
+    name = _NON_WORD.sub(' ', name.casefold())
+    name = ' '.join(name.split())
+    return _BYLINE_PREFIX.sub('', name)
+
 class TrustedAuthors:
-    def __init__(self):
-        self.authors_file = os.path.join(os.path.dirname(__file__), "..", "data", "trusted_authors.json")
-        self.authors: Dict[str, Dict] = self._load_authors()
-        logger.info(f"Trusted authors loaded from: {self.authors_file}")
+    def __init__(self, authors_file: Optional[str] = None, store_path: Optional[str] = None,
+                 readonly: bool = False):
+        """
+        Trusted author registry.
+
+        Args:
+            authors_file: JSON registry file (loaded fully into memory)
+            store_path: SQLite AuthorStore file; when given it is used instead
+                of the JSON file and queried on each lookup
+            readonly: Open the AuthorStore read-only (worker processes)
+        
+        The registry is read on first use, or up front with load().
+        """
+        self.authors_file = authors_file or os.path.join(os.path.dirname(__file__), "..", "data", "trusted_authors.json")
+        self.store_path = store_path
+        self.readonly = readonly
+        # Normalized name/alias -> author_id, and back (JSON registry only)
+        self._index: Dict[str, str] = {}
+        self._keys: Dict[str, List[str]] = {}
+        self._max_name_tokens = 1
+        self._store: Optional[AuthorStore] = None
+        self._authors: Optional[Mapping[str, Dict]] = None
+        self._load_lock = threading.Lock()
+        # Recent changes of the JSON registry (the AuthorStore keeps its own log)
+        self._changes: "deque[Tuple[int, str, str]]" = deque(maxlen=MAX_CHANGE_LOG)
+        self._change_seq = 0
+
+    def load(self) -> "TrustedAuthors":
+        """
+        Read the registry now instead of on the first lookup.
+        
+        Used to preload the index in a server's master process so that
+        forked workers share it.
+        
+        Returns:
+            self, for chaining
+        """
+        if self._authors is None:
+            with self._load_lock:
+                if self._authors is None:
+                    if self.store_path:
+                        self._store = AuthorStore(self.store_path, normalize_name, readonly=self.readonly)
+                        self._authors = self._store
+                        logger.info(f"Trusted authors opened from store: {self.store_path}")
+                    else:
+                        authors = self._load_authors()
+                        for author_id, author in authors.items():
+                            self._index_author(author_id, author)
+                        self._authors = authors
+                        logger.info(f"Trusted authors loaded from: {self.authors_file}")
+        return self
+
+    @property
+    def identity(self) -> str:
+        """Registry file behind this instance, e.g. to keep results of different registries apart"""
+        if self.store_path:
+            return f"store:{os.path.abspath(self.store_path)}"
+        return f"json:{os.path.abspath(self.authors_file)}"
+
+    @property
+    def store(self) -> Optional[AuthorStore]:
+        """SQLite AuthorStore backing the registry, or None for the JSON registry"""
+        self.load()
+        return self._store
+
+    @property
+    def authors(self) -> Mapping[str, Dict]:
+        """Author id -> details"""
+        self.load()
+        return self._authors
 
     def _load_authors(self) -> Dict[str, Dict]:
         """Load trusted authors from JSON file"""
@@ -24,6 +124,7 @@ class TrustedAuthors:
                 default_authors = {
                     "who": {
                         "name": "World Health Organization",
+                        "aliases": ["WHO", "World Health Organisation"],
                         "credentials": ["International Health Authority", "United Nations Specialized Agency"],
                         "publications": ["WHO Official Reports", "WHO Technical Series"],
                         "verification_status": "verified",
@@ -35,6 +136,7 @@ class TrustedAuthors:
                     },
                     "bbc": {
                         "name": "BBC",
+                        "aliases": ["BBC News", "British Broadcasting Corporation"],
                         "credentials": ["Public Service Broadcaster", "International News Organization"],
                         "publications": ["BBC News", "BBC World Service"],
                         "verification_status": "verified",
@@ -73,45 +175,149 @@ class TrustedAuthors:
             logger.error(f"Error loading trusted authors: {str(e)}")
             return {}
 
+    def _index_author(self, author_id: str, author: Dict) -> None:
+        """Add an author's name and aliases to the lookup index"""
+        keys = self._keys.setdefault(author_id, [])
+        for name in [author.get("name", "")] + list(author.get("aliases", [])):
+            key = normalize_name(name)
+            if key:
+                self._index[key] = author_id
+                keys.append(key)
+                self._max_name_tokens = max(self._max_name_tokens, len(key.split()))
+
+    def _unindex_author(self, author_id: str) -> None:
+        """Remove every index entry pointing at an author"""
+        for key in self._keys.pop(author_id, []):
+            if self._index.get(key) == author_id:
+                del self._index[key]
+
+    def lookup_author(self, author_name: str, fuzzy: bool = True) -> Optional[Tuple[str, Dict]]:
+        """
+        Find a trusted author by name, alias or byline.
+
+        An exact match on the normalized name or an alias is tried first.
+        With fuzzy matching, every run of two or more consecutive words in
+        the byline (longest first) is also looked up, so "By Jane Doe, BBC
+        News" matches the "BBC News" alias. One-word names only match the
+        whole byline or its trailing segment ("Jane Doe, BBC"), so "WHO"
+        does not match "Reporters who covered the outbreak".
+
+        Args:
+            author_name: Author name or byline text
+            fuzzy: Whether to match names contained in a longer byline
+
+        Returns:
+            Tuple of (author_id, author details), or None if not trusted
+        """
+        if not author_name:
+            return None
+        start = time.perf_counter()
+        try:
+            return self._lookup(author_name, fuzzy)
+        finally:
+            observe('author_lookup', time.perf_counter() - start)
+
+    def _lookup(self, author_name: str, fuzzy: bool) -> Optional[Tuple[str, Dict]]:
+        store = self.store
+        find = store.find if store is not None else self._index.get
+        key = normalize_name(author_name)
+        author_id = find(key)
+        if author_id is None and fuzzy:
+            tokens = key.split()
+            max_tokens = store.max_name_tokens() if store is not None else self._max_name_tokens
+            for n in range(min(max_tokens, len(tokens)), 1, -1):
+                for i in range(len(tokens) - n + 1):
+                    author_id = find(' '.join(tokens[i:i + n]))
+                    if author_id is not None:
+                        break
+                if author_id is not None:
+                    break
+            if author_id is None and len(tokens) > 1:
+                # Only split the raw byline once its last word is a known name
+                candidate = find(tokens[-1])
+                if candidate is not None:
+                    segments = [segment for segment in map(normalize_name, _BYLINE_SEPARATORS.split(author_name))
+                                if segment]
+                    if len(segments) > 1 and segments[-1] == tokens[-1]:
+                        author_id = candidate
+
+        if author_id is None:
+            logger.debug(f"Author not found in trusted list: {key}")
+            return None
+        try:
+            return author_id, self.authors[author_id]
+        except KeyError:
+            # Removed by another process between the two reads
+            return None
+
     def is_trusted_author(self, author_name: str) -> bool:
         """Check if an author is in the trusted list"""
-        if not author_name:
-            return False
-            
-        author_name = author_name.lower()
-        for author in self.authors.values():
-            if author["name"].lower() == author_name:
-                logger.info(f"Found trusted author: {author_name}")
-                return True
-        logger.info(f"Author not found in trusted list: {author_name}")
-        return False
+        return self.lookup_author(author_name, fuzzy=False) is not None
 
     def get_author_details(self, author_name: str) -> Optional[Dict]:
         """Get detailed information about a trusted author"""
-        if not author_name:
-            return None
-            
-        author_name = author_name.lower()
-        for author_id, author in self.authors.items():
-            if author["name"].lower() == author_name:
-                logger.info(f"Found author details for: {author_name}")
-                return author
-        logger.info(f"No author details found for: {author_name}")
-        return None
+        match = self.lookup_author(author_name, fuzzy=False)
+        return match[1] if match else None
 
     def add_trusted_author(self, author_id: str, author_data: Dict) -> None:
         """Add a new trusted author"""
+        if self.store is not None:
+            self.store.put(author_id, author_data)
+            logger.info(f"Added new trusted author: {author_id}")
+            return
+        self._unindex_author(author_id)
         self.authors[author_id] = author_data
+        self._index_author(author_id, author_data)
         self._save_authors()
+        self._log_change(author_id, 'put')
         logger.info(f"Added new trusted author: {author_id}")
 
     def remove_trusted_author(self, author_id: str) -> None:
         """Remove a trusted author"""
+        if self.store is not None:
+            if self.store.delete(author_id):
+                logger.info(f"Removed trusted author: {author_id}")
+            return
         if author_id in self.authors:
             del self.authors[author_id]
+            self._unindex_author(author_id)
             self._save_authors()
+            self._log_change(author_id, 'delete')
             logger.info(f"Removed trusted author: {author_id}")
 
+    def _log_change(self, author_id: str, op: str) -> None:
+        with self._load_lock:
+            self._change_seq += 1
+            self._changes.append((self._change_seq, author_id, op))
+
+    def changes_since(self, seq: int) -> List[Tuple[int, str, str]]:
+        """
+        Get registry changes made after a sequence number.
+
+        With an AuthorStore this reads its change log, so changes made by
+        other processes are included; the JSON registry only logs changes
+        made through this instance, and keeps the last MAX_CHANGE_LOG.
+
+        Args:
+            seq: Last sequence number already seen (0 for all)
+
+        Returns:
+            List of (seq, author_id, op) with op 'put' or 'delete'
+        """
+        if self.store is not None:
+            return self.store.changes_since(seq)
+        with self._load_lock:
+            if self._changes and seq < self._changes[0][0] - 1:
+                logger.warning(f"Changes after #{seq} up to #{self._changes[0][0] - 1} were dropped from the log")
+            return [change for change in self._changes if change[0] > seq]
+
+    def last_change_seq(self) -> int:
+        """Get the sequence number of the latest change (0 if none)"""
+        if self.store is not None:
+            return self.store.last_seq()
+        with self._load_lock:
+            return self._change_seq
+
     def _save_authors(self) -> None:
         """Save authors to JSON file"""
         try:
@@ -123,4 +329,25 @@ class TrustedAuthors:
 
     def get_all_authors(self) -> List[Dict]:
         """Get list of all trusted authors"""
-        return list(self.authors.values()) 
\ No newline at end of file
+        return list(self.authors.values())
+
+_trusted_authors: Optional[TrustedAuthors] = None
+_trusted_authors_lock = threading.Lock()
+
+def get_trusted_authors() -> TrustedAuthors:
+    """
+    Get the process-wide default TrustedAuthors (loaded on first lookup).
+
+    With AUTHOR_STORE_PATH set it reads that AuthorStore read-only: server
+    and bulk workers only look authors up, and see changes written by an
+    admin process through TrustedAuthors(store_path=...) on their next query.
+    """
+    global _trusted_authors
+    if _trusted_authors is None:
+        with _trusted_authors_lock:
+            if _trusted_authors is None:
+                if AUTHOR_STORE_PATH:
+                    _trusted_authors = TrustedAuthors(store_path=AUTHOR_STORE_PATH, readonly=True)
+                else:
+                    _trusted_authors = TrustedAuthors()
+    return _trusted_authors 
\ No newline at end of file